@@ -1,11 +1,24 @@
 # -*- mode: python ; coding: utf-8 -*-
-from PyInstaller.utils.hooks import collect_all
+from PyInstaller.utils.hooks import collect_submodules
 
 datas = [('.env', '.')]
 binaries = []
-hiddenimports = ['PIL._tkinter_finder']
-tmp_ret = collect_all('PyQt5')
-datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+# PyInstaller's own PyQt5 hooks pull in QtCore/QtGui/QtWidgets and the
+# platform plugins; collect_all('PyQt5') shipped every Qt module on top.
+# pynput picks its keyboard backend at runtime, so list the backends.
+hiddenimports = ['PIL._tkinter_finder'] + collect_submodules('pynput')
+
+# Qt modules and libraries ScreenTutor never imports
+excludes = [
+    'PyQt5.QtWebEngine', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets',
+    'PyQt5.QtWebKit', 'PyQt5.QtWebKitWidgets', 'PyQt5.QtQml', 'PyQt5.QtQuick',
+    'PyQt5.QtQuickWidgets', 'PyQt5.QtMultimedia', 'PyQt5.QtMultimediaWidgets',
+    'PyQt5.QtBluetooth', 'PyQt5.QtNfc', 'PyQt5.QtPositioning', 'PyQt5.QtLocation',
+    'PyQt5.QtSensors', 'PyQt5.QtSerialPort', 'PyQt5.QtSql', 'PyQt5.QtTest',
+    'PyQt5.QtDesigner', 'PyQt5.QtHelp', 'PyQt5.Qt3DCore', 'PyQt5.QtOpenGL',
+    'PyQt5.QtSvg', 'PyQt5.QtXml', 'PyQt5.QtXmlPatterns', 'PyQt5.QtDBus',
+    'matplotlib', 'scipy', 'pandas', 'IPython', 'pytest',
+]
 
 
 a = Analysis(
@@ -17,7 +30,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
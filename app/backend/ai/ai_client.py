@@ -1,68 +1,473 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from app.backend.ai.prompts import solve_prompt, hint_prompt
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from app.backend.ai.prompts import solve_prompt, hint_prompt, practice_prompt, batch_prompt, PROMPT_VERSION
+from app.backend.ai.context_selector import select_context, select_context_groups
+from app.backend.ai.practice import PracticeMerger, SHARD_FOCUS
+from app.backend.ai.tokens import estimate_tokens, TokenUsage
+from app.backend.ai import transport
+from app.backend.ai.hedging import LatencyStats, hedged_stream
+from app.backend.ai.router import Router
+from app.backend.tracing import tracer
+from app.backend.memory.question_memory import QuestionMemory, make_key
+from app.config import AI_BASE_URL, AI_MODEL, AI_FALLBACK_MODELS, HEDGE, HEDGE_DEADLINE_MS, ANSWER_CACHE, PRACTICE_SHARD_SIZE, PRACTICE_CONCURRENCY, SOLVE_BATCH_SIZE, SOLVE_CONCURRENCY, SOLVE_BATCH_MAX_TOKENS
 
-# Load .env file if it exists
-load_dotenv()
+# Default model (SCREENTUTOR_AI_MODEL) and the hedging order behind whichever model a request uses
+MODEL = AI_MODEL
+FALLBACK_MODELS = AI_FALLBACK_MODELS
 
-# You can change this to any OpenRouter model ID
-MODEL = "google/gemini-2.0-flash-001" 
+# Built on first use by get_client(): importing openai (httpx, pydantic)
+# costs most of a second, which shouldn't happen before the window shows
+client = None
+# The pooled httpx client underneath it (see transport.py)
+http_client = None
+_client_lock = threading.Lock()
 
-API_KEY = os.environ.get("OPENROUTER_API_KEY")
+# Answers for solve/hint, keyed on question + mode + model + prompt version
+answer_cache = QuestionMemory()
 
-# Create client only if key exists, otherwise it will be handled in the functions
-client = None
-if API_KEY:
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=API_KEY,
-    )
+# Tokens spent by this process (reported usage, estimated when the API omits it)
+usage = TokenUsage()
 
+# First-token / total latency and hedge outcomes per model
+latency = LatencyStats()
 
-def ask_solution(question: str) -> str:
-    if not client:
-        raise Exception("API Key Missing: Please set OPENROUTER_API_KEY environment variable.")
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": solve_prompt(question)}]
-    )
-    return response.choices[0].message.content.strip()
+# Picks the model tier per request (pass-through to MODEL unless SCREENTUTOR_ROUTER is on)
+router = Router(default_model=MODEL)
 
 
-def ask_hint(question: str) -> str:
-    if not client:
-        raise Exception("API Key Missing: Please set OPENROUTER_API_KEY environment variable.")
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": hint_prompt(question)}]
-    )
-    return response.choices[0].message.content.strip()
+def _record_usage(prompt, answer, reported=None):
+    if reported is not None and getattr(reported, "prompt_tokens", None) is not None:
+        usage.add(reported.prompt_tokens, reported.completion_tokens or 0)
+    else:
+        usage.add(estimate_tokens(prompt), estimate_tokens(answer))
 
 
-def generate_practice_questions(history: list, count=10) -> str:
+def get_client():
+    """The shared OpenAI client, or None when no API key is configured."""
+    global client, http_client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                # Load .env file if it exists
+                from dotenv import load_dotenv
+                load_dotenv()
+                api_key = os.environ.get("OPENROUTER_API_KEY")
+                if not api_key:
+                    return None
+                from openai import OpenAI
+                http_client = transport.build_http_client()
+                client = OpenAI(
+                    base_url=AI_BASE_URL,
+                    api_key=api_key,
+                    http_client=http_client,
+                    timeout=transport.timeouts(),
+                    # Retries are done by transport.with_retries
+                    max_retries=0,
+                )
+    return client
+
+
+def warm_up():
+    """
+    Imports openai, builds the client and opens a pooled connection to the
+    API ahead of the first question (run off the GUI thread).
+    """
+    if get_client():
+        transport.warm_up(http_client, AI_BASE_URL)
+
+
+def _require_client():
+    client = get_client()
     if not client:
         raise Exception("API Key Missing: Please set OPENROUTER_API_KEY environment variable.")
-    history_text = "\n".join([f"- {q}" for q in history])
-    
-    prompt = f"""
-    You are an expert educational content creator.
-    
-    USER HISTORY:
-    {history_text}
-    
-    TASK:
-    Generate exactly {count} practice questions similar in difficulty and topic to the history above.
-    
-    RULES:
-    1. Do not provide answers.
-    2. Format as a clean numbered list.
-    3. Ensure variety.
-    4. Topic should be strictly related to the history.
+    return client
+
+
+def _create(prompt: str, model=None, on_retry=None, **kwargs):
+    """One chat completion request, retried per the transport policy."""
+    client = _require_client()
+    return transport.with_retries(lambda: client.chat.completions.create(
+        model=model or MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        **kwargs
+    ), on_retry=on_retry)
+
+
+def hedge_models(model: str) -> list:
+    return [model] + [m for m in FALLBACK_MODELS if m != model]
+
+
+def hedging_enabled(model=None) -> bool:
+    return HEDGE and len(hedge_models(model or MODEL)) > 1
+
+
+def _complete(prompt: str, model=None) -> str:
+    model = model or MODEL
+    if hedging_enabled(model):
+        # Hedging needs to see the first token, so go through the stream
+        return "".join(_stream(prompt, model)).strip()
+    t0 = time.perf_counter()
+    try:
+        response = _create(prompt, model=model)
+    except Exception:
+        latency.record(model, error=True)
+        raise
+    latency.record(model, total_ms=(time.perf_counter() - t0) * 1000)
+    answer = response.choices[0].message.content.strip()
+    _record_usage(prompt, answer, getattr(response, "usage", None))
+    return answer
+
+
+def _stream(prompt: str, model=None):
+    """
+    Yields the completion text chunk by chunk as the model produces it.
+    Closing the generator early closes the HTTP stream.
+    """
+    model = model or MODEL
+    if hedging_enabled(model):
+        # Build the client up front so its (one-off) cost doesn't count against the deadline
+        _require_client()
+        open_stream = lambda m, on_open, on_retry: _model_stream(prompt, m, on_open, on_retry)
+        yield from hedged_stream(hedge_models(model), open_stream, HEDGE_DEADLINE_MS / 1000, stats=latency)
+    else:
+        yield from _model_stream(prompt, model)
+
+
+def _model_stream(prompt: str, model: str, on_open=None, on_retry=None):
+    t0 = time.perf_counter()
+    try:
+        # Only opening the stream is retried; once text has been shown it can't be taken back
+        response = _create(prompt, model=model, on_retry=on_retry, stream=True)
+    except Exception:
+        latency.record(model, error=True)
+        raise
+    if on_open:
+        on_open(response)
+    started = False
+    completed = False
+    ttft_ms = None
+    parts = []
+    try:
+        for event in response:
+            if not event.choices:
+                continue
+            text = event.choices[0].delta.content
+            if not text:
+                continue
+            if not started:
+                # Match the non-streaming .strip() at the start of the answer
+                text = text.lstrip()
+                if not text:
+                    continue
+                started = True
+                ttft_ms = (time.perf_counter() - t0) * 1000
+            parts.append(text)
+            yield text
+        completed = True
+    finally:
+        response.close()
+        _record_usage(prompt, "".join(parts))
+        # Streams closed early (cancelled answers, lost hedges) only count up to their first token
+        total_ms = (time.perf_counter() - t0) * 1000 if completed else None
+        latency.record(model, ttft_ms=ttft_ms, total_ms=total_ms)
+
+
+def collect_stream(chunks, on_chunk=None, should_stop=None) -> str:
+    """
+    Callback-style consumer for the streaming API: calls on_chunk(text) for
+    every chunk and returns the full answer. Stops early (closing the
+    stream) once should_stop() returns True.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            if should_stop and should_stop():
+                break
+            parts.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return "".join(parts).strip()
+
+
+# --- Routing ---
+def route_for(text: str, mode: str):
+    # The route (tier, model, rule, features) is logged on the ai_request span
+    return router.route(text, mode)
+
+
+def _request(prompt: str, route, **attrs) -> str:
+    """_complete() on the routed model, logged to the trace log with its latency."""
+    with tracer.span("ai_request", **route.attrs(), **attrs) as span:
+        answer = _complete(prompt, route.model)
+        span.attrs["answer_tokens"] = estimate_tokens(answer)
+    return answer
+
+
+def _request_stream(prompt: str, route):
+    """_stream() on the routed model, logged with first-token and total latency."""
+    span = tracer.start("ai_request", stream=True, **route.attrs())
+    tokens = 0
+    try:
+        for chunk in _stream(prompt, route.model):
+            if not tokens:
+                span.attrs["ttft_ms"] = round(span.ms, 1)
+            tokens += estimate_tokens(chunk)
+            yield chunk
+    finally:
+        span.end(answer_tokens=tokens)
+
+
+def build_prompt(question: str, mode: str) -> str:
+    return solve_prompt(question) if mode == "solve" else hint_prompt(question)
+
+
+def cached_answer(question: str, mode: str):
+    """Returns the cached answer for this question/mode, or None."""
+    return answer_cache.get(make_key(question, mode, router.route(question, mode).model, PROMPT_VERSION))
+
+
+def _ask(question: str, mode: str, prompt: str, use_cache: bool):
+    route = route_for(question, mode)
+    key = make_key(question, mode, route.model, PROMPT_VERSION)
+    if use_cache:
+        cached = answer_cache.get(key)
+        if cached is not None:
+            return cached
+
+    answer = _request(prompt, route)
+    if use_cache and answer:
+        answer_cache.store(key, answer)
+    return answer
+
+
+def _ask_stream(question: str, mode: str, prompt: str, use_cache: bool):
+    route = route_for(question, mode)
+    key = make_key(question, mode, route.model, PROMPT_VERSION)
+    if use_cache:
+        cached = answer_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    for chunk in _request_stream(prompt, route):
+        parts.append(chunk)
+        yield chunk
+    # Only reached when the stream ran to completion, so partial answers are never cached
+    answer = "".join(parts).strip()
+    if use_cache and answer:
+        answer_cache.store(key, answer)
+
+
+def ask_solution(question: str, use_cache=ANSWER_CACHE, stream=False):
+    """Returns the answer, or an iterator of text chunks when stream=True."""
+    ask = _ask_stream if stream else _ask
+    return ask(question, "solve", solve_prompt(question), use_cache)
+
+
+def ask_hint(question: str, use_cache=ANSWER_CACHE, stream=False):
+    """Returns the hint, or an iterator of text chunks when stream=True."""
+    ask = _ask_stream if stream else _ask
+    return ask(question, "hint", hint_prompt(question), use_cache)
+
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def parse_batch_answers(text: str, ids) -> dict:
+    """
+    Validates a batch response: returns {id: answer} for the ids that came
+    back with a non-empty string answer. Tolerates markdown fences and
+    prose around the JSON object; anything else is simply missing.
+    """
+    match = _JSON_OBJECT.search(text or "")
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    items = data.get("answers") if isinstance(data, dict) else None
+    if isinstance(items, dict):
+        items = [{"id": k, "answer": v} for k, v in items.items()]
+    if not isinstance(items, list):
+        return {}
+
+    wanted = set(ids)
+    answers = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        qid, answer = str(item.get("id", "")).strip("[] "), item.get("answer")
+        if qid in wanted and qid not in answers and isinstance(answer, str) and answer.strip():
+            answers[qid] = answer.strip()
+    return answers
+
+
+def ask_solutions_batch(questions: list, mode="solve", use_cache=ANSWER_CACHE,
+                        batch_size=SOLVE_BATCH_SIZE, max_workers=SOLVE_CONCURRENCY,
+                        max_batch_tokens=SOLVE_BATCH_MAX_TOKENS, on_answer=None, on_error=None) -> list:
+    """
+    Answers many short questions with a few batched requests instead of one
+    request each. Cached questions are served from the answer cache; the
+    rest go out in batches of `batch_size` asking for one JSON answer per
+    question id, while questions longer than `max_batch_tokens` get their
+    own request. At most `max_workers` requests run at a time.
+    Items missing or malformed in a batch response are retried with the
+    normal single-question call. Every answer is cached under the same key
+    as a single call, so ask_solution/ask_hint hit it afterwards.
+    on_answer(index, answer) is called as each answer becomes available.
+    Returns the answers in question order (None for failed ones). Failures
+    go to on_error(index, exception) if given; otherwise the first error is
+    raised once all other questions have finished.
     """
-    
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content.strip()
+    answers = [None] * len(questions)
+    routes = [router.route(q, mode) for q in questions]
+    keys = [make_key(q, mode, r.model, PROMPT_VERSION) for q, r in zip(questions, routes)]
+
+    def deliver(index, answer):
+        answers[index] = answer
+        if on_answer:
+            on_answer(index, answer)
+
+    # Cache hits first; identical questions are only asked once
+    pending = {}
+    for i, key in enumerate(keys):
+        cached = answer_cache.get(key) if use_cache else None
+        if cached is not None:
+            deliver(i, cached)
+        else:
+            pending.setdefault(key, []).append(i)
+
+    def deliver_all(key, answer):
+        if use_cache and answer:
+            answer_cache.store(key, answer)
+        for i in pending[key]:
+            deliver(i, answer)
+
+    def route_of(key):
+        return routes[pending[key][0]]
+
+    def run_batch(batch_keys):
+        ids = [str(n) for n in range(1, len(batch_keys) + 1)]
+        if len(batch_keys) == 1:
+            return batch_keys  # a batch of one is just a single call
+        prompt = batch_prompt({qid: questions[pending[k][0]] for qid, k in zip(ids, batch_keys)}, mode)
+        route = route_of(batch_keys[0])
+        with tracer.span("batch_answers", size=len(batch_keys), mode=mode) as span:
+            try:
+                parsed = parse_batch_answers(_request(prompt, route, batch=len(batch_keys)), ids)
+            except Exception as e:
+                # Every question is retried individually
+                span.attrs.update(answered=0, error=str(e))
+                return batch_keys
+            for qid, key in zip(ids, batch_keys):
+                if qid in parsed:
+                    deliver_all(key, parsed[qid])
+            failed = [k for qid, k in zip(ids, batch_keys) if qid not in parsed]
+            span.attrs["answered"] = len(batch_keys) - len(failed)
+        return failed
+
+    def run_single(key):
+        try:
+            question = questions[pending[key][0]]
+            deliver_all(key, _request(build_prompt(question, mode), route_of(key)))
+        except Exception as e:
+            errors.append(e)
+            if on_error:
+                for i in pending[key]:
+                    on_error(i, e)
+
+    short = [k for k in pending if estimate_tokens(questions[pending[k][0]]) <= max_batch_tokens]
+    long = [k for k in pending if k not in short]
+    step = max(1, batch_size)
+    # A batch goes to one model, so questions are batched per routed model
+    by_model = {}
+    for k in short:
+        by_model.setdefault(route_of(k).model, []).append(k)
+    batches = [group[i:i + step] for group in by_model.values() for i in range(0, len(group), step)]
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        singles = [pool.submit(run_single, k) for k in long]
+        for future in as_completed([pool.submit(run_batch, b) for b in batches]):
+            singles.extend(pool.submit(run_single, k) for k in future.result())
+        for future in singles:
+            future.result()
+
+    if errors and not on_error:
+        raise errors[0]
+    return answers
+
+
+def generate_practice_questions(history: list, count=10, stream=False):
+    # Bounded, deduplicated, topic-balanced slice of the history
+    history_text = "\n".join([f"- {q}" for q in select_context(history)])
+    prompt = practice_prompt(history_text, count)
+    route = route_for(history_text, "practice")
+
+    if stream:
+        return _request_stream(prompt, route)
+    return _request(prompt, route)
+
+
+# How often a sharded practice run checks should_stop() while shards are in flight
+STOP_POLL_S = 0.1
+
+
+def generate_practice_questions_sharded(history: list, count=30, shard_size=PRACTICE_SHARD_SIZE,
+                                        max_workers=PRACTICE_CONCURRENCY, on_questions=None,
+                                        should_stop=None) -> str:
+    """
+    Splits a large practice set into ceil(count / shard_size) requests, one
+    per topic group, and runs them concurrently (at most max_workers at a
+    time). Shard outputs are merged as they complete: near-duplicates are
+    dropped and numbering continues across shards.
+    on_questions(text) receives each batch of newly accepted questions,
+    already numbered. One top-up round refills what dedupe removed.
+    """
+    shards = max(1, -(-count // shard_size))
+    groups = select_context_groups(history, shards)
+    merger = PracticeMerger(limit=count)
+
+    def run_shard(index, shard_count):
+        history_text = "\n".join(f"- {q}" for q in groups[index % len(groups)])
+        focus = SHARD_FOCUS[index % len(SHARD_FOCUS)] if shards > 1 else None
+        return _request(practice_prompt(history_text, shard_count, focus), route_for(history_text, "practice"))
+
+    def run_round(jobs):
+        errors = []
+        pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            pending = {pool.submit(run_shard, index, n) for index, n in jobs}
+            while pending and not (should_stop and should_stop()):
+                done, pending = wait(pending, timeout=STOP_POLL_S, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        accepted = merger.add(future.result())
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if accepted and on_questions:
+                        on_questions(PracticeMerger.format(accepted))
+        finally:
+            # On stop, return right away: queued shards never start and
+            # running ones finish in the background with nobody waiting
+            pool.shutdown(wait=False, cancel_futures=True)
+        return errors
+
+    sizes = [shard_size] * (shards - 1) + [count - shard_size * (shards - 1)]
+    errors = run_round(list(enumerate(sizes)))
+    if errors and not merger.questions:
+        raise errors[0]
+
+    if merger.missing and not (should_stop and should_stop()):
+        run_round([(shards, merger.missing)])
+
+    return merger.text()
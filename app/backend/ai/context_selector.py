@@ -0,0 +1,190 @@
+import math
+import re
+from collections import Counter
+
+from app.backend.ai.tokens import estimate_tokens
+from app.backend.tracing import tracer
+from app.config import PRACTICE_CONTEXT_TOKENS, PRACTICE_CONTEXT_CANDIDATES
+
+# Two questions whose character 3-grams overlap this much are OCR variants
+# of the same one (TF-IDF would overweight the misread words)
+DUPLICATE_SIMILARITY = 0.8
+# A question joins an existing topic cluster above this similarity
+CLUSTER_SIMILARITY = 0.25
+# Long multi-question captures are clipped so one item can't eat the budget
+MAX_ITEM_TOKENS = 200
+# Always keep this many of the newest questions
+RECENT_KEEP = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "a", "an", "of", "to", "in", "is", "are", "and", "or", "for", "on",
+    "at", "by", "be", "it", "as", "with", "that", "this", "what", "which",
+    "find", "from", "if", "its", "was", "were", "then", "than", "into",
+}
+
+
+def _terms(text):
+    # Numbers say nothing about the topic and would dominate IDF
+    return [w for w in _WORD.findall(text.lower())
+            if len(w) > 1 and not w.isdigit() and w not in _STOPWORDS]
+
+
+def _tfidf(docs):
+    """Returns one L2-normalized sparse TF-IDF vector (dict) per document."""
+    counts = [Counter(_terms(d)) for d in docs]
+    df = Counter()
+    for c in counts:
+        df.update(c.keys())
+    n = len(docs)
+
+    vectors = []
+    for c in counts:
+        vec = {t: tf * (math.log((1 + n) / (1 + df[t])) + 1) for t, tf in c.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({t: v / norm for t, v in vec.items()})
+    return vectors
+
+
+def shingles(text):
+    """Character 3-grams of the whitespace/case-normalized text."""
+    text = " ".join(text.lower().split())
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+
+def _clip(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # ~4 characters per token is close enough for a clip
+    return text[:max_tokens * 4].rsplit(" ", 1)[0] + " ..."
+
+
+class Cluster:
+    def __init__(self, index, vector):
+        self.members = [index]
+        self.centroid = dict(vector)
+
+    def add(self, index, vector):
+        self.members.append(index)
+        k = len(self.members)
+        for t in set(self.centroid) | set(vector):
+            self.centroid[t] = self.centroid.get(t, 0.0) * (k - 1) / k + vector.get(t, 0.0) / k
+
+
+def _select(history, budget_tokens, max_candidates):
+    """Returns (newest-first texts, chosen indices, clusters, tokens used)."""
+    with tracer.span("practice_context", budget_tokens=budget_tokens) as span:
+        texts, chosen, clusters, used = _pick(history, budget_tokens, max_candidates)
+        span.attrs.update(candidates=len(texts), chosen=len(chosen), topics=len(clusters), tokens=used)
+    return texts, chosen, clusters, used
+
+
+def _pick(history, budget_tokens, max_candidates):
+    candidates = [q.strip() for q in history[-max_candidates:] if q and q.strip()]
+    if not candidates:
+        return [], set(), [], 0
+
+    # Newest first: when two variants collide, the newer OCR wins
+    newest_first = list(reversed(candidates))
+    vectors = _tfidf(newest_first)
+    grams = [shingles(q) for q in newest_first]
+
+    clusters = []
+    kept = []
+    for i, vec in enumerate(vectors):
+        if not vec:
+            # Only numbers/symbols (e.g. "12 x 7 = ?"): no topic to match on,
+            # so it is its own topic unless it's a variant of another such one
+            if any(not vectors[j] and jaccard(grams[i], grams[j]) >= DUPLICATE_SIMILARITY for j in kept):
+                continue
+            clusters.append(Cluster(i, vec))
+            kept.append(i)
+            continue
+        best, best_sim = None, 0.0
+        for cluster in clusters:
+            sim = _cosine(vec, cluster.centroid)
+            if sim > best_sim:
+                best, best_sim = cluster, sim
+
+        if best and best_sim >= CLUSTER_SIMILARITY:
+            if any(jaccard(grams[i], grams[j]) >= DUPLICATE_SIMILARITY for j in best.members):
+                continue
+            best.add(i, vec)
+        else:
+            clusters.append(Cluster(i, vec))
+        kept.append(i)
+
+    # Order of preference
+    order = kept[:RECENT_KEEP]
+    for cluster in sorted(clusters, key=lambda c: (-len(c.members), c.members[0])):
+        central = max(cluster.members, key=lambda j: _cosine(vectors[j], cluster.centroid))
+        order.append(central)
+    order.extend(kept)
+
+    chosen, used = set(), 0
+    for i in order:
+        if i in chosen:
+            continue
+        text = _clip(newest_first[i], MAX_ITEM_TOKENS)
+        cost = estimate_tokens(f"- {text}\n")
+        if used + cost > budget_tokens:
+            continue
+        chosen.add(i)
+        newest_first[i] = text
+        used += cost
+
+    return newest_first, chosen, clusters, used
+
+
+def select_context(history, budget_tokens=PRACTICE_CONTEXT_TOKENS, max_candidates=PRACTICE_CONTEXT_CANDIDATES):
+    """
+    Picks the history lines to put in the practice prompt.
+    1. only the newest `max_candidates` questions are considered, so the
+       cost stays flat however large the history grows
+    2. near-identical OCR variants are collapsed (character 3-gram Jaccard)
+    3. questions are grouped into topic clusters (leader clustering)
+    4. the newest few, then each topic's most central question, then the
+       rest newest-first are added until `budget_tokens` is reached
+    Returns the chosen questions in chronological order.
+    """
+    texts, chosen, _, _ = _select(history, budget_tokens, max_candidates)
+    return [texts[i] for i in sorted(chosen, reverse=True)]
+
+
+def select_context_groups(history, groups, budget_tokens=PRACTICE_CONTEXT_TOKENS,
+                          max_candidates=PRACTICE_CONTEXT_CANDIDATES):
+    """
+    Same selection as select_context(), split into `groups` lists along topic
+    clusters (whole clusters, balanced by token count) for sharded
+    generation. When there are fewer topics than groups, the spare groups
+    get the full context.
+    """
+    texts, chosen, clusters, _ = _select(history, budget_tokens, max_candidates)
+    if not chosen:
+        return [[] for _ in range(groups)]
+
+    buckets = [[] for _ in range(groups)]
+    sizes = [0] * groups
+    for cluster in sorted(clusters, key=lambda c: -len(c.members)):
+        members = [i for i in cluster.members if i in chosen]
+        if not members:
+            continue
+        target = sizes.index(min(sizes))
+        buckets[target].extend(members)
+        sizes[target] += sum(estimate_tokens(texts[i]) for i in members)
+
+    everything = sorted(chosen, reverse=True)
+    return [
+        [texts[i] for i in sorted(bucket, reverse=True)] if bucket else [texts[i] for i in everything]
+        for bucket in buckets
+    ]
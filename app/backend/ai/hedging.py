@@ -0,0 +1,162 @@
+"""
+Hedged requests: if the primary model hasn't produced a first token within
+the deadline, the same prompt is also sent to the next fallback model. The
+first model to answer wins; the others are cancelled (their HTTP streams
+closed). Per-model first-token / total latency is tracked for p95/p99.
+"""
+import queue
+import threading
+from collections import Counter, deque
+
+from app.backend.tracing import tracer
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * q
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+class LatencyStats:
+    """Recent latency samples and hedge outcomes per model. Thread-safe."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._ttft = {}
+        self._total = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, ttft_ms=None, total_ms=None, error=False):
+        with self._lock:
+            if ttft_ms is not None:
+                self._ttft.setdefault(model, deque(maxlen=self.window)).append(ttft_ms)
+            if total_ms is not None:
+                self._total.setdefault(model, deque(maxlen=self.window)).append(total_ms)
+            self._counts.setdefault(model, Counter())["errors" if error else "requests"] += 1
+
+    def count(self, model, event):
+        """Hedge outcomes: "hedged" (fired as a hedge), "wins", "cancelled"."""
+        with self._lock:
+            self._counts.setdefault(model, Counter())[event] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            models = set(self._ttft) | set(self._total) | set(self._counts)
+            report = {}
+            for model in sorted(models):
+                entry = dict(self._counts.get(model, {}))
+                for name, samples in (("ttft", self._ttft.get(model, ())), ("total", self._total.get(model, ()))):
+                    for q in (50, 95, 99):
+                        value = percentile(samples, q / 100)
+                        entry[f"{name}_p{q}_ms"] = round(value, 1) if value is not None else None
+                report[model] = entry
+            return report
+
+
+class _Racer:
+    """One model's attempt, run on its own thread up to its first chunk."""
+
+    def __init__(self, model, open_stream, results):
+        self.model = model
+        self.chunks = None
+        self.finished = False
+        self._open_stream = open_stream
+        self._results = results
+        self._response = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"hedge-{model}", daemon=True)
+
+    def _run(self):
+        try:
+            self.chunks = self._open_stream(self.model, self._opened, self._retrying)
+            event = ("first", next(self.chunks, None))
+        except Exception as e:
+            event = ("error", e)
+        self.finished = True
+        self._results.put((self,) + event)
+
+    def _opened(self, response):
+        with self._lock:
+            self._response = response
+            cancelled = self._cancelled
+        if cancelled:
+            response.close()
+
+    def _retrying(self, attempt, error, delay):
+        self._results.put((self, "retry", error))
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            response = self._response
+        try:
+            if response:
+                response.close()  # unblocks the racer's read
+            if self.finished and self.chunks:
+                self.chunks.close()
+        except Exception:
+            pass
+
+
+def hedged_stream(models, open_stream, deadline_s, stats=None):
+    """
+    Yields the answer chunks of whichever model produces a first token first.
+    open_stream(model, on_open, on_retry) must return a chunk generator that
+    calls on_open(response) once the HTTP stream is open and on_retry(...)
+    when it is about to back off. A model that errors or starts retrying is
+    hedged immediately instead of waiting out the deadline.
+    """
+    results = queue.Queue()
+    racers = []
+
+    def launch():
+        racer = _Racer(models[len(racers)], open_stream, results)
+        if racers:
+            tracer.event("hedge", model=racers[-1].model, fallback=racer.model)
+            if stats:
+                stats.count(racer.model, "hedged")
+        racers.append(racer)
+        racer.thread.start()
+
+    launch()
+    failed = set()
+    winner = first = None
+    while winner is None:
+        can_hedge = len(racers) < len(models)
+        try:
+            racer, kind, value = results.get(timeout=deadline_s if can_hedge else None)
+        except queue.Empty:
+            launch()
+            continue
+        if kind == "first":
+            winner, first = racer, value
+        elif kind == "retry":
+            if can_hedge and racer is racers[-1]:
+                launch()
+        else:
+            failed.add(racer)
+            if can_hedge:
+                launch()
+            elif len(failed) == len(racers):
+                raise value
+
+    for racer in racers:
+        if racer is not winner and racer not in failed:
+            racer.cancel()
+            if stats:
+                stats.count(racer.model, "cancelled")
+    if stats:
+        stats.count(winner.model, "wins")
+
+    try:
+        if first is not None:
+            yield first
+        yield from winner.chunks
+    finally:
+        winner.chunks.close()
@@ -0,0 +1,74 @@
+import re
+import threading
+
+from app.backend.ai.context_selector import shingles, jaccard
+
+# Questions from different shards this similar are treated as the same one
+DUPLICATE_SIMILARITY = 0.85
+
+# Style hints so parallel shards don't all write the same kind of question
+SHARD_FOCUS = [
+    "conceptual understanding",
+    "numerical / calculation",
+    "real-world application",
+    "multiple-choice",
+    "reasoning and explanation",
+]
+
+_ITEM = re.compile(r"^\s*(?:Q\s*)?(\d+)\s*[\.\):]\s*(.+)$", re.IGNORECASE)
+
+
+def parse_numbered_list(text: str):
+    """
+    Splits an LLM numbered list into items. Lines that don't start a new
+    number are continuation lines (e.g. MCQ options) of the previous item.
+    """
+    items = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        match = _ITEM.match(line)
+        if match:
+            items.append(match.group(2).strip())
+        elif items:
+            items[-1] += "\n" + line.rstrip()
+    return items
+
+
+class PracticeMerger:
+    """
+    Collects shard results as they complete, drops near-duplicates across
+    shards and numbers the survivors continuously. Thread-safe.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.questions = []
+        self._grams = []
+        self._lock = threading.Lock()
+
+    def add(self, text: str):
+        """Merges one shard's output; returns the newly accepted questions."""
+        accepted = []
+        with self._lock:
+            for item in parse_numbered_list(text):
+                if self.limit is not None and len(self.questions) >= self.limit:
+                    break
+                grams = shingles(item)
+                if any(jaccard(grams, other) >= DUPLICATE_SIMILARITY for other in self._grams):
+                    continue
+                self.questions.append(item)
+                self._grams.append(grams)
+                accepted.append((len(self.questions), item))
+        return accepted
+
+    @property
+    def missing(self) -> int:
+        return max(0, self.limit - len(self.questions)) if self.limit is not None else 0
+
+    @staticmethod
+    def format(numbered):
+        return "\n".join(f"{n}. {q}" for n, q in numbered)
+
+    def text(self) -> str:
+        return self.format(enumerate(self.questions, 1))
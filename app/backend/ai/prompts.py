@@ -1,3 +1,8 @@
+# Bump whenever a prompt below changes so cached answers from the old
+# wording are not served for the new one
+PROMPT_VERSION = "1"
+
+
 def solve_prompt(question: str) -> str:
     return f"""
 You are a school tutor for students (grades 6–12).
@@ -31,3 +36,61 @@ RULES:
 QUESTION:
 {question}
 """
+
+
+def practice_prompt(history_text: str, count: int, focus: str = None) -> str:
+    # `focus` steers parallel shards toward different question styles
+    focus_rule = f"\n    5. Focus on {focus} questions." if focus else ""
+    return f"""
+    You are an expert educational content creator.
+    
+    USER HISTORY:
+    {history_text}
+    
+    TASK:
+    Generate exactly {count} practice questions similar in difficulty and topic to the history above.
+    
+    RULES:
+    1. Do not provide answers.
+    2. Format as a clean numbered list.
+    3. Ensure variety.
+    4. Topic should be strictly related to the history.{focus_rule}
+    """
+
+
+def batch_prompt(questions: dict, mode: str) -> str:
+    """
+    Several questions in one request. `questions` maps id -> question text;
+    each answer follows the same rules as the single-question prompt so
+    batched and single answers are interchangeable in the answer cache.
+    """
+    if mode == "solve":
+        role = "You are a school tutor for students (grades 6–12)."
+        rules = """- Solve ONLY the core question
+- Ignore surrounding text
+- Step-by-step
+- Plain text only
+- End with: FINAL ANSWER: <answer>"""
+    else:
+        role = "You are a helpful tutor."
+        rules = """- Give ONLY a hint
+- No full solution
+- No final answer
+- 1–2 short guiding steps"""
+    listing = "\n\n".join(f"[{qid}]\n{text}" for qid, text in questions.items())
+    return f"""
+{role}
+
+TASK:
+Answer each question below independently.
+
+RULES FOR EACH ANSWER:
+{rules}
+
+OUTPUT FORMAT:
+Return ONLY a JSON object, no markdown fences, exactly one entry per question id:
+{{"answers": [{{"id": "<id>", "answer": "<answer text>"}}]}}
+
+QUESTIONS:
+{listing}
+"""
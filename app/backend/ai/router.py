@@ -0,0 +1,119 @@
+"""
+Local model router: cheap regex features of the question text pick a model
+tier per request, so one-line hints and vocabulary MCQs go to the fast model
+and multi-step numericals to the strong one. Offline and deterministic, so
+the same question always routes (and caches) the same way.
+
+Rules are tried in order; the first whose conditions all hold wins. A
+condition is a feature name with an optional _gt/_gte/_lt/_lte suffix, e.g.
+{"mode": "solve", "numbers_gte": 3}. SCREENTUTOR_ROUTER_RULES can point to a
+JSON file with a replacement list.
+"""
+import json
+import logging
+import os
+import re
+
+from app.backend.ai.tokens import estimate_tokens
+from app.config import ROUTER, ROUTER_RULES, MODEL_FAST, MODEL_STRONG
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RULES = [
+    {"name": "practice", "when": {"mode": "practice"}, "tier": "strong"},
+    {"name": "long", "when": {"tokens_gt": 120}, "tier": "strong"},
+    {"name": "numerical", "when": {"mode": "solve", "units_gte": 1, "numbers_gte": 2}, "tier": "strong"},
+    {"name": "equation", "when": {"mode": "solve", "equation": True}, "tier": "strong"},
+    {"name": "calculation", "when": {"mode": "solve", "operators_gte": 3}, "tier": "strong"},
+    {"name": "default", "when": {}, "tier": "fast"},
+]
+
+_NUMBER = re.compile(r"(?<![A-Za-z])\d+(?:[.,]\d+)?")
+_OPERATOR = re.compile(r"[=+×÷*/^√∫∑≤≥<>]|(?<=\d)\s*-\s*(?=\d)")
+_EQUATION = re.compile(r"[A-Za-z0-9)]\s*=\s*[-A-Za-z0-9(]")
+_UNIT = re.compile(
+    r"\d\s*(?:m/s\^?2?|km/h|m/s²|kg|mg|g|km|cm|mm|m|ms|s|h|N|J|kJ|W|kW|V|A|Ω|Hz|Pa|kPa|atm|mol|K|°C|°|%|L|mL)(?![A-Za-z])"
+)
+_OPTION = re.compile(r"(?:^|\s)\(?[a-dA-D][).]\s", re.MULTILINE)
+_REASONING = re.compile(r"\b(?:calculate|find|determine|derive|prove|show that|evaluate|solve|compute)\b", re.I)
+
+
+def features(text: str, mode: str) -> dict:
+    return {
+        "mode": mode,
+        "chars": len(text),
+        "lines": text.count("\n") + 1 if text else 0,
+        "tokens": estimate_tokens(text),
+        "numbers": len(_NUMBER.findall(text)),
+        "operators": len(_OPERATOR.findall(text)),
+        "units": len(_UNIT.findall(text)),
+        "options": len(_OPTION.findall(text)),
+        "mcq": len(_OPTION.findall(text)) >= 2,
+        "equation": bool(_EQUATION.search(text)),
+        "reasoning": bool(_REASONING.search(text)),
+    }
+
+
+_OPS = {
+    "_gte": lambda a, b: a >= b,
+    "_lte": lambda a, b: a <= b,
+    "_gt": lambda a, b: a > b,
+    "_lt": lambda a, b: a < b,
+}
+
+
+def _holds(name, expected, feats) -> bool:
+    for suffix, op in _OPS.items():
+        if name.endswith(suffix):
+            value = feats.get(name[:-len(suffix)])
+            return value is not None and op(value, expected)
+    return feats.get(name) == expected
+
+
+def load_rules(path=ROUTER_RULES) -> list:
+    if not path:
+        return DEFAULT_RULES
+    try:
+        with open(os.path.expanduser(path), "r") as f:
+            rules = json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not load router rules from {path} ({e}); using defaults")
+        return DEFAULT_RULES
+    return rules
+
+
+class Route:
+    def __init__(self, tier, model, rule, feats=None):
+        self.tier = tier
+        self.model = model
+        self.rule = rule
+        self.features = feats or {}
+
+    def attrs(self) -> dict:
+        """Flat attributes for the trace log."""
+        return {"tier": self.tier, "model": self.model, "rule": self.rule, **self.features}
+
+    def __repr__(self):
+        return f"Route({self.tier}, {self.model}, rule={self.rule})"
+
+
+class Router:
+    def __init__(self, tiers=None, rules=None, enabled=ROUTER, default_model=MODEL_FAST):
+        self.tiers = tiers or {"fast": MODEL_FAST, "strong": MODEL_STRONG}
+        self.rules = rules if rules is not None else load_rules()
+        self.enabled = enabled
+        self.default_model = default_model
+
+    def route(self, text: str, mode: str) -> Route:
+        if not self.enabled:
+            return Route("default", self.default_model, None)
+        feats = features(text, mode)
+        for rule in self.rules:
+            if all(_holds(name, expected, feats) for name, expected in rule.get("when", {}).items()):
+                tier = rule.get("tier", "fast")
+                model = self.tiers.get(tier)
+                if not model:
+                    log.warning(f"Router rule '{rule.get('name')}' names unknown tier '{tier}'")
+                    continue
+                return Route(tier, model, rule.get("name"), feats)
+        return Route("fast", self.tiers["fast"], None, feats)
@@ -0,0 +1,52 @@
+import re
+import threading
+
+# Words, digit runs and single symbols roughly line up with BPE pieces
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Offline token estimate, no tokenizer download needed.
+    English words average ~4 characters per token, digits ~3 per token and
+    symbols/punctuation are usually a token each.
+    """
+    if not text:
+        return 0
+    total = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isalpha():
+            total += max(1, (len(piece) + 3) // 4)
+        elif piece[0].isdigit():
+            total += (len(piece) + 2) // 3
+        else:
+            total += 1
+    return total
+
+
+class TokenUsage:
+    """Running totals of prompt/completion tokens across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    @property
+    def total(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
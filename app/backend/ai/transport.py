@@ -0,0 +1,152 @@
+"""
+HTTP transport for the AI client: one pooled keep-alive connection pool
+(optionally HTTP/2) shared by every request, explicit timeouts, and a retry
+policy with jittered exponential backoff that honours Retry-After.
+The OpenAI SDK's own retries are switched off so this is the only policy.
+"""
+import email.utils
+import logging
+import random
+import time
+
+from app.backend.tracing import tracer
+from app.config import (
+    AI_TIMEOUT_S, AI_CONNECT_TIMEOUT_S, AI_MAX_RETRIES, AI_RETRY_BASE_S, AI_RETRY_MAX_S,
+    AI_POOL_SIZE, AI_KEEPALIVE_S, AI_HTTP2,
+)
+
+log = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx needs it for http2=True)
+    except ImportError:
+        return False
+    return True
+
+
+def timeouts(total=AI_TIMEOUT_S, connect=AI_CONNECT_TIMEOUT_S):
+    """httpx timeouts: `total` bounds each read/write, `connect` the TCP/TLS setup."""
+    import httpx
+    return httpx.Timeout(total, connect=connect)
+
+
+def build_http_client(http2=AI_HTTP2, pool_size=AI_POOL_SIZE, keepalive_s=AI_KEEPALIVE_S):
+    """The shared httpx client the OpenAI client sends everything through."""
+    import httpx
+
+    if http2 and not http2_available():
+        log.warning("HTTP/2 requested but the 'h2' package is missing; using HTTP/1.1")
+        http2 = False
+    return httpx.Client(
+        http2=http2,
+        timeout=timeouts(),
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive_s,
+        ),
+    )
+
+
+def warm_up(http_client, base_url):
+    """
+    Opens (and keeps in the pool) a connection to the API host, so the first
+    question doesn't pay for DNS + TCP + TLS. Any HTTP response will do.
+    """
+    started = time.perf_counter()
+    try:
+        http_client.request("HEAD", str(base_url), timeout=timeouts(total=AI_CONNECT_TIMEOUT_S))
+    except Exception as e:
+        log.warning(f"AI connection warm-up failed: {e}")
+        return False
+    log.info(f"AI connection warmed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return True
+
+
+# --- Retries ---
+RETRY_STATUS = {408, 409, 429}
+
+
+def status_of(error):
+    return getattr(error, "status_code", None)
+
+
+def is_retryable(error) -> bool:
+    """Timeouts, dropped connections, 429s and 5xx are worth another try."""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    status = status_of(error)
+    return status is not None and (status in RETRY_STATUS or status >= 500)
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at max_s per wait."""
+
+    def __init__(self, retries=AI_MAX_RETRIES, base_s=AI_RETRY_BASE_S, max_s=AI_RETRY_MAX_S):
+        self.retries = retries
+        self.base_s = base_s
+        self.max_s = max_s
+
+    def delay(self, attempt: int, error=None):
+        """Seconds to wait before retry number `attempt` (0-based); None = give up."""
+        requested = retry_after(error) if error is not None else None
+        if requested is not None:
+            if requested > self.max_s:
+                return None  # the server wants us gone for longer than we'd wait
+            # Honour the server, plus a little jitter so parallel callers don't stampede
+            return requested + random.uniform(0, self.base_s / 2)
+        return random.uniform(0, min(self.max_s, self.base_s * 2 ** attempt))
+
+
+def with_retries(call, policy=None, on_retry=None):
+    """
+    Runs call() and retries retryable failures per `policy`.
+    on_retry(attempt, error, delay) is called before each wait.
+    """
+    policy = policy or RetryPolicy()
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            if attempt >= policy.retries or not is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(attempt, e, delay)
+            tracer.event("ai_retry", attempt=attempt + 1, retries=policy.retries,
+                         error=status_of(e) or type(e).__name__, delay_s=round(delay, 3))
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,265 @@
+"""
+Headless batch processing of screenshot folders / scanned pages:
+OCR in a process pool, AI answers with bounded concurrency, one JSONL
+record per page written as soon as it is done. The output file doubles as
+the checkpoint: pages already recorded as "ok" are skipped on the next run
+(and "ocr_only" pages too, unless the next run asks for answers).
+reocr_history() runs the same OCR over the captures history rows link to.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+
+
+def find_pages(root):
+    """Yields (page_id, path, frame) for every image (and every TIFF frame) under root."""
+    paths = [root] if os.path.isfile(root) else sorted(
+        os.path.join(d, f) for d, _, files in os.walk(root) for f in files
+    )
+    base = os.path.dirname(root) if os.path.isfile(root) else root
+    for path in paths:
+        if os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        try:
+            with Image.open(path) as img:
+                frames = getattr(img, "n_frames", 1)
+        except Exception as e:
+            log.warning(f"Skipping unreadable image {path}: {e}")
+            continue
+        rel = os.path.relpath(path, base)
+        for frame in range(frames):
+            yield (f"{rel}#{frame}" if frames > 1 else rel), path, frame
+
+
+def load_checkpoint(output_path, use_ai=True):
+    """
+    Page ids already recorded as ok (or as having no text) in an existing
+    output file. Pages OCR'd by a --no-ai run only count as done for
+    another run without AI.
+    """
+    finished = ("ok", "empty") if use_ai else ("ok", "empty", "ocr_only")
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if record.get("status") in finished:
+                done.add(record["id"])
+            else:
+                done.discard(record.get("id"))
+    return done
+
+
+def ocr_page(path, frame, use_cache=True):
+    """Process-pool worker: one page -> OCR text + segmented questions."""
+    from app.backend.pipeline import read_image
+
+    started = time.perf_counter()
+    with Image.open(path) as img:
+        img.seek(frame)
+        page = img.convert("RGB")
+    text, questions = read_image(page, use_cache=use_cache)
+    return {
+        "text": text,
+        "questions": [{"number": q.number, "text": q.text, "box": q.box} for q in questions],
+        "ocr_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+class BatchStats:
+    """Throughput counters for the report."""
+
+    def __init__(self, usage=None):
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.skipped = 0
+        self.questions = 0
+        self.failed = 0
+        self.ocr_ms = 0.0
+        self.usage = usage
+        self._tokens_at_start = usage.total if usage else 0
+
+    def report(self) -> dict:
+        elapsed = max(1e-9, time.perf_counter() - self.started)
+        tokens = (self.usage.total - self._tokens_at_start) if self.usage else 0
+        return {
+            "pages": self.pages,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "questions": self.questions,
+            "elapsed_s": round(elapsed, 2),
+            "pages_per_s": round(self.pages / elapsed, 3),
+            "questions_per_s": round(self.questions / elapsed, 3),
+            "tokens": tokens,
+            "tokens_per_s": round(tokens / elapsed, 1),
+            "avg_ocr_ms": round(self.ocr_ms / self.pages, 1) if self.pages else 0.0,
+        }
+
+
+def run_batch(source, output_path, mode="solve", ocr_workers=None, ai_workers=4,
+              use_ai=True, on_progress=None) -> dict:
+    """
+    Processes every page under `source` into `output_path` (JSONL, appended).
+    Each page's questions (or its whole text, if it wasn't segmented) are
+    answered with at most `ai_workers` requests in flight overall.
+    Returns the throughput report.
+    """
+    if use_ai:
+        from app.backend.ai.ai_client import usage
+        from app.backend.pipeline import answer_questions
+    else:
+        usage = None
+
+    done = load_checkpoint(output_path, use_ai)
+    stats = BatchStats(usage)
+    pages = []
+    for page_id, path, frame in find_pages(source):
+        if page_id in done:
+            stats.skipped += 1
+        else:
+            pages.append((page_id, path, frame))
+    log.info(f"{len(pages)} pages to process, {stats.skipped} already done")
+
+    ocr_workers = ocr_workers or os.cpu_count() or 2
+    # Keep a few pages queued per OCR process, but never the whole folder in memory
+    window = ocr_workers * 2
+    # OCR'd pages waiting for answers; OCR pauses past this when the AI is the bottleneck
+    ai_window = max(1, ai_workers) * 2
+
+    def answer_page(page_id, path, frame, ocr):
+        record = {"id": page_id, "source": path, "frame": frame, "mode": mode, **ocr}
+        items = ocr["questions"] or ([{"number": 1, "text": ocr["text"], "box": None}] if ocr["text"] else [])
+        record["questions"] = items
+        if use_ai and items:
+            started = time.perf_counter()
+            results = answer_questions([q["text"] for q in items], mode, max_workers=1)
+            record["ai_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            for item, (answer, error) in zip(items, results):
+                item["answer"] = answer
+                if error:
+                    item["error"] = str(error)
+        failed = any("error" in q for q in items)
+        if failed:
+            record["status"] = "error"
+        elif not ocr["text"]:
+            record["status"] = "empty"
+        else:
+            record["status"] = "ok" if use_ai else "ocr_only"
+        return record
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=ocr_workers) as ocr_pool, \
+            ThreadPoolExecutor(max_workers=max(1, ai_workers)) as ai_pool:
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            stats.pages += 1
+            stats.questions += len(record["questions"])
+            stats.ocr_ms += record.get("ocr_ms", 0.0)
+            if record["status"] == "error":
+                stats.failed += 1
+            if on_progress:
+                on_progress(stats)
+
+        def failed_record(page_id, path, frame, error):
+            return {"id": page_id, "source": path, "frame": frame, "mode": mode,
+                    "questions": [], "status": "error", "error": error}
+
+        queue = iter(pages)
+        ocr_futures, ai_futures = {}, {}
+
+        def fill():
+            while len(ocr_futures) < window and len(ai_futures) < ai_window:
+                page = next(queue, None)
+                if page is None:
+                    return
+                ocr_futures[ocr_pool.submit(ocr_page, page[1], page[2])] = page
+
+        fill()
+        while ocr_futures or ai_futures:
+            finished, _ = wait(set(ocr_futures) | set(ai_futures), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in ai_futures:
+                    page_id, path, frame = ai_futures.pop(future)
+                    try:
+                        write(future.result())
+                    except Exception as e:
+                        write(failed_record(page_id, path, frame, f"AI failed: {e}"))
+                    continue
+                page_id, path, frame = ocr_futures.pop(future)
+                try:
+                    ocr = future.result()
+                except Exception as e:
+                    write(failed_record(page_id, path, frame, f"OCR failed: {e}"))
+                    continue
+                ai_futures[ai_pool.submit(answer_page, page_id, path, frame, ocr)] = (page_id, path, frame)
+            fill()
+
+    return stats.report()
+
+
+def reocr_history(history, store, apply=False, ocr_workers=None, limit=None, on_change=None) -> dict:
+    """
+    Re-runs OCR on the stored captures behind history rows (see CaptureStore),
+    e.g. after an OCR engine upgrade. on_change(row, new_text) is called for
+    every row whose text would change; with apply=True the row is updated.
+    A capture whose rows no longer pair up with its re-segmented questions
+    is skipped rather than guessed at; that includes a single-question row
+    whose capture now segments into several questions ("split").
+    """
+    captures = {}
+    for row in history.get_captured(limit):
+        captures.setdefault(row["image_hash"], []).append(row)
+    report = {"captures": len(captures), "missing": 0, "failed": 0, "skipped": 0, "split": 0,
+              "unchanged": 0, "changed": 0, "updated": 0}
+    paths = {key: store.path(key) for key in captures if store.exists(key)}
+    report["missing"] = len(captures) - len(paths)
+
+    with ProcessPoolExecutor(max_workers=ocr_workers or os.cpu_count() or 2) as pool:
+        # Bypass the OCR cache: it would hand back the text the old engine produced
+        futures = {pool.submit(ocr_page, path, 0, False): key for key, path in paths.items()}
+        for future in as_completed(futures):
+            rows = captures[futures[future]]
+            try:
+                ocr = future.result()
+            except Exception as e:
+                log.warning(f"Re-OCR of {futures[future]} failed: {e}")
+                report["failed"] += 1
+                continue
+            if len(rows) == 1 and len(ocr["questions"]) > 1:
+                # Writing the whole text into one row would merge several questions
+                log.info(f"History row #{rows[0]['id']} now segments into "
+                         f"{len(ocr['questions'])} questions; left unchanged")
+                report["split"] += 1
+                continue
+            if len(rows) == 1:
+                # A single-question capture is saved with its whole text
+                texts = [ocr["text"]] if ocr["text"] else []
+            else:
+                texts = [q["text"] for q in ocr["questions"]]
+            if len(texts) != len(rows):
+                report["skipped"] += 1
+                continue
+            for row, text in zip(rows, texts):
+                if text == row["question"]:
+                    report["unchanged"] += 1
+                    continue
+                report["changed"] += 1
+                if on_change:
+                    on_change(row, text)
+                if apply and history.update_question(row["id"], text):
+                    report["updated"] += 1
+    return report
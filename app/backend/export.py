@@ -0,0 +1,244 @@
+"""
+Streaming export of the study history (questions, answers, practice sets)
+to Markdown, plain text or PDF. Records are read from HistoryManager a page
+at a time and written as they come, so memory stays flat however long the
+history is. Runs fine on a worker thread: no Qt, and progress / stop
+callbacks instead of UI calls. The file appears (atomically) only once the
+export has finished.
+"""
+import os
+import textwrap
+import time
+import zlib
+
+FORMATS = ("md", "txt", "pdf")
+MODE_TITLES = {"solve": "Solution", "hint": "Hint"}
+# Heading for a question whose OCR text came out empty
+UNTITLED = "(no text)"
+SECTIONS = {"question": "Questions", "practice": "Practice sets"}
+
+
+def _stamp(ts) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+# --- Writers: heading / paragraph / rule, written straight to the file ---
+class TextWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def heading(self, text, level=1):
+        underline = "=" if level == 1 else "-"
+        self.f.write(f"{text}\n{underline * min(len(text), 72)}\n\n" if level < 3 else f"{text.upper()}:\n")
+
+    def paragraph(self, text):
+        self.f.write(text.strip() + "\n\n")
+
+    def rule(self):
+        self.f.write("-" * 72 + "\n\n")
+
+    def close(self):
+        pass
+
+
+class MarkdownWriter(TextWriter):
+    def heading(self, text, level=1):
+        self.f.write(f"{'#' * level} {text}\n\n")
+
+    def rule(self):
+        self.f.write("---\n\n")
+
+
+# WinAnsi (cp1252) covers ², ³, °, ×, ÷, µ; spell out the rest of the usual math
+_PDF_FALLBACK = str.maketrans({
+    "√": "sqrt", "π": "pi", "≤": "<=", "≥": ">=", "≠": "!=", "≈": "~=", "∞": "inf",
+    "→": "->", "←": "<-", "⇒": "=>", "Δ": "Delta", "θ": "theta", "α": "alpha",
+    "β": "beta", "γ": "gamma", "λ": "lambda", "μ": "mu", "σ": "sigma", "ω": "omega",
+    "Ω": "Ohm", "∑": "sum", "∫": "integral", "−": "-", "∗": "*", "⋅": "·",
+})
+
+
+class PdfWriter:
+    """
+    Minimal text-only PDF (built-in Helvetica, WinAnsi encoding), written
+    page by page: each finished page goes straight to the file and only the
+    object offsets are kept for the xref table at the end.
+    """
+
+    PAGE_W, PAGE_H = 595, 842  # A4 in points
+    MARGIN = 56
+    SIZES = {1: 16, 2: 12.5, 3: 10.5, "body": 10}
+    # Average Helvetica glyph width as a fraction of the font size, for wrapping
+    CHAR_W = 0.5
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self.lines = []
+        self.y = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes):
+        self.f.write(data)
+
+    def _object(self, obj_id, body: bytes):
+        self.offsets[obj_id] = self.f.tell()
+        self._write(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    @staticmethod
+    def _encode(text: str) -> bytes:
+        if not text.isascii():
+            text = text.translate(_PDF_FALLBACK)
+        raw = text.encode("cp1252", errors="replace")
+        return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def _line(self, text, size, bold=False, gap=0.0):
+        leading = size * 1.35
+        if self.y is None or self.y - leading - gap < self.MARGIN:
+            self._flush_page()
+            self.y = self.PAGE_H - self.MARGIN
+        self.y -= leading + gap
+        font = b"/F2" if bold else b"/F1"
+        self.lines.append(
+            b"BT " + font + f" {size} Tf {self.MARGIN} {self.y:.1f} Td (".encode()
+            + self._encode(text) + b") Tj ET"
+        )
+
+    def _wrapped(self, text, size, bold=False, gap=0.0):
+        width = int((self.PAGE_W - 2 * self.MARGIN) / (size * self.CHAR_W))
+        first = True
+        for raw_line in text.splitlines() or [""]:
+            for line in ([raw_line] if len(raw_line) <= width else textwrap.wrap(raw_line, width)):
+                self._line(line, size, bold, gap if first else 0.0)
+                first = False
+
+    def _flush_page(self):
+        if not self.lines:
+            return
+        stream = zlib.compress(b"\n".join(self.lines))
+        content_id, page_id = self._new_id(), self._new_id()
+        self._object(content_id, f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode()
+                     + stream + b"\nendstream")
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_W} {self.PAGE_H}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def heading(self, text, level=1):
+        size = self.SIZES[level]
+        self._wrapped(text, size, bold=True, gap=size * 0.6)
+
+    def paragraph(self, text):
+        self._wrapped(text.strip(), self.SIZES["body"])
+        self.y -= self.SIZES["body"] * 0.6
+
+    def rule(self):
+        self._line("_" * 60, self.SIZES["body"])
+
+    def close(self):
+        if self.y is None:
+            self._line("", self.SIZES["body"])  # a PDF needs at least one page
+        self._flush_page()
+        kids = " ".join(f"{i} 0 R" for i in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.f.tell()
+        ids = sorted(self.offsets)
+        self._write(f"xref\n0 {ids[-1] + 1}\n0000000000 65535 f \n".encode())
+        for i in range(1, ids[-1] + 1):
+            self._write(f"{self.offsets.get(i, 0):010d} 00000 n \n".encode())
+        self._write(f"trailer\n<< /Size {ids[-1] + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+WRITERS = {"md": MarkdownWriter, "txt": TextWriter, "pdf": PdfWriter}
+
+
+def _write_record(writer, record):
+    if record["kind"] == "practice":
+        writer.heading(f"Practice set · {_stamp(record['timestamp'])}", 2)
+        writer.paragraph(record["content"])
+    else:
+        lines = record["question"].strip().splitlines()
+        title = lines[0].strip() if lines else UNTITLED
+        title = title if len(title) <= 70 else title[:67] + "..."
+        writer.heading(f"{title} · {_stamp(record['timestamp'])}", 2)
+        if lines:
+            writer.paragraph(record["question"])
+        for answer in record["answers"]:
+            writer.heading(MODE_TITLES.get(answer["mode"], answer["mode"].title()), 3)
+            writer.paragraph(answer["answer"])
+    writer.rule()
+
+
+def export_history(history, path, fmt=None, since=0.0, progress=None, should_stop=None) -> dict:
+    """
+    Writes every history record newer than `since` to `path`.
+    fmt defaults to the file extension. progress(done, total) is called
+    every few records; should_stop() aborts (no file is left behind).
+    Returns {"path", "format", "entries", "bytes", "until", "elapsed_s"};
+    pass "until" as `since` next time to export only what is new. With
+    nothing to export no file is written and "path" is None.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in WRITERS:
+        raise Exception(f"Unknown export format '{fmt}' (use one of: {', '.join(FORMATS)})")
+
+    started = time.perf_counter()
+    # Captures saved while the export runs wait for the next one, so total stays right
+    snapshot = history.export_snapshot()
+    until = snapshot["until"]
+    counts = history.count_export(since, snapshot)
+    total = counts["questions"] + counts["practice_sets"]
+    if not total:
+        return {"path": None, "format": fmt, "entries": 0, "bytes": 0, "until": since, "elapsed_s": 0.0}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".part"
+    done = 0
+    last_report = 0.0
+    try:
+        binary = fmt == "pdf"
+        with open(tmp_path, "wb" if binary else "w", **({} if binary else {"encoding": "utf-8"})) as f:
+            writer = WRITERS[fmt](f)
+            title = "ScreenTutor export" + (f" (since {_stamp(since)})" if since else "")
+            writer.heading(title, 1)
+            writer.paragraph(f"{counts['questions']} questions, {counts['practice_sets']} practice sets · "
+                             f"exported {_stamp(time.time())}")
+            kind = None
+            for record in history.iter_export(since, snapshot=snapshot):
+                if should_stop and should_stop():
+                    raise Exception("Export cancelled")
+                if record["kind"] != kind:
+                    kind = record["kind"]
+                    writer.heading(SECTIONS[kind], 1)
+                _write_record(writer, record)
+                done += 1
+                now = time.perf_counter()
+                if progress and now - last_report > 0.1:
+                    last_report = now
+                    progress(done, total)
+            writer.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress:
+        progress(done, total)
+    return {
+        "path": path,
+        "format": fmt,
+        "entries": done,
+        "bytes": os.path.getsize(path),
+        "until": until,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
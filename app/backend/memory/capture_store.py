@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.backend.paths import get_data_dir
+from app.config import CAPTURE_STORE_MB, CAPTURE_STORE_DAYS, CAPTURE_PNG_LEVEL
+
+log = logging.getLogger(__name__)
+
+# Fraction of max_bytes kept after a size-triggered prune
+PRUNE_TO = 0.8
+
+
+def image_hash(image) -> str:
+    """Content address of a crop: identical pixels always give the same key."""
+    digest = hashlib.sha256(f"{image.mode}{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class CaptureStore:
+    """
+    Captured crops under Data/captures, one PNG per content hash, so a
+    re-snip of the same question is stored once. put() only hashes; PNG
+    encoding and the write happen on a background writer thread with a fast
+    compression level. Oldest files go first once the store is over
+    max_bytes, and anything older than max_age_s is removed.
+    History rows keep the hash, so old captures can be re-OCR'd later.
+    """
+
+    def __init__(self, directory=None, max_bytes=CAPTURE_STORE_MB * 1024 * 1024,
+                 max_age_s=CAPTURE_STORE_DAYS * 86400, compress_level=CAPTURE_PNG_LEVEL):
+        self.directory = directory or get_data_dir("captures")
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.compress_level = compress_level
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._bytes = None  # computed by the first prune
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.duplicates = 0
+
+    def path(self, key: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put(self, image) -> str:
+        """
+        Queues a crop for writing and returns its hash right away.
+        The image is written as-is later, so callers must not modify it.
+        """
+        key = image_hash(image)
+        with self._lock:
+            if key in self._pending:
+                self.duplicates += 1
+                return key
+            self._pending.add(key)
+            self._start()
+        self._queue.put((key, image))
+        return key
+
+    def open(self, key: str):
+        """The stored crop as a PIL image, or None if it was never written or has expired."""
+        from PIL import Image
+
+        try:
+            with Image.open(self.path(key)) as img:
+                return img.convert("RGB")
+        except OSError:
+            return None
+
+    def flush(self):
+        """Blocks until every queued crop is on disk."""
+        if self._thread:
+            self._queue.join()
+
+    def stop(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "written": self.written,
+                "duplicates": self.duplicates,
+                "pending": len(self._pending),
+                "bytes": self._bytes,
+            }
+
+    # --- writer thread ---
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.prune()
+        except OSError as e:
+            log.warning(f"Capture store prune failed: {e}")
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except Exception as e:
+                log.warning(f"Capture store write failed: {e}")
+            finally:
+                if job is not None:
+                    with self._lock:
+                        self._pending.discard(job[0])
+                self._queue.task_done()
+
+    def _write(self, key, image):
+        path = self.path(key)
+        if os.path.exists(path):
+            os.utime(path)  # seen again: keep it around longer
+            with self._lock:
+                self.duplicates += 1
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        image.save(tmp_path, format="PNG", compress_level=self.compress_level)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.written += 1
+            if self._bytes is not None:
+                self._bytes += os.path.getsize(path)
+            over_budget = self._bytes is not None and self._bytes > self.max_bytes
+        if over_budget:
+            # Trim below the limit so the next few writes don't each trigger a scan
+            self.prune(target_bytes=int(self.max_bytes * PRUNE_TO))
+
+    # --- retention ---
+    def _entries(self):
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def prune(self, target_bytes=None) -> int:
+        """Applies the age and size limits. Returns the number of files removed."""
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+        entries = sorted(self._entries())
+        cutoff = time.time() - self.max_age_s if self.max_age_s > 0 else None
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+        if removed:
+            log.info(f"Capture store pruned {removed} files, {total / 1024 / 1024:.1f} MB kept")
+        return removed
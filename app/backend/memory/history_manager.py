@@ -1,49 +1,354 @@
+import hashlib
 import json
+import logging
 import os
-import sys
+import re
+import sqlite3
+import threading
+import time
+
+from app.backend.paths import get_app_root
+
+log = logging.getLogger(__name__)
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
 
 class HistoryManager:
-    def __init__(self, filename="history.json"):
-        # Get project root (where run.py/Data/ are)
-        if getattr(sys, 'frozen', False):
-            # When bundled, use Application Support to avoid read-only errors
-            app_root = os.path.expanduser("~/Library/Application Support/ScreenTutor")
-        else:
-            # During development, use the project root
-            # Assuming HistoryManager is in app/backend/memory/
-            app_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        
-        self.filepath = os.path.join(app_root, "Data", filename)
+    """
+    Question history stored in SQLite (Data/history.db).
+    Duplicates are rejected by a unique index on the question hash, each
+    save is a single-row insert, and the sidebar reads pages instead of
+    loading everything. An old history.json is migrated on first start.
+    """
+
+    def __init__(self, filename="history.db", filepath=None):
+        self.filepath = filepath or os.path.join(get_app_root(), "Data", filename)
         self._ensure_data_dir()
-        self.history = self._load()
+        self._lock = threading.RLock()
+        # Saves happen on worker threads too; access is serialized by the lock
+        self.conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._init_schema()
+        self._migrate_json(os.path.join(os.path.dirname(self.filepath), "history.json"))
 
     def _ensure_data_dir(self):
         os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
 
-    def _load(self):
-        if os.path.exists(self.filepath):
+    def _init_schema(self):
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    question TEXT NOT NULL,
+                    question_hash TEXT NOT NULL,
+                    mode TEXT,
+                    timestamp REAL NOT NULL,
+                    image_hash TEXT
+                )
+            """)
+            columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(history)")}
+            if "image_hash" not in columns:
+                # Databases from before the capture store
+                self.conn.execute("ALTER TABLE history ADD COLUMN image_hash TEXT")
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_history_hash ON history(question_hash)"
+            )
+            # Latest answer per question and mode, joined to history by question_hash
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS answers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    question_hash TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    UNIQUE(question_hash, mode)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS practice_sets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content TEXT NOT NULL,
+                    timestamp REAL NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS exports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    entries INTEGER NOT NULL,
+                    until REAL NOT NULL
+                )
+            """)
+        self.has_fts = self._init_fts()
+
+    def _init_fts(self) -> bool:
+        """
+        External-content FTS5 index over history.question, kept in sync by
+        triggers. Returns False (search falls back to LIKE) when this SQLite
+        build has no FTS5.
+        """
+        with self._lock:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='history_fts'"
+            ).fetchone()
             try:
-                with open(self.filepath, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
-
-    def save_question(self, question, mode):
-        # Avoid duplicates
-        if any(h['question'] == question for h in self.history):
+                with self.conn:
+                    self.conn.execute("""
+                        CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+                            question, content='history', content_rowid='id',
+                            tokenize='unicode61', prefix='2 3'
+                        )
+                    """)
+                    self.conn.executescript("""
+                        CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+                            INSERT INTO history_fts(rowid, question) VALUES (new.id, new.question);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+                            INSERT INTO history_fts(history_fts, rowid, question) VALUES ('delete', old.id, old.question);
+                        END;
+                        CREATE TRIGGER IF NOT EXISTS history_au AFTER UPDATE OF question ON history BEGIN
+                            INSERT INTO history_fts(history_fts, rowid, question) VALUES ('delete', old.id, old.question);
+                            INSERT INTO history_fts(rowid, question) VALUES (new.id, new.question);
+                        END;
+                    """)
+                    if not exists:
+                        # Index rows that predate the FTS table
+                        self.conn.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError as e:
+                log.info(f"FTS5 unavailable ({e}), history search falls back to LIKE")
+                return False
+        return True
+
+    def _migrate_json(self, json_path):
+        if not os.path.exists(json_path):
             return
-            
-        self.history.append({
-            "question": question,
-            "mode": mode,
-            "timestamp": os.path.getmtime(self.filepath) if os.path.exists(self.filepath) else 0 
-        })
-        self._persist()
-
-    def _persist(self):
-        with open(self.filepath, 'w') as f:
-            json.dump(self.history, f, indent=4)
+        try:
+            with open(json_path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+
+        rows = [
+            (h['question'], question_hash(h['question']), h.get('mode'), h.get('timestamp') or 0)
+            for h in entries if h.get('question')
+        ]
+        with self._lock, self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO history (question, question_hash, mode, timestamp) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        # Keep the old file around, but never import it twice
+        os.replace(json_path, json_path + ".migrated")
+        log.info(f"Migrated {cur.rowcount} history entries from {json_path}")
+
+    def save_question(self, question, mode, image_hash=None) -> bool:
+        """
+        Returns False if the question was already in the history.
+        image_hash links the row to its crop in the CaptureStore.
+        """
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO history (question, question_hash, mode, timestamp, image_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (question, question_hash(question), mode, time.time(), image_hash)
+            )
+            return cur.rowcount > 0
+
+    def save_answer(self, question, mode, answer):
+        """Keeps the latest answer for (question, mode); an older one is replaced."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers (question_hash, mode, answer, timestamp) VALUES (?, ?, ?, ?)",
+                (question_hash(question), mode, answer, time.time())
+            )
+
+    def save_practice_set(self, content):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO practice_sets (content, timestamp) VALUES (?, ?)", (content, time.time())
+            )
+
+    def get_captured(self, limit=None):
+        """Rows linked to a stored capture (id, question, mode, image_hash), oldest first."""
+        with self._lock:
+            return [dict(r) for r in self.conn.execute(
+                "SELECT id, question, mode, image_hash FROM history "
+                "WHERE image_hash IS NOT NULL ORDER BY id LIMIT ?",
+                (-1 if limit is None else limit,)
+            )]
+
+    def update_question(self, row_id, question) -> bool:
+        """Replaces a row's text (e.g. after re-OCR). False if that text is already another row."""
+        try:
+            with self._lock, self.conn:
+                cur = self.conn.execute(
+                    "UPDATE history SET question = ?, question_hash = ? WHERE id = ?",
+                    (question, question_hash(question), row_id)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return cur.rowcount > 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def get_page(self, offset=0, limit=50):
+        """Newest-first page of history rows (id, question, mode, timestamp)."""
+        with self._lock:
+            return [dict(r) for r in self.conn.execute(
+                "SELECT id, question, mode, timestamp FROM history ORDER BY id DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            )]
+
+    def search(self, query, offset=0, limit=50):
+        """
+        Newest-first page of rows whose question matches every word of
+        `query` (prefix match, so results update as the user types).
+        An empty query is the same as get_page().
+        """
+        words = re.findall(r"\w+", query or "")
+        if not words:
+            return self.get_page(offset, limit)
+
+        with self._lock:
+            if self.has_fts:
+                match = " ".join('"' + w.replace('"', '') + '"*' for w in words)
+                # FTS5 walks its rowids in descending order natively, so the
+                # LIMIT is applied before touching the content table
+                cursor = self.conn.execute("""
+                    SELECT h.id, h.question, h.mode, h.timestamp FROM history h
+                    WHERE h.id IN (
+                        SELECT rowid FROM history_fts WHERE history_fts MATCH ?
+                        ORDER BY rowid DESC LIMIT ? OFFSET ?
+                    )
+                    ORDER BY h.id DESC
+                """, (match, limit, offset))
+            else:
+                clauses = " AND ".join("question LIKE ?" for _ in words)
+                cursor = self.conn.execute(
+                    f"SELECT id, question, mode, timestamp FROM history WHERE {clauses} "
+                    "ORDER BY id DESC LIMIT ? OFFSET ?",
+                    [f"%{w}%" for w in words] + [limit, offset]
+                )
+            return [dict(r) for r in cursor]
+
+    # --- Export (see backend/export.py) ---
+    # Questions count as new if they, or one of their answers, changed after `since`.
+    # Rows past the export_snapshot() taken at the start are left for the next export
+    _EXPORT_WHERE = (
+        "h.id > ? AND h.id <= ? AND (h.timestamp > ? OR EXISTS ("
+        "SELECT 1 FROM answers a WHERE a.question_hash = h.question_hash AND a.id <= ? AND a.timestamp > ?))"
+    )
+
+    def export_snapshot(self) -> dict:
+        """
+        The newest row id per table right now, plus "until": the newest
+        timestamp among those rows. Passing it to count_export() and
+        iter_export() pins both to the same rows, even if captures are saved
+        while the export runs; "until" is where the next incremental export
+        picks up, so a row is never in both or in neither.
+        """
+        snapshot = {}
+        until = 0.0
+        with self._lock:
+            for table in ("history", "answers", "practice_sets"):
+                max_id, newest = self.conn.execute(
+                    f"SELECT COALESCE(MAX(id), 0), COALESCE(MAX(timestamp), 0) FROM {table}"
+                ).fetchone()
+                snapshot[table] = max_id
+                until = max(until, newest)
+        snapshot["until"] = until
+        return snapshot
+
+    def count_export(self, since=0.0, snapshot=None) -> dict:
+        snapshot = snapshot or self.export_snapshot()
+        with self._lock:
+            questions = self.conn.execute(
+                f"SELECT COUNT(*) FROM history h WHERE {self._EXPORT_WHERE}",
+                (0, snapshot["history"], since, snapshot["answers"], since)
+            ).fetchone()[0]
+            practice = self.conn.execute(
+                "SELECT COUNT(*) FROM practice_sets WHERE id <= ? AND timestamp > ?",
+                (snapshot["practice_sets"], since)
+            ).fetchone()[0]
+        return {"questions": questions, "practice_sets": practice}
+
+    def iter_export(self, since=0.0, page_size=200, snapshot=None):
+        """
+        Yields export records oldest first, one page of rows at a time so a
+        large history is never loaded whole (and the lock is not held while
+        the caller writes):
+        {"kind": "question", id, question, mode, timestamp, answers: [{mode, answer, timestamp}]}
+        {"kind": "practice", id, content, timestamp}
+        """
+        snapshot = snapshot or self.export_snapshot()
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = [dict(r) for r in self.conn.execute(
+                    f"SELECT h.id, h.question, h.question_hash, h.mode, h.timestamp FROM history h "
+                    f"WHERE {self._EXPORT_WHERE} ORDER BY h.id LIMIT ?",
+                    (last_id, snapshot["history"], since, snapshot["answers"], since, page_size)
+                )]
+                if not rows:
+                    break
+                marks = ",".join("?" for _ in rows)
+                answers = {}
+                for a in self.conn.execute(
+                    f"SELECT question_hash, mode, answer, timestamp FROM answers "
+                    f"WHERE question_hash IN ({marks}) AND id <= ? AND timestamp > ? ORDER BY id",
+                    [r["question_hash"] for r in rows] + [snapshot["answers"], since]
+                ):
+                    answers.setdefault(a["question_hash"], []).append(
+                        {"mode": a["mode"], "answer": a["answer"], "timestamp": a["timestamp"]}
+                    )
+            for r in rows:
+                yield {"kind": "question", "id": r["id"], "question": r["question"], "mode": r["mode"],
+                       "timestamp": r["timestamp"], "answers": answers.get(r.pop("question_hash"), [])}
+            last_id = rows[-1]["id"]
+
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = [dict(r) for r in self.conn.execute(
+                    "SELECT id, content, timestamp FROM practice_sets WHERE id > ? AND id <= ? "
+                    "AND timestamp > ? ORDER BY id LIMIT ?",
+                    (last_id, snapshot["practice_sets"], since, page_size)
+                )]
+            if not rows:
+                break
+            for r in rows:
+                yield {"kind": "practice", **r}
+            last_id = rows[-1]["id"]
+
+    def last_export(self) -> float:
+        """Time up to which everything has been exported (0 = never)."""
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(until) FROM exports").fetchone()
+        return row[0] or 0.0
+
+    def record_export(self, path, fmt, entries, until):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO exports (path, format, entries, until) VALUES (?, ?, ?, ?)",
+                (path, fmt, entries, until)
+            )
+
+    def get_recent_questions(self, limit=15):
+        """The last `limit` questions, oldest first (sidebar order)."""
+        return [r['question'] for r in reversed(self.get_page(0, limit))]
 
     def get_all_questions(self):
-        return [h['question'] for h in self.history]
+        with self._lock:
+            return [r[0] for r in self.conn.execute("SELECT question FROM history ORDER BY id")]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
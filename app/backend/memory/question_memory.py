@@ -1,13 +1,125 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.backend.paths import get_data_dir
+from app.config import ANSWER_CACHE_ENTRIES, ANSWER_CACHE_TTL_HOURS, ANSWER_CACHE_FLUSH_MS
+
+log = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    # OCR of the same question differs mostly in whitespace and unicode forms
+    text = unicodedata.normalize("NFKC", question)
+    return " ".join(text.split())
+
+
+def make_key(question: str, mode: str, model: str, prompt_version: str) -> str:
+    raw = "\x1f".join([normalize_question(question), mode, model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 class QuestionMemory:
     """
-    Simple in-memory cache for questions and answers
+    Persistent cache of AI answers.
+    Bounded LRU with a TTL, saved to Data/answer_cache.json so repeated
+    questions survive restarts. Keys come from make_key().
+    Stores only mark the cache dirty; the file is rewritten once,
+    flush_delay_s after the first unsaved change (a whole batch of answers
+    is one write), and at exit.
     """
 
-    def __init__(self):
-        self._memory = {}
+    def __init__(self, filename="answer_cache.json", max_entries=ANSWER_CACHE_ENTRIES,
+                 ttl_seconds=ANSWER_CACHE_TTL_HOURS * 3600, filepath=None,
+                 flush_delay_s=ANSWER_CACHE_FLUSH_MS / 1000):
+        self.filepath = filepath or os.path.join(get_data_dir(), filename)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_delay_s = flush_delay_s
+        self._lock = threading.Lock()
+        self._memory = self._load()  # key -> {"answer": str, "created": float}
+        self._dirty = False
+        self._timer = None
+        atexit.register(self.flush)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry):
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry["answer"]
+
+    def store(self, key: str, answer: str):
+        with self._lock:
+            self._memory[key] = {"answer": answer, "created": time.time()}
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            self._changed()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._changed()
+
+    def flush(self):
+        """Writes unsaved changes now."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._dirty = False
+                self._persist()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _expired(self, entry) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry["created"] > self.ttl_seconds
+
+    def _load(self):
+        memory = OrderedDict()
+        if not os.path.exists(self.filepath):
+            return memory
+        try:
+            with open(self.filepath, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return memory
+        # Saved oldest-first, so insertion order restores the LRU order
+        for key, entry in entries:
+            if not self._expired(entry):
+                memory[key] = entry
+        return memory
 
-    def get(self, question: str):
-        return self._memory.get(question)
+    def _changed(self):
+        # Called with the lock held
+        if self.flush_delay_s <= 0:
+            self._persist()
+            return
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay_s, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
 
-    def store(self, question: str, answer: str):
-        self._memory[question] = answer
+    def _persist(self):
+        # Write to a temp file and swap it in so a crash never leaves half a file
+        tmp_path = self.filepath + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(list(self._memory.items()), f)
+            os.replace(tmp_path, self.filepath)
+        except OSError as e:
+            log.warning(f"Answer cache write failed: {e}")
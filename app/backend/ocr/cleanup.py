@@ -0,0 +1,232 @@
+"""
+Deterministic post-OCR cleanup, run before the text reaches a prompt:
+1. words tesseract itself isn't sure about (image_to_data confidence) are
+   dropped, unless they look like numbers or math
+2. lines that are screen furniture rather than question text (URLs, menu
+   bars, clocks, page numbers, browser titles, icon glyphs) are removed
+3. math symbols, quotes, ligatures and whitespace are normalized
+Same input, same output, so the cleaned text is also a stable cache key.
+"""
+import re
+import threading
+
+from app.backend.ai.tokens import estimate_tokens
+from app.config import OCR_MIN_CONF
+
+# --- Low-confidence words ---
+# Digits, variables and operators are rarely junk even when tesseract is unsure
+_MATHY = re.compile(r"^[\d.,()\[\]+\-−=×÷*/^√π%°<>≤≥]+$|^[A-Za-z]$|\d")
+# A line whose words average below this is dropped whole (icons, dotted leaders)
+LINE_MIN_CONF = 20
+
+
+def _keep_word(word, min_conf) -> bool:
+    # conf is -1 for rows tesseract didn't score
+    return word.conf < 0 or word.conf >= min_conf or bool(_MATHY.search(word.text))
+
+
+def confident(words, min_conf=OCR_MIN_CONF):
+    """Words worth keeping, e.g. before layout analysis."""
+    return [w for w in words if _keep_word(w, min_conf)]
+
+
+def lines_from_words(words, min_conf=OCR_MIN_CONF):
+    """
+    OCRWords -> (raw lines, kept lines, dropped word count), grouped by
+    tesseract's (block, paragraph, line) in reading order.
+    """
+    grouped = {}
+    for w in words:
+        grouped.setdefault((w.block, w.par, w.line), []).append(w)
+
+    raw, kept, dropped = [], [], 0
+    for _, ws in sorted(grouped.items()):
+        raw.append(" ".join(w.text for w in ws))
+        scored = [w.conf for w in ws if w.conf >= 0]
+        if scored and sum(scored) / len(scored) < LINE_MIN_CONF:
+            dropped += len(ws)
+            continue
+        good = [w for w in ws if _keep_word(w, min_conf)]
+        dropped += len(ws) - len(good)
+        if good:
+            kept.append(" ".join(w.text for w in good))
+    return raw, kept, dropped
+
+
+# --- Boilerplate lines ---
+_UI_LABELS = {
+    "home", "search", "menu", "settings", "share", "sign in", "sign up", "log in", "log out",
+    "login", "logout", "back", "next", "previous", "prev", "submit", "cancel", "ok", "close",
+    "help", "file", "edit", "view", "history", "bookmarks", "tools", "window", "profile",
+    "notifications", "download", "print", "more", "reply", "like", "subscribe", "follow",
+    "skip", "loading", "copy", "paste", "save", "new tab", "check answer", "show answer",
+}
+_URL = re.compile(r"^(?:https?://|www\.)\S+$|^\S+\.(?:com|org|net|edu|io|gov)(?:/\S*)?$", re.I)
+# "Page 3", "Page 3 of 12", "3 of 12" ("3/4" could be a fraction answer)
+_PAGE_NUMBER = re.compile(r"^page\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$|^\d{1,4}\s+of\s+\d{1,4}$", re.I)
+_BARE_NUMBER = re.compile(r"^\d{1,4}$")
+_DASHED_NUMBER = re.compile(r"^[-–—]\s*\d{1,4}\s*[-–—]$")
+_CLOCK = re.compile(r"^\d{1,2}:\d{2}(?::\d{2})?\s*(?:[AP]M)?$", re.I)
+_BATTERY = re.compile(r"^\d{1,3}\s*%$")
+_BROWSER_TITLE = re.compile(r"\s[-–—]\s(?:Google Chrome|Mozilla Firefox|Safari|Microsoft Edge|Brave)$")
+# Characters that carry meaning in a question; anything else is glyph noise
+_MEANINGFUL = re.compile(r"[\w+\-=×÷*/^√∫∑π<>≤≥()\[\]{}.,:;?!'\"%°$]")
+
+
+def _label(line: str) -> str:
+    return re.sub(r"[^\w ]", "", line).strip().lower()
+
+
+def is_boilerplate(line: str, first=False, last=False, leading=False) -> bool:
+    """
+    Screen furniture test for one line at the edge of a capture.
+    first/last: the very first/last line (page numbers); leading: part of
+    the run of lines above the question (status bars: clocks, battery).
+    """
+    if _URL.match(line) or _DASHED_NUMBER.match(line):
+        return True
+    if leading and (_CLOCK.match(line) or _BATTERY.match(line)):
+        return True
+    if (first or last) and _PAGE_NUMBER.match(line):
+        return True
+    if first and _BARE_NUMBER.match(line):
+        return True  # a header page number; a last-line number may be an answer option
+    if _BROWSER_TITLE.search(line):
+        return True
+    label = _label(line)
+    if label in _UI_LABELS:
+        return True
+    # A menu bar: "File Edit View History Bookmarks Tools Help"
+    tokens = label.split()
+    if len(tokens) >= 3 and all(t in _UI_LABELS for t in tokens):
+        return True
+    visible = re.sub(r"\s", "", line)
+    if not visible:
+        return True
+    meaningful = len(_MEANINGFUL.findall(visible))
+    return meaningful / len(visible) < 0.5
+
+
+def strip_boilerplate(lines):
+    """
+    Drops the runs of boilerplate lines above and below the question.
+    Lines between question lines are always kept: "25%", "3:45" or "Print"
+    there are far more likely answer options than screen furniture.
+    Returns (kept lines, dropped line count).
+    """
+    start, end = 0, len(lines)
+    while start < end and is_boilerplate(lines[start], first=start == 0, leading=True):
+        start += 1
+    while end > start and is_boilerplate(lines[end - 1], last=end == len(lines)):
+        end -= 1
+    return lines[start:end], len(lines) - (end - start)
+
+
+# --- Normalization ---
+_SYMBOLS = str.maketrans({
+    "−": "-", "–": "-", "—": "-", "‐": "-", "‑": "-", "∗": "*", "⁄": "/",
+    "‘": "'", "’": "'", "‚": "'", "“": '"', "”": '"', "„": '"',
+    "\u00a0": " ", "\u2009": " ", "\u202f": " ", "\u2002": " ", "\u2003": " ",
+    "\u200b": "", "\ufeff": "",
+    "ﬁ": "fi", "ﬂ": "fl", "ﬀ": "ff", "ﬃ": "ffi", "ﬄ": "ffl",
+    "…": "...",
+    "⁰": "^0", "¹": "^1", "²": "^2", "³": "^3", "⁴": "^4",
+    "⁵": "^5", "⁶": "^6", "⁷": "^7", "⁸": "^8", "⁹": "^9",
+})
+# Table borders and list bullets that tesseract reads as text
+_EDGE_NOISE = re.compile(r"^[|•●▪■□»«~_]+\s*|\s*[|•●▪■□«»~_]+$")
+
+
+def normalize_line(line: str) -> str:
+    line = line.translate(_SYMBOLS)
+    line = _EDGE_NOISE.sub("", line)
+    return re.sub(r"\s+", " ", line).strip()
+
+
+def normalize(text: str) -> str:
+    lines = (normalize_line(line) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# --- Stats ---
+class CleanupStats:
+    """What cleanup removed from one capture."""
+
+    def __init__(self, raw_text, text, dropped_words=0, dropped_lines=0):
+        self.raw_tokens = estimate_tokens(raw_text)
+        self.tokens = estimate_tokens(text)
+        self.dropped_words = dropped_words
+        self.dropped_lines = dropped_lines
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+    def as_dict(self) -> dict:
+        return {
+            "raw_tokens": self.raw_tokens,
+            "tokens": self.tokens,
+            "tokens_saved": self.saved,
+            "dropped_words": self.dropped_words,
+            "dropped_lines": self.dropped_lines,
+        }
+
+    def __str__(self):
+        pct = 100 * self.saved / self.raw_tokens if self.raw_tokens else 0
+        return (f"{self.raw_tokens} -> {self.tokens} tokens ({self.saved} saved, {pct:.0f}%), "
+                f"dropped {self.dropped_words} words / {self.dropped_lines} lines")
+
+
+class CleanupTotals:
+    """Session-wide sums of CleanupStats. Thread-safe."""
+
+    def __init__(self):
+        self.captures = 0
+        self.raw_tokens = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, stats: CleanupStats):
+        with self._lock:
+            self.captures += 1
+            self.raw_tokens += stats.raw_tokens
+            self.tokens += stats.tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "captures": self.captures,
+                "raw_tokens": self.raw_tokens,
+                "tokens": self.tokens,
+                "tokens_saved": max(0, self.raw_tokens - self.tokens),
+            }
+
+
+totals = CleanupTotals()
+
+
+# --- Entry points ---
+def tidy(lines):
+    """Normalized lines minus boilerplate -> (lines, dropped line count). No stats."""
+    cleaned = (normalize_line(line) for line in lines)
+    return strip_boilerplate([line for line in cleaned if line])
+
+
+def _finish(raw_lines, lines, dropped_words):
+    cleaned, dropped_lines = tidy(lines)
+    text = "\n".join(cleaned)
+    stats = CleanupStats("\n".join(raw_lines), text, dropped_words, dropped_lines)
+    totals.add(stats)
+    return text, stats
+
+
+def clean_words(words, min_conf=OCR_MIN_CONF):
+    """image_to_data words -> (clean text, CleanupStats)."""
+    raw, lines, dropped = lines_from_words(words, min_conf)
+    return _finish(raw, lines, dropped)
+
+
+def clean_text(text: str):
+    """Plain OCR text (no confidences) -> (clean text, CleanupStats)."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    return _finish(lines, lines, 0)
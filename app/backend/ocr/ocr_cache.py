@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageChops
+
+from app.backend.paths import get_data_dir
+from app.config import OCR_CACHE_MEMORY_ENTRIES, OCR_CACHE_DISK_MB
+
+log = logging.getLogger(__name__)
+
+# dHash grid: fixed width, height follows the content's aspect ratio so a wide
+# one-line question and a tall worksheet block never share a bucket
+HASH_COLS = 64
+MIN_ROWS = 4
+MAX_ROWS = 64
+MAX_DISTANCE_RATIO = 0.04
+
+# A dHash this coarse cannot tell "2+2" from "2+3", so candidates are
+# confirmed against a normalized thumbnail before a hit is returned
+THUMB_WIDTH = 256
+THUMB_MAX_HEIGHT = 1024
+THUMB_LEVELS_SHIFT = 4     # quantize to 16 gray levels to absorb antialiasing jitter
+THUMB_MAX_DIFF = 2         # in quantized levels
+
+
+class Fingerprint:
+    """Perceptual hash + verification thumbnail of a crop's trimmed content."""
+
+    def __init__(self, rows, bits, thumb):
+        self.rows = rows
+        self.bits = bits
+        self.thumb = thumb
+        # Content address: identical trimmed content always maps to the same key
+        self.key = hashlib.sha1(
+            f"{thumb.size}".encode() + thumb.tobytes()
+        ).hexdigest()
+
+    def matches(self, other) -> bool:
+        if self.rows != other.rows or self.thumb.size != other.thumb.size:
+            return False
+        if hamming(self.bits, other.bits) > int(self.rows * HASH_COLS * MAX_DISTANCE_RATIO):
+            return False
+        return ImageChops.difference(self.thumb, other.thumb).getextrema()[1] <= THUMB_MAX_DIFF
+
+
+def trim_to_content(gray):
+    """
+    Crops a grayscale image to the bounding box of its ink, so margins
+    around the question don't change the fingerprint between re-snips.
+    """
+    background = gray.getpixel((0, 0))
+    mask = gray.point(lambda p: 255 if abs(p - background) > 40 else 0)
+    bbox = mask.getbbox()
+    return gray.crop(bbox) if bbox else gray
+
+
+def dhash(gray, rows):
+    thumb = gray.resize((HASH_COLS + 1, rows), Image.BOX)
+    pixels = thumb.tobytes()  # mode "L": one byte per pixel, row-major
+
+    bits = 0
+    for y in range(rows):
+        row = pixels[y * (HASH_COLS + 1):(y + 1) * (HASH_COLS + 1)]
+        for x in range(HASH_COLS):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+
+def fingerprint(image) -> Fingerprint:
+    content = trim_to_content(image.convert("L"))
+    width, height = content.size
+    rows = max(MIN_ROWS, min(MAX_ROWS, round(HASH_COLS * height / max(width, 1))))
+
+    thumb_w = min(width, THUMB_WIDTH)
+    thumb_h = max(1, min(THUMB_MAX_HEIGHT, round(height * thumb_w / max(width, 1))))
+    thumb = content.resize((thumb_w, thumb_h), Image.BOX).point(lambda p: p >> THUMB_LEVELS_SHIFT)
+
+    return Fingerprint(rows, dhash(content, rows), thumb)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class OCRCache:
+    """
+    Two-tier OCR result cache in front of extract_text().
+    - memory: LRU of recent fingerprints, matched by dHash distance and
+      confirmed on the thumbnail, so re-snips with different margins hit
+    - disk: one text file per content key under Data/ocr_cache, size-bounded
+    """
+
+    def __init__(self, max_entries=OCR_CACHE_MEMORY_ENTRIES, max_disk_bytes=OCR_CACHE_DISK_MB * 1024 * 1024,
+                 directory=None):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.directory = directory or get_data_dir("ocr_cache")
+        self._memory = OrderedDict()  # key -> (Fingerprint, text)
+        self._disk_bytes = None  # computed on first write
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def lookup(self, image):
+        """Returns (fingerprint, text); text is None on a miss. Pass the fingerprint to store()."""
+        fp = fingerprint(image)
+
+        with self._lock:
+            match = self._find_near(fp)
+            if match is not None:
+                self._memory.move_to_end(match)
+                self.hits_memory += 1
+                return fp, self._memory[match][1]
+
+        text = self._read_disk(fp.key)
+        with self._lock:
+            if text is not None:
+                self.hits_disk += 1
+                self._remember(fp, text)
+                return fp, text
+            self.misses += 1
+        return fp, None
+
+    def store(self, fp, text):
+        with self._lock:
+            self._remember(fp, text)
+        self._write_disk(fp.key, text)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".txt"):
+                os.remove(entry.path)
+
+    # --- memory tier ---
+    def _find_near(self, fp):
+        if fp.key in self._memory:
+            return fp.key
+        for key, (other, _) in self._memory.items():
+            if fp.matches(other):
+                return key
+        return None
+
+    def _remember(self, fp, text):
+        self._memory[fp.key] = (fp, text)
+        self._memory.move_to_end(fp.key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- disk tier ---
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # bump mtime so eviction is least-recently-used
+            return text
+        except OSError:
+            return None
+
+    def _write_disk(self, key, text):
+        if self.max_disk_bytes <= 0:
+            return
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        data = text.encode("utf-8")
+        try:
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"OCR cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data) - replaced
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _scan_disk_bytes(self):
+        return sum(e.stat().st_size for e in os.scandir(self.directory) if e.name.endswith(".txt"))
+
+    def _evict_disk(self):
+        # Drop least-recently-used files until we are back under 80% of the budget
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(".txt")]
+        total = sum(e.stat().st_size for e in entries)
+        target = self.max_disk_bytes * 0.8
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if total <= target:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
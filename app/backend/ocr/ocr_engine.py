@@ -1,6 +1,13 @@
-import pytesseract
+import ctypes
+import ctypes.util
+import logging
 import os
 import shutil
+import threading
+
+from app.config import OCR_BACKEND, OCR_LANG, OCR_CACHE, OCR_CLEANUP
+
+log = logging.getLogger(__name__)
 
 # --- TESSERACT PATH CONFIGURATION ---
 # Common macOS locations for tesseract
@@ -10,30 +17,422 @@ TESS_PATHS = [
     "/usr/bin/tesseract",            # System
 ]
 
+# Common locations for the shared library used by the in-process backend
+LIBTESS_PATHS = [
+    "/opt/homebrew/lib/libtesseract.dylib",        # Homebrew (Apple Silicon)
+    "/usr/local/lib/libtesseract.dylib",           # Homebrew (Intel)
+    "/usr/lib/x86_64-linux-gnu/libtesseract.so.5",
+    "/usr/lib/x86_64-linux-gnu/libtesseract.so.4",
+    "/usr/lib/libtesseract.so",
+]
+
 def find_tesseract():
     # 1. Check if it's already in the PATH
     path = shutil.which("tesseract")
     if path:
         return path
-    
+
     # 2. Check common manual install paths
     for p in TESS_PATHS:
         if os.path.exists(p):
             return p
     return None
 
-tess_path = find_tesseract()
-if tess_path:
-    pytesseract.pytesseract.tesseract_cmd = tess_path
+def find_libtesseract():
+    path = ctypes.util.find_library("tesseract")
+    if path:
+        return path
+    for p in LIBTESS_PATHS:
+        if os.path.exists(p):
+            return p
+    return None
+
+_pytesseract = None
+_pytesseract_lock = threading.Lock()
+
+
+def get_pytesseract():
+    """
+    Imports pytesseract and points it at the tesseract binary on first use,
+    so neither the import nor the PATH probe slows down app startup.
+    """
+    global _pytesseract
+    if _pytesseract is None:
+        with _pytesseract_lock:
+            if _pytesseract is None:
+                import pytesseract
+                tess_path = find_tesseract()
+                if tess_path:
+                    pytesseract.pytesseract.tesseract_cmd = tess_path
+                _pytesseract = pytesseract
+    return _pytesseract
 # --- END CONFIGURATION ---
 
-def extract_text(image) -> str:
-    # Use config to improve OCR accuracy
-    custom_config = r'--oem 3 --psm 6'
-    raw_text = pytesseract.image_to_string(image, config=custom_config)
+# Same settings for every backend: default LSTM engine, single uniform block of text
+OEM = 3
+PSM = 6
+# Layout analysis (image_to_data) needs tesseract to find blocks/paragraphs itself
+LAYOUT_PSM = 3
+
+
+class OCRWord:
+    """One word row of tesseract's TSV output; box in image pixels."""
+
+    def __init__(self, text, conf, left, top, width, height, block, par, line):
+        self.text = text
+        self.conf = conf
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.block = block
+        self.par = par
+        self.line = line
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+
+def parse_tsv(tsv: str):
+    """
+    Parses tesseract TSV (level, page, block, par, line, word, left, top,
+    width, height, conf, text) into OCRWords. The header row that
+    pytesseract includes and the non-word rows (levels 1-4) are skipped.
+    """
+    words = []
+    for row in tsv.splitlines():
+        cols = row.split("\t")
+        if len(cols) < 12 or cols[0] != "5":
+            continue
+        text = "\t".join(cols[11:]).strip()
+        if not text:
+            continue
+        try:
+            block, par, line = int(cols[2]), int(cols[3]), int(cols[4])
+            left, top, width, height = (int(c) for c in cols[6:10])
+            conf = float(cols[10])
+        except ValueError:
+            continue
+        words.append(OCRWord(text, conf, left, top, width, height, block, par, line))
+    return words
+
+
+# --- OCR BACKENDS ---
+class OCRBackend:
+    """
+    Interface for OCR engines. Long-lived backends load the language model
+    once in load() and reuse it for every image_to_string() call.
+    """
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        return False
+
+    def load(self):
+        pass
+
+    def image_to_string(self, image) -> str:
+        raise NotImplementedError
+
+    def image_to_data(self, image, psm=LAYOUT_PSM) -> str:
+        """Word boxes + confidences as tesseract TSV; LAYOUT_PSM finds blocks/paragraphs."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Fallback: pytesseract writes a temp file and forks `tesseract` per call.
+    """
+
+    name = "pytesseract"
+
+    def is_available(self) -> bool:
+        return find_tesseract() is not None
+
+    def image_to_string(self, image) -> str:
+        return get_pytesseract().image_to_string(image, lang=OCR_LANG, config=f"--oem {OEM} --psm {PSM}")
+
+    def image_to_data(self, image, psm=LAYOUT_PSM) -> str:
+        return get_pytesseract().image_to_data(image, lang=OCR_LANG, config=f"--oem {OEM} --psm {psm}")
+
+
+class CAPIBackend(OCRBackend):
+    """
+    Binds libtesseract's C API with ctypes. The TessBaseAPI handle (and the
+    traineddata it loaded) lives for the whole session.
+    TessBaseAPI is not thread-safe, so calls are serialized with a lock.
+    """
+
+    name = "capi"
+
+    def __init__(self):
+        self._lib = None
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return find_libtesseract() is not None
+
+    def load(self):
+        if self._handle:
+            return
+        lib = ctypes.CDLL(find_libtesseract())
+
+        lib.TessBaseAPICreate.restype = ctypes.c_void_p
+        lib.TessBaseAPIInit2.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        lib.TessBaseAPIInit2.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int
+        ]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessBaseAPIGetTsvText.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPIGetTsvText.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+
+        handle = lib.TessBaseAPICreate()
+        datapath = os.environ.get("TESSDATA_PREFIX")
+        rc = lib.TessBaseAPIInit2(
+            handle, datapath.encode() if datapath else None, OCR_LANG.encode(), OEM
+        )
+        if rc != 0:
+            lib.TessBaseAPIDelete(handle)
+            raise Exception(f"libtesseract failed to load language '{OCR_LANG}'")
+        lib.TessBaseAPISetPageSegMode(handle, PSM)
+
+        self._lib = lib
+        self._handle = handle
+
+    def _recognize(self, image, get_text, psm=PSM) -> str:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        width, height = image.size
+        data = image.tobytes()
+
+        with self._lock:
+            self.load()
+            lib = self._lib
+            if psm != PSM:
+                lib.TessBaseAPISetPageSegMode(self._handle, psm)
+            lib.TessBaseAPISetImage(self._handle, data, width, height, 3, width * 3)
+            ptr = get_text(lib)
+            try:
+                return ctypes.string_at(ptr).decode("utf-8", errors="replace") if ptr else ""
+            finally:
+                if ptr:
+                    lib.TessDeleteText(ptr)
+                lib.TessBaseAPIClear(self._handle)
+                if psm != PSM:
+                    lib.TessBaseAPISetPageSegMode(self._handle, PSM)
+
+    def image_to_string(self, image) -> str:
+        return self._recognize(image, lambda lib: lib.TessBaseAPIGetUTF8Text(self._handle))
+
+    def image_to_data(self, image, psm=LAYOUT_PSM) -> str:
+        return self._recognize(image, lambda lib: lib.TessBaseAPIGetTsvText(self._handle, 0), psm=psm)
+
+    def close(self):
+        with self._lock:
+            if self._handle:
+                self._lib.TessBaseAPIEnd(self._handle)
+                self._lib.TessBaseAPIDelete(self._handle)
+                self._handle = None
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Same idea as CAPIBackend, via the optional `tesserocr` package.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        self._api = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        try:
+            import tesserocr  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def load(self):
+        if self._api:
+            return
+        import tesserocr
+        self._api = tesserocr.PyTessBaseAPI(
+            lang=OCR_LANG, psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT
+        )
+
+    def image_to_string(self, image) -> str:
+        with self._lock:
+            self.load()
+            self._api.SetImage(image)
+            text = self._api.GetUTF8Text()
+            self._api.Clear()
+            return text
+
+    def image_to_data(self, image, psm=LAYOUT_PSM) -> str:
+        import tesserocr
+        with self._lock:
+            self.load()
+            self._api.SetPageSegMode(psm)  # tesserocr.PSM values are tesseract's ints
+            try:
+                self._api.SetImage(image)
+                return self._api.GetTSVText(0)
+            finally:
+                self._api.Clear()
+                self._api.SetPageSegMode(tesserocr.PSM.SINGLE_BLOCK)
+
+    def close(self):
+        with self._lock:
+            if self._api:
+                self._api.End()
+                self._api = None
+
+
+BACKENDS = {
+    CAPIBackend.name: CAPIBackend,
+    TesserocrBackend.name: TesserocrBackend,
+    PytesseractBackend.name: PytesseractBackend,
+}
+
+# Preference order for "auto": in-process engines first, subprocess last
+AUTO_ORDER = [CAPIBackend.name, TesserocrBackend.name, PytesseractBackend.name]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend(name=None) -> OCRBackend:
+    """
+    Returns the shared backend instance. The first long-lived backend that
+    loads successfully wins; pytesseract is the fallback.
+    """
+    global _backend
+    if _backend and name is None:
+        return _backend
+
+    with _backend_lock:
+        if _backend and name is None:
+            return _backend
+
+        wanted = (name or OCR_BACKEND).lower()
+        candidates = AUTO_ORDER if wanted == "auto" else [wanted, PytesseractBackend.name]
+
+        for candidate in candidates:
+            if candidate not in BACKENDS:
+                log.warning(f"Unknown OCR backend '{candidate}'")
+                continue
+            backend = BACKENDS[candidate]()
+            if not backend.is_available():
+                continue
+            try:
+                backend.load()
+            except Exception as e:
+                log.warning(f"OCR backend '{candidate}' failed to load: {e}")
+                continue
+            if name is None:
+                _backend = backend
+            log.info(f"Using OCR backend '{backend.name}'")
+            return backend
+
+        # Nothing loaded; let pytesseract raise its own "tesseract not found" error
+        backend = PytesseractBackend()
+        if name is None:
+            _backend = backend
+        return backend
+
+
+def warm_up():
+    """Loads the OCR backend ahead of the first capture (run off the GUI thread)."""
+    get_backend()
+
+
+def set_backend(backend: OCRBackend):
+    global _backend
+    with _backend_lock:
+        if _backend and _backend is not backend:
+            _backend.close()
+        _backend = backend
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        from app.backend.ocr.ocr_cache import OCRCache
+        from app.backend.paths import get_data_dir
+        # Cleaned and raw text must never be served for each other
+        _cache = OCRCache(directory=get_data_dir("ocr_cache", "clean") if OCR_CLEANUP else None)
+    return _cache
+
+
+def _run(method, image, **kwargs):
+    """Calls a backend method, falling back to pytesseract if the in-process engine breaks."""
+    backend = get_backend()
+    try:
+        return getattr(backend, method)(image, **kwargs)
+    except Exception as e:
+        if isinstance(backend, PytesseractBackend):
+            raise
+        # Keep working if the in-process engine breaks mid-session
+        log.warning(f"OCR backend '{backend.name}' failed ({e}), falling back to pytesseract")
+        return getattr(PytesseractBackend(), method)(image, **kwargs)
+
+
+def read_text(image, use_cache=OCR_CACHE, cleanup=OCR_CLEANUP, span=None):
+    """
+    OCR text plus its cleanup.CleanupStats (None on cache hits or with
+    cleanup off). With cleanup the single OCR pass is image_to_data, whose
+    confidences decide which words survive (see cleanup.py).
+    A tracing span, if given, gets the cache outcome and the cleanup stats.
+    """
+    # Re-snips of the same question skip OCR entirely
+    if use_cache:
+        fp, cached = get_cache().lookup(image)
+        if span:
+            span.attrs["ocr_cache"] = "hit" if cached is not None else "miss"
+        if cached is not None:
+            return cached, None
+
+    stats = None
+    if cleanup:
+        from app.backend.ocr import cleanup as ocr_cleanup
+        text, stats = ocr_cleanup.clean_words(parse_tsv(_run("image_to_data", image, psm=PSM)))
+        if span:
+            span.attrs.update(stats.as_dict())
+    else:
+        raw_text = _run("image_to_string", image)
+        text = "\n".join(line.strip() for line in raw_text.splitlines() if line.strip())
+
+    if not text:
+        return "", stats
+    if use_cache:
+        get_cache().store(fp, text)
+    return text, stats
+
+
+def extract_text(image, use_cache=OCR_CACHE) -> str:
+    return read_text(image, use_cache)[0]
 
-    if not raw_text.strip():
-        return ""
 
-    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
-    return "\n".join(lines)
+def extract_words(image):
+    """Word boxes for layout analysis (see segmenter). Not cached."""
+    return parse_tsv(_run("image_to_data", image))
@@ -0,0 +1,172 @@
+import logging
+import re
+from statistics import median
+
+from app.backend.ocr import cleanup
+from app.backend.ocr.ocr_engine import extract_words
+from app.config import OCR_CLEANUP
+
+log = logging.getLogger(__name__)
+
+# "1.", "2)", "Q3.", "Q 4:", "Question 5", "Problem 6." at the start of a line.
+# "2.5 kg" is not a marker: the number must be followed by punctuation + space.
+_MARKER = re.compile(
+    r"^\s*(?:(?:Q|Ques(?:tion)?|Problem|Ex(?:ercise)?)\.?\s*(\d{1,3})\b[\.\):]?"
+    r"|\(?(\d{1,3})\s*[\.\):](?=\s|$))",
+    re.IGNORECASE,
+)
+# A marker line indented further than this (x median line height) past the
+# leftmost marker is a sub-step/option list, not a new question
+MARKER_INDENT = 2.0
+# Without numbered markers, paragraphs further apart than this
+# (x median line height) are treated as separate questions
+GAP_SPLIT = 2.0
+
+
+class Question:
+    """One segmented question; box = (left, top, right, bottom) in image pixels, or None."""
+
+    def __init__(self, number, text, box=None):
+        self.number = number
+        self.text = text
+        self.box = box
+
+    def __repr__(self):
+        return f"Question({self.number!r}, {self.text[:30]!r})"
+
+
+def marker_number(line: str):
+    match = _MARKER.match(line)
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def count_markers(text: str) -> int:
+    """Cheap pre-check on plain OCR text: how many lines look like question starts."""
+    return len(_marker_lines(text.splitlines()))
+
+
+def _marker_lines(texts, keep=None):
+    """Indices of lines that start a new question; numbers must increase."""
+    starts, last = [], None
+    for i, text in enumerate(texts):
+        number = marker_number(text)
+        if number is None or (last is not None and number <= last):
+            continue
+        if keep and not keep(i):
+            continue
+        starts.append(i)
+        last = number
+    return starts
+
+
+class _Line:
+    def __init__(self, words):
+        self.text = " ".join(w.text for w in words)
+        self.left = min(w.left for w in words)
+        self.top = min(w.top for w in words)
+        self.right = max(w.right for w in words)
+        self.bottom = max(w.bottom for w in words)
+        self.block = words[0].block
+        self.par = words[0].par
+
+
+def _group_lines(words):
+    """Word rows -> text lines, in tesseract's reading order."""
+    grouped = {}
+    for w in words:
+        grouped.setdefault((w.block, w.par, w.line), []).append(w)
+    return [_Line(ws) for _, ws in sorted(grouped.items())]
+
+
+def _union(lines):
+    return (
+        min(l.left for l in lines), min(l.top for l in lines),
+        max(l.right for l in lines), max(l.bottom for l in lines),
+    )
+
+
+def _build(groups, numbered):
+    questions = []
+    for i, group in enumerate(groups, 1):
+        number = marker_number(group[0].text) if numbered else None
+        questions.append(Question(number or i, "\n".join(l.text for l in group), _union(group)))
+    return questions
+
+
+def segment_words(words):
+    """
+    Splits OCR word boxes into questions.
+    1. lines starting with an increasing question number ("1.", "Q2)",
+       "Question 3") that aren't indented like sub-steps start a question;
+       anything above the first marker (instructions) is dropped
+    2. without markers, tesseract paragraphs separated by a large vertical
+       gap become separate questions
+    Returns a single Question when nothing suggests several.
+    """
+    lines = _group_lines(words)
+    if not lines:
+        return []
+    line_height = median(l.bottom - l.top for l in lines) or 1
+
+    texts = [l.text for l in lines]
+    candidates = [i for i, t in enumerate(texts) if marker_number(t) is not None]
+    starts = []
+    if candidates:
+        margin = min(lines[i].left for i in candidates)
+        starts = _marker_lines(texts, keep=lambda i: lines[i].left - margin <= MARKER_INDENT * line_height)
+    if len(starts) >= 2:
+        bounds = starts + [len(lines)]
+        groups = [lines[a:b] for a, b in zip(bounds, bounds[1:])]
+        return _build(groups, numbered=True)
+
+    # Fallback: paragraphs far apart from each other
+    groups = [[lines[0]]]
+    for prev, line in zip(lines, lines[1:]):
+        new_par = (line.block, line.par) != (prev.block, prev.par)
+        if new_par and line.top - prev.bottom > GAP_SPLIT * line_height:
+            groups.append([line])
+        else:
+            groups[-1].append(line)
+    return _build(groups, numbered=False)
+
+
+def segment_text(text: str):
+    """Marker-only split of plain text (no boxes), e.g. for OCR cache hits."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    starts = _marker_lines(lines)
+    if len(starts) < 2:
+        return [Question(1, text.strip())] if text.strip() else []
+    bounds = starts + [len(lines)]
+    return [
+        Question(marker_number(lines[a]), "\n".join(lines[a:b]))
+        for a, b in zip(bounds, bounds[1:])
+    ]
+
+
+def segment_image(image, text=None):
+    """
+    Questions in a capture. The layout pass is a second OCR run, so it only
+    happens when `text` (the plain OCR result, if already known) has at
+    least two question markers; otherwise the capture is one question.
+    """
+    if text is not None and count_markers(text) < 2:
+        return [Question(1, text.strip())] if text.strip() else []
+    try:
+        words = extract_words(image)
+        if OCR_CLEANUP:
+            words = cleanup.confident(words)
+        questions = segment_words(words)
+    except Exception as e:
+        log.warning(f"Layout analysis failed ({e}), splitting text on markers only")
+        return segment_text(text or "")
+    if OCR_CLEANUP:
+        # Same normalization as the plain text, so prompts and cache keys agree
+        for q in questions:
+            q.text = "\n".join(cleanup.tidy(q.text.splitlines())[0])
+        questions = [q for q in questions if q.text]
+    if len(questions) < 2 and text is not None:
+        # Layout found no split (e.g. markers mid-paragraph); trust the text markers
+        return segment_text(text)
+    return questions
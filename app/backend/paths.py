@@ -0,0 +1,17 @@
+import os
+import sys
+
+
+def get_app_root():
+    if getattr(sys, 'frozen', False):
+        # When bundled, use Application Support to avoid read-only errors
+        return os.path.expanduser("~/Library/Application Support/ScreenTutor")
+    # During development, use the project root
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_data_dir(*parts):
+    """Returns (and creates) a directory under Data/."""
+    path = os.path.join(get_app_root(), "Data", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,65 @@
+"""
+GUI-free capture -> OCR -> AI stages. MainWindow runs them on its job
+pipeline; dev/batch.py runs them over whole folders (see backend/batch.py).
+"""
+from contextlib import nullcontext
+
+from app.backend.ocr.ocr_engine import read_text
+from app.backend.ocr.segmenter import segment_image
+from app.backend.ai.ai_client import ask_solution, ask_hint, ask_solutions_batch
+from app.config import SEGMENT_QUESTIONS, SOLVE_CONCURRENCY, OCR_CACHE
+
+
+def _span(trace, name):
+    return trace.span(name) if trace else nullcontext()
+
+
+def read_image(image, segment=SEGMENT_QUESTIONS, trace=None, use_cache=OCR_CACHE):
+    """
+    OCR + question segmentation. Returns (text, [Question]); [] when nothing was read.
+    use_cache=False forces a fresh OCR run (e.g. re-OCR after an engine upgrade).
+    With a trace (app/backend/tracing.py) both steps are recorded as spans;
+    the "ocr" span carries the cache outcome and cleanup stats (tokens saved etc.).
+    """
+    with _span(trace, "ocr") as span:
+        text = read_text(image, use_cache, span=span)[0].strip()
+        if span:
+            span.attrs["chars"] = len(text)
+    if not text:
+        return "", []
+    if not segment:
+        return text, []
+    with _span(trace, "segment") as span:
+        questions = segment_image(image, text)
+        if span:
+            span.attrs["questions"] = len(questions)
+    return text, questions
+
+
+def answer_question(question: str, mode="solve", stream=False):
+    """Single question; an iterator of chunks when stream=True."""
+    ask = ask_solution if mode == "solve" else ask_hint
+    return ask(question, stream=stream)
+
+
+def answer_questions(questions: list, mode="solve", max_workers=SOLVE_CONCURRENCY, on_answer=None):
+    """
+    Answers several questions: short ones share batched requests, long ones
+    get their own, at most `max_workers` requests at a time.
+    on_answer(index, answer, error) is called as each one finishes.
+    Returns [(answer, error)] in question order.
+    """
+    results = [(None, None)] * len(questions)
+
+    def done(index, answer, error=None):
+        results[index] = (answer, error)
+        if on_answer:
+            on_answer(index, answer, error)
+
+    ask_solutions_batch(
+        questions, mode,
+        max_workers=max_workers,
+        on_answer=done,
+        on_error=lambda i, e: done(i, None, e),
+    )
+    return results
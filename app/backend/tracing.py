@@ -0,0 +1,225 @@
+"""
+Lightweight per-stage tracing. A Trace is one pipeline run (capture ->
+OCR -> answer); its spans can start and end on any thread. Finished spans
+go to a rotating JSON-lines log under Data/logs and a bounded in-memory
+buffer that can be exported as Chrome trace-event JSON
+(chrome://tracing or https://ui.perfetto.dev).
+"""
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from app.backend.paths import get_data_dir
+from app.config import TRACE_LOG, TRACE_LOG_MB, TRACE_LOG_FILES, LOG_LEVEL
+
+LOG_NAME = "trace.log"
+
+
+def configure_logging(level=LOG_LEVEL):
+    """
+    Console logging for the app's module loggers; call once at startup.
+    Per-capture detail goes to the trace log instead (see Tracer).
+    """
+    logging.basicConfig(level=getattr(logging, level, logging.INFO),
+                        format="%(levelname)s %(name)s: %(message)s")
+
+
+class Span:
+    def __init__(self, tracer, name, trace=None, attrs=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace = trace
+        self.attrs = dict(attrs or {})
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.tid = threading.get_ident()
+        self.thread = threading.current_thread().name
+        self.duration = None
+
+    @property
+    def ms(self) -> float:
+        return (self.duration if self.duration is not None else time.perf_counter() - self.start) * 1000
+
+    def end(self, **attrs):
+        """Finishes the span (idempotent) and records it."""
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+            self.attrs.update(attrs)
+            self.tracer._record(self)
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "span": self.name,
+            "trace": self.trace.name if self.trace else None,
+            "trace_id": self.trace.id if self.trace else None,
+            "ts": round(self.wall_start, 6),
+            "dur_ms": round(self.ms, 3),
+            "tid": self.tid,
+            "thread": self.thread,
+            "attrs": self.attrs,
+        }
+
+
+class Trace:
+    """One pipeline run; collects the spans recorded against it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, tracer, name, **attrs):
+        self.tracer = tracer
+        self.name = name
+        self.id = f"{int(time.time())}-{next(self._ids)}"
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def start(self, name, **attrs) -> Span:
+        return Span(self.tracer, name, self, attrs)
+
+    def event(self, name, **attrs) -> Span:
+        """A zero-length span: something that happened, rather than took time."""
+        return self.start(name, **attrs).end()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = self.start(name, **attrs)
+        try:
+            yield span
+        finally:
+            span.end()
+
+    def _add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def durations(self) -> dict:
+        """Stage name -> total ms, in the order the stages first finished."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = totals.get(span.name, 0.0) + span.ms
+        return totals
+
+    def summary(self, skip=()) -> str:
+        parts = []
+        for name, ms in self.durations().items():
+            if name in skip:
+                continue
+            parts.append(f"{name} {ms / 1000:.1f}s" if ms >= 1000 else f"{name} {ms:.0f}ms")
+        return " · ".join(parts)
+
+
+class Tracer:
+    def __init__(self, max_spans=5000, log=TRACE_LOG):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._log_enabled = log
+        self._logger = None
+
+    def trace(self, name, **attrs) -> Trace:
+        return Trace(self, name, **attrs)
+
+    def start(self, name, **attrs) -> Span:
+        """A span outside any trace (e.g. batch jobs, warm-up)."""
+        return Span(self, name, None, attrs)
+
+    def event(self, name, **attrs) -> Span:
+        return self.start(name, **attrs).end()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = self.start(name, **attrs)
+        try:
+            yield span
+        finally:
+            span.end()
+
+    def _record(self, span):
+        if span.trace:
+            span.trace._add(span)
+        with self._lock:
+            self._spans.append(span)
+        logger = self._get_logger()
+        if logger:
+            logger.info(json.dumps(span.as_dict(), default=str))
+
+    def _get_logger(self):
+        if not self._log_enabled:
+            return None
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    logger = logging.getLogger("screentutor.trace")
+                    logger.setLevel(logging.INFO)
+                    logger.propagate = False
+                    handler = RotatingFileHandler(
+                        os.path.join(get_data_dir("logs"), LOG_NAME),
+                        maxBytes=TRACE_LOG_MB * 1024 * 1024,
+                        backupCount=TRACE_LOG_FILES,
+                        encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    logger.addHandler(handler)
+                    self._logger = logger
+        return self._logger
+
+    def recent(self) -> list:
+        with self._lock:
+            return [s.as_dict() for s in self._spans]
+
+    def export_chrome(self, path, spans=None) -> str:
+        """Writes spans (default: the in-memory buffer) as Chrome trace-event JSON."""
+        events = chrome_events(self.recent() if spans is None else spans)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+def chrome_events(spans) -> list:
+    """Span dicts (from Tracer.recent() or the log) -> complete ("X") trace events."""
+    pid = os.getpid()
+    events = []
+    for s in spans:
+        args = dict(s.get("attrs") or {})
+        if s.get("trace_id"):
+            args["trace_id"] = s["trace_id"]
+        events.append({
+            "name": s["span"],
+            "cat": s.get("trace") or "untraced",
+            "ph": "X",
+            "ts": int(s["ts"] * 1_000_000),
+            "dur": int(s["dur_ms"] * 1000),
+            "pid": pid,
+            "tid": s.get("tid", 0),
+            "args": args,
+        })
+    return events
+
+
+def read_log(path=None) -> list:
+    """Span dicts from the trace log and its rotated backups, oldest first."""
+    path = path or os.path.join(get_data_dir("logs"), LOG_NAME)
+    files = [f"{path}.{i}" for i in range(TRACE_LOG_FILES, 0, -1)] + [path]
+    spans = []
+    for name in files:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+
+# Shared by the whole process
+tracer = Tracer()
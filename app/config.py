@@ -0,0 +1,165 @@
+import os
+
+# --- RUNTIME CONFIGURATION ---
+# Everything here can be overridden from the environment or the .env file
+# (dev/run.py loads .env before the app package is imported).
+
+
+def env_str(name, default=None):
+    value = os.environ.get(name)
+    return value.strip() if value and value.strip() else default
+
+
+def env_bool(name, default=False):
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    try:
+        return int(env_str(name, default))
+    except ValueError:
+        return default
+
+
+def env_list(name, default=()):
+    """Comma-separated values, e.g. "a, b" -> ["a", "b"]."""
+    value = env_str(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def env_float(name, default):
+    try:
+        return float(env_str(name, default))
+    except ValueError:
+        return default
+
+
+# OCR backend: "auto", "capi" (libtesseract via ctypes), "tesserocr" or "pytesseract"
+OCR_BACKEND = env_str("SCREENTUTOR_OCR_BACKEND", "auto").lower()
+OCR_LANG = env_str("SCREENTUTOR_OCR_LANG", "eng")
+
+# OCR result cache keyed by a perceptual hash of the crop
+OCR_CACHE = env_bool("SCREENTUTOR_OCR_CACHE", True)
+OCR_CACHE_MEMORY_ENTRIES = env_int("SCREENTUTOR_OCR_CACHE_ENTRIES", 256)
+OCR_CACHE_DISK_MB = env_int("SCREENTUTOR_OCR_CACHE_DISK_MB", 20)
+
+# Post-OCR cleanup (backend/ocr/cleanup.py): drop words below OCR_MIN_CONF
+# (0-100), screen boilerplate and symbol noise before text reaches a prompt
+OCR_CLEANUP = env_bool("SCREENTUTOR_OCR_CLEANUP", True)
+OCR_MIN_CONF = env_int("SCREENTUTOR_OCR_MIN_CONF", 40)
+
+# Captured crops, stored by content hash under Data/captures and linked from
+# history. Oldest go first past CAPTURE_STORE_MB or CAPTURE_STORE_DAYS (0 = no age limit).
+CAPTURE_STORE = env_bool("SCREENTUTOR_CAPTURE_STORE", True)
+CAPTURE_STORE_MB = env_int("SCREENTUTOR_CAPTURE_STORE_MB", 200)
+CAPTURE_STORE_DAYS = env_int("SCREENTUTOR_CAPTURE_STORE_DAYS", 30)
+# zlib level 1 encodes photo-like crops ~3x faster than the default 6, files ~30% larger
+CAPTURE_PNG_LEVEL = env_int("SCREENTUTOR_CAPTURE_PNG_LEVEL", 1)
+
+# Persistent answer cache for solve/hint
+ANSWER_CACHE = env_bool("SCREENTUTOR_ANSWER_CACHE", True)
+ANSWER_CACHE_ENTRIES = env_int("SCREENTUTOR_ANSWER_CACHE_ENTRIES", 500)
+ANSWER_CACHE_TTL_HOURS = env_int("SCREENTUTOR_ANSWER_CACHE_TTL_HOURS", 24 * 14)
+# New answers are written to disk together this long after the first one (0 = every store)
+ANSWER_CACHE_FLUSH_MS = env_int("SCREENTUTOR_ANSWER_CACHE_FLUSH_MS", 2000)
+
+# Stream LLM output into the UI as it is generated
+STREAM_RESPONSES = env_bool("SCREENTUTOR_STREAM", True)
+
+# Speculatively request the other mode (hint <-> solution) in the background
+# so TRY HINT / TRY FULL SOLUTION is instant. Costs extra tokens.
+SPECULATIVE_PREFETCH = env_bool("SCREENTUTOR_PREFETCH", False)
+
+# Practice generation: prompt budget for history context, and how many of
+# the newest history entries are considered at all
+PRACTICE_CONTEXT_TOKENS = env_int("SCREENTUTOR_PRACTICE_CONTEXT_TOKENS", 1500)
+PRACTICE_CONTEXT_CANDIDATES = env_int("SCREENTUTOR_PRACTICE_CONTEXT_CANDIDATES", 400)
+
+# Practice set size, and sharding: sets larger than PRACTICE_SHARD_SIZE are
+# split into concurrent requests (at most PRACTICE_CONCURRENCY in flight)
+PRACTICE_COUNT = env_int("SCREENTUTOR_PRACTICE_COUNT", 10)
+PRACTICE_SHARD_SIZE = env_int("SCREENTUTOR_PRACTICE_SHARD_SIZE", 10)
+PRACTICE_CONCURRENCY = env_int("SCREENTUTOR_PRACTICE_CONCURRENCY", 4)
+
+# Export (backend/export.py): "md", "txt" or "pdf", where files go, and
+# whether each export only contains what was added since the previous one
+EXPORT_FORMAT = env_str("SCREENTUTOR_EXPORT_FORMAT", "md").lower()
+EXPORT_DIR = env_str("SCREENTUTOR_EXPORT_DIR", "~/Desktop")
+EXPORT_INCREMENTAL = env_bool("SCREENTUTOR_EXPORT_INCREMENTAL", True)
+
+# Capture: wait after the window system confirms the main window is hidden
+# (one frame), and the capture hotkey (pynput syntax) + the mode it starts
+CAPTURE_HIDE_GRACE_MS = env_int("SCREENTUTOR_CAPTURE_HIDE_GRACE_MS", 16)
+CAPTURE_HIDE_TIMEOUT_MS = env_int("SCREENTUTOR_CAPTURE_HIDE_TIMEOUT_MS", 250)
+CAPTURE_HOTKEY = env_str("SCREENTUTOR_CAPTURE_HOTKEY", "<ctrl>+<shift>+s")
+HOTKEY_MODE = env_str("SCREENTUTOR_HOTKEY_MODE", "solve")
+GLOBAL_HOTKEY = env_bool("SCREENTUTOR_GLOBAL_HOTKEY", True)
+
+# Watch mode: poll rate while content changes / when idle, how many
+# unchanged polls count as "settled", and the changed-pixel fraction that
+# counts as new content
+WATCH_INTERVAL_MS = env_int("SCREENTUTOR_WATCH_INTERVAL_MS", 500)
+WATCH_IDLE_INTERVAL_MS = env_int("SCREENTUTOR_WATCH_IDLE_INTERVAL_MS", 2000)
+WATCH_SETTLE_POLLS = env_int("SCREENTUTOR_WATCH_SETTLE_POLLS", 2)
+WATCH_CHANGE_RATIO = env_float("SCREENTUTOR_WATCH_CHANGE_RATIO", 0.001)
+WATCH_MODE = env_str("SCREENTUTOR_WATCH_MODE", "solve")
+
+# Split captures with several numbered questions into separate questions
+SEGMENT_QUESTIONS = env_bool("SCREENTUTOR_SEGMENT_QUESTIONS", True)
+
+# Multi-question captures: questions per batched request (1 disables
+# batching), how many AI requests run at once, and the longest question
+# (estimated tokens) that still goes into a batch
+SOLVE_BATCH_SIZE = env_int("SCREENTUTOR_SOLVE_BATCH_SIZE", 8)
+SOLVE_CONCURRENCY = env_int("SCREENTUTOR_SOLVE_CONCURRENCY", 4)
+SOLVE_BATCH_MAX_TOKENS = env_int("SCREENTUTOR_SOLVE_BATCH_MAX_TOKENS", 150)
+
+# OpenAI-compatible endpoint (e.g. dev/mock_llm.py for offline benchmarks)
+AI_BASE_URL = env_str("SCREENTUTOR_AI_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Model (any OpenRouter model ID), and hedging: when the model hasn't sent a
+# first token within HEDGE_DEADLINE_MS, the next fallback model is asked too
+# and the first one to answer wins. Costs extra tokens on slow answers.
+AI_MODEL = env_str("SCREENTUTOR_AI_MODEL", "google/gemini-2.0-flash-001")
+AI_FALLBACK_MODELS = env_list("SCREENTUTOR_AI_FALLBACK_MODELS")
+HEDGE = env_bool("SCREENTUTOR_HEDGE", False)
+HEDGE_DEADLINE_MS = env_int("SCREENTUTOR_HEDGE_DEADLINE_MS", 1500)
+
+# Model routing: a local classifier sends each request to the fast or the
+# strong model (see app/backend/ai/router.py; SCREENTUTOR_ROUTER_RULES is an
+# optional JSON file replacing the default rules)
+ROUTER = env_bool("SCREENTUTOR_ROUTER", False)
+ROUTER_RULES = env_str("SCREENTUTOR_ROUTER_RULES")
+MODEL_FAST = env_str("SCREENTUTOR_MODEL_FAST", AI_MODEL)
+MODEL_STRONG = env_str("SCREENTUTOR_MODEL_STRONG", "google/gemini-2.5-pro")
+
+# AI transport: per-request timeouts (read/write and connect), retries on
+# timeouts / 429 / 5xx with jittered exponential backoff (a Retry-After longer
+# than AI_RETRY_MAX_S fails fast), and the shared keep-alive connection pool
+# (AI_HTTP2 needs the optional "h2" package)
+AI_TIMEOUT_S = env_float("SCREENTUTOR_AI_TIMEOUT_S", 60.0)
+AI_CONNECT_TIMEOUT_S = env_float("SCREENTUTOR_AI_CONNECT_TIMEOUT_S", 5.0)
+AI_MAX_RETRIES = env_int("SCREENTUTOR_AI_MAX_RETRIES", 3)
+AI_RETRY_BASE_S = env_float("SCREENTUTOR_AI_RETRY_BASE_S", 0.5)
+AI_RETRY_MAX_S = env_float("SCREENTUTOR_AI_RETRY_MAX_S", 8.0)
+AI_POOL_SIZE = env_int("SCREENTUTOR_AI_POOL_SIZE", 10)
+AI_KEEPALIVE_S = env_float("SCREENTUTOR_AI_KEEPALIVE_S", 90.0)
+AI_HTTP2 = env_bool("SCREENTUTOR_AI_HTTP2", False)
+
+# Tracing: per-stage spans in a rotating JSON-lines log (Data/logs/trace.log),
+# and an optional timing breakdown in the status label after each answer
+TRACE_LOG = env_bool("SCREENTUTOR_TRACE_LOG", True)
+TRACE_LOG_MB = env_int("SCREENTUTOR_TRACE_LOG_MB", 2)
+TRACE_LOG_FILES = env_int("SCREENTUTOR_TRACE_LOG_FILES", 3)
+TRACE_OVERLAY = env_bool("SCREENTUTOR_TRACE_OVERLAY", False)
+# Console log level for the app's modules (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = env_str("SCREENTUTOR_LOG_LEVEL", "INFO").upper()
+
+# Startup: load the OCR engine and the AI client on a background thread
+# right after the window first paints, instead of on the first capture
+WARM_UP = env_bool("SCREENTUTOR_WARM_UP", True)
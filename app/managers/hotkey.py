@@ -0,0 +1,50 @@
+import logging
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+log = logging.getLogger(__name__)
+
+
+def to_qt_sequence(combo: str) -> str:
+    """'<ctrl>+<shift>+s' (pynput syntax) -> 'Ctrl+Shift+S' (QKeySequence syntax)."""
+    keys = [k.strip("<> ") for k in combo.split("+")]
+    return "+".join(k.capitalize() if len(k) > 1 else k.upper() for k in keys if k)
+
+
+class GlobalHotkey(QObject):
+    """
+    System-wide capture shortcut via the optional `pynput` package.
+    pynput calls back on its own listener thread; emitting a Qt signal
+    hands the press over to the GUI thread.
+    """
+
+    triggered = pyqtSignal()
+
+    def __init__(self, combo, parent=None):
+        super().__init__(parent)
+        self.combo = combo
+        self._listener = None
+
+    def start(self) -> bool:
+        if self._listener:
+            return True
+        try:
+            from pynput import keyboard
+        except ImportError:
+            log.info("pynput not installed; global hotkey disabled (in-app shortcut still works)")
+            return False
+        try:
+            self._listener = keyboard.GlobalHotKeys({self.combo: self.triggered.emit})
+            self._listener.start()
+        except Exception as e:
+            # e.g. missing accessibility permission on macOS
+            log.warning(f"Global hotkey {self.combo} unavailable: {e}")
+            self._listener = None
+            return False
+        log.info(f"Global hotkey registered: {self.combo}")
+        return True
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
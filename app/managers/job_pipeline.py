@@ -0,0 +1,121 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class CancelToken:
+    """
+    Shared flag a job checks to find out it has been superseded.
+    Python threads cannot be killed, so long-running stages poll this
+    between steps and results from cancelled jobs are dropped.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class WorkerSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    progress = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """
+    Runs fn(*args, **kwargs) on the thread pool.
+    With pass_token / pass_progress the worker injects `token=` and
+    `progress=` keyword arguments so the stage can bail out early or
+    report partial results back to the GUI thread.
+    """
+
+    def __init__(self, fn, *args, stage="job", token=None,
+                 pass_token=False, pass_progress=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.stage = stage
+        self.token = token or CancelToken()
+        self.pass_token = pass_token
+        self.pass_progress = pass_progress
+        self.signals = WorkerSignals()
+
+    def run(self):
+        if self.token.cancelled:
+            self.signals.finished.emit()
+            return
+        kwargs = dict(self.kwargs)
+        if self.pass_token:
+            kwargs["token"] = self.token
+        if self.pass_progress:
+            kwargs["progress"] = self.signals.progress.emit
+        try:
+            result = self.fn(*self.args, **kwargs)
+        except Exception as e:
+            if not self.token.cancelled:
+                self.signals.error.emit(e)
+        else:
+            if not self.token.cancelled:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class JobPipeline(QObject):
+    """
+    Submits pipeline stages (capture -> OCR -> AI) to a QThreadPool and keeps
+    track of the in-flight ones so a new capture or a mode switch can cancel
+    everything belonging to the previous job.
+    Callbacks always run on the GUI thread (queued signal delivery) and are
+    skipped if the job was cancelled in the meantime.
+    """
+
+    def __init__(self, pool=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._workers = set()
+        self._token = CancelToken()
+
+    @property
+    def token(self) -> CancelToken:
+        return self._token
+
+    def new_job(self) -> CancelToken:
+        """Cancel everything in flight and start a fresh job token."""
+        self.cancel_all()
+        self._token = CancelToken()
+        return self._token
+
+    def cancel_all(self):
+        self._token.cancel()
+        for worker in list(self._workers):
+            worker.token.cancel()
+
+    def submit(self, fn, *args, stage="job", on_result=None, on_error=None,
+               on_progress=None, token=None, pass_token=False, **kwargs) -> Worker:
+        token = token or self._token
+        worker = Worker(fn, *args, stage=stage, token=token, pass_token=pass_token,
+                        pass_progress=on_progress is not None, **kwargs)
+
+        if on_result:
+            worker.signals.result.connect(lambda r: token.cancelled or on_result(r))
+        if on_error:
+            worker.signals.error.connect(lambda e: token.cancelled or on_error(e))
+        if on_progress:
+            worker.signals.progress.connect(lambda p: token.cancelled or on_progress(p))
+        worker.signals.finished.connect(lambda: self._workers.discard(worker))
+
+        self._workers.add(worker)
+        self.pool.start(worker)
+        return worker
+
+    def active_count(self) -> int:
+        return len(self._workers)
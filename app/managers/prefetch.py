@@ -0,0 +1,159 @@
+import threading
+
+from PyQt5.QtCore import QObject
+
+from app.managers.job_pipeline import JobPipeline
+from app.backend.ai.ai_client import ask_solution, ask_hint, build_prompt, cached_answer
+from app.backend.ai.tokens import estimate_tokens
+
+
+class PrefetchStats:
+    """Counters to weigh the prefetch hit rate against the extra token spend."""
+
+    def __init__(self):
+        self.issued = 0
+        self.hits = 0           # switch served from a finished prefetch
+        self.hits_in_flight = 0 # switch attached to a prefetch still running
+        self.misses = 0         # switch with no matching prefetch
+        self.wasted = 0         # prefetches discarded without being used
+        self.tokens_spent = 0
+        self.tokens_wasted = 0
+
+    @property
+    def hit_rate(self) -> float:
+        used = self.hits + self.hits_in_flight
+        total = used + self.misses + self.wasted
+        return used / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "issued": self.issued,
+            "hits": self.hits,
+            "hits_in_flight": self.hits_in_flight,
+            "misses": self.misses,
+            "wasted": self.wasted,
+            "hit_rate": round(self.hit_rate, 3),
+            "tokens_spent": self.tokens_spent,
+            "tokens_wasted": self.tokens_wasted,
+        }
+
+
+def _prefetch_stage(question, mode, on_spent):
+    """
+    Returns the answer. on_spent(estimated tokens) is called from the worker
+    as soon as the request is done, even if the prefetch has been cancelled
+    meanwhile (its result is dropped, but the tokens were still spent).
+    Cached answers cost nothing.
+    """
+    cached = cached_answer(question, mode)
+    if cached is not None:
+        return cached
+    ask = ask_solution if mode == "solve" else ask_hint
+    answer = ask(question)
+    on_spent(estimate_tokens(build_prompt(question, mode)) + estimate_tokens(answer))
+    return answer
+
+
+class SpeculativePrefetcher(QObject):
+    """
+    Holds one per-question slot with the alternate-mode answer, requested in
+    the background while the primary answer is being shown. Runs on its own
+    JobPipeline so handle_switch cancelling the main job doesn't kill it.
+    """
+
+    def __init__(self, enabled=False, parent=None):
+        super().__init__(parent)
+        self.enabled = enabled
+        self.stats = PrefetchStats()
+        self.pipeline = JobPipeline(parent=self)
+        self._slot = None
+        # Token counts arrive from worker threads
+        self._lock = threading.Lock()
+
+    def prefetch(self, question, mode):
+        if not self.enabled:
+            return
+        self.discard()
+        token = self.pipeline.new_job()
+        self._slot = slot = {
+            "question": question, "mode": mode, "token": token,
+            "done": False, "answer": None, "error": None, "tokens": 0,
+            "used": False, "discarded": False, "waiters": [],
+        }
+        self.stats.issued += 1
+        self.pipeline.submit(
+            _prefetch_stage, question, mode,
+            stage="prefetch",
+            on_spent=lambda tokens: self._on_spent(slot, tokens),
+            on_result=lambda r: self._on_done(slot, r),
+            on_error=lambda e: self._on_error(slot, e),
+        )
+
+    def take(self, question, mode, on_result, on_error, token=None) -> bool:
+        """
+        Serves a switch from the slot. Returns False on a miss; otherwise
+        on_result/on_error fire now or when the prefetch lands (skipped if
+        `token` was cancelled by then).
+        """
+        slot = self._slot
+        if slot and slot["question"] == question and slot["mode"] != mode:
+            # Switching back to the primary mode; nothing was speculated for it
+            return False
+        if (not slot or slot["question"] != question or slot["mode"] != mode
+                or slot["token"].cancelled or slot["error"] is not None):
+            if self.enabled:
+                self.stats.misses += 1
+            return False
+
+        slot["used"] = True
+        if slot["done"]:
+            self.stats.hits += 1
+            self._deliver(slot, on_result, on_error, token)
+        else:
+            self.stats.hits_in_flight += 1
+            slot["waiters"].append((on_result, on_error, token))
+        return True
+
+    def discard(self):
+        """Cancel unused speculation (new capture / new question)."""
+        slot = self._slot
+        if slot and not slot["used"]:
+            with self._lock:
+                slot["discarded"] = True
+                self.stats.wasted += 1
+                # Spent already if it finished; otherwise _on_spent counts it later
+                self.stats.tokens_wasted += slot["tokens"]
+        self.pipeline.cancel_all()
+        self._slot = None
+
+    def _on_spent(self, slot, tokens):
+        # Worker thread, cancelled or not
+        with self._lock:
+            slot["tokens"] = tokens
+            self.stats.tokens_spent += tokens
+            if slot["discarded"]:
+                self.stats.tokens_wasted += tokens
+
+    def _on_done(self, slot, answer):
+        slot["answer"] = answer
+        slot["done"] = True
+        self._flush_waiters(slot)
+
+    def _on_error(self, slot, error):
+        slot["error"] = error
+        slot["done"] = True
+        self._flush_waiters(slot)
+
+    def _flush_waiters(self, slot):
+        waiters, slot["waiters"] = slot["waiters"], []
+        for on_result, on_error, token in waiters:
+            self._deliver(slot, on_result, on_error, token)
+
+    @staticmethod
+    def _deliver(slot, on_result, on_error, token):
+        if token is not None and token.cancelled:
+            return
+        if slot["error"] is not None:
+            on_error(slot["error"])
+        else:
+            on_result(slot["answer"])
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+
+from PIL import Image
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from app.managers.screen_capture import capture_region
+from app.config import WATCH_INTERVAL_MS, WATCH_IDLE_INTERVAL_MS, WATCH_SETTLE_POLLS, WATCH_CHANGE_RATIO
+
+log = logging.getLogger(__name__)
+
+# Frames are compared as small grayscale thumbnails: cheap to diff, and
+# blind to antialiasing / cursor-blink noise
+THUMB_WIDTH = 128
+# A thumbnail pixel counts as changed above this gray-level difference
+PIXEL_THRESHOLD = 24
+# After this many quiet polls the interval starts stretching towards the idle rate
+IDLE_AFTER_POLLS = 10
+
+
+def thumbnail(image):
+    # numpy is only needed once watch mode starts; keep it out of app startup
+    import numpy as np
+    gray = image.convert("L")
+    w, h = gray.size
+    height = max(1, round(h * THUMB_WIDTH / max(1, w)))
+    return np.asarray(gray.resize((THUMB_WIDTH, height), Image.BILINEAR), dtype=np.int16)
+
+
+def changed_ratio(a, b) -> float:
+    """Fraction of thumbnail pixels that differ noticeably (1.0 if shapes differ)."""
+    if a is None or b is None or a.shape != b.shape:
+        return 1.0
+    import numpy as np
+    return float(np.count_nonzero(np.abs(a - b) > PIXEL_THRESHOLD)) / a.size
+
+
+class RegionWatcher(QObject):
+    """
+    Polls a pinned screen region on a background thread and emits `changed`
+    with the region image once new content has appeared *and* stopped moving
+    (WATCH_SETTLE_POLLS identical polls), so page transitions and typing
+    don't trigger OCR/AI calls. While nothing changes the poll interval
+    backs off to WATCH_IDLE_INTERVAL_MS; the thread sleeps in Event.wait(),
+    so an idle watcher costs one small grab + a 128px diff per poll.
+    """
+
+    changed = pyqtSignal(object)
+    error = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bbox = None
+        self.scale = 1.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.triggers = 0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, bbox, scale=1.0):
+        """
+        bbox: (x1, y1, x2, y2) in screenshot pixels, the space the snip is cropped in.
+        scale: screenshot pixels per screen point, see capture_region().
+        """
+        self.stop()
+        self.bbox = tuple(int(v) for v in bbox)
+        self.scale = scale
+        self.polls = 0
+        self.triggers = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+        log.info(f"Watching region {self.bbox}")
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join(timeout=2)
+            self._thread = None
+            log.info(f"Stopped watching ({self.triggers} changes in {self.polls} polls)")
+
+    def _run(self, stop):
+        emitted = None   # thumbnail of the last content handed to OCR
+        previous = None  # thumbnail of the previous poll
+        settled = 0      # consecutive polls without movement
+        quiet = 0        # consecutive polls with nothing new at all
+        interval = WATCH_INTERVAL_MS
+
+        while not stop.is_set():
+            try:
+                image = capture_region(self.bbox, self.scale)
+                thumb = thumbnail(image)
+            except Exception as e:
+                self.error.emit(e)
+                stop.wait(WATCH_IDLE_INTERVAL_MS / 1000)
+                continue
+            self.polls += 1
+
+            moving = changed_ratio(thumb, previous) > WATCH_CHANGE_RATIO
+            settled = 0 if moving else settled + 1
+            previous = thumb
+
+            if changed_ratio(thumb, emitted) > WATCH_CHANGE_RATIO:
+                quiet = 0
+                interval = WATCH_INTERVAL_MS
+                # Debounce: only fire once the new content has stopped changing
+                if settled >= WATCH_SETTLE_POLLS and not stop.is_set():
+                    emitted = thumb
+                    self.triggers += 1
+                    self.changed.emit(image)
+            else:
+                quiet += 1
+                if quiet > IDLE_AFTER_POLLS:
+                    interval = min(WATCH_IDLE_INTERVAL_MS, interval * 1.5)
+
+            stop.wait(interval / 1000)
@@ -1,3 +1,5 @@
+import sys
+
 from PIL import ImageGrab
 
 
@@ -7,3 +9,16 @@ def capture_screen(bbox=None):
     bbox: (x1, y1, x2, y2)
     """
     return ImageGrab.grab(bbox=bbox)
+
+
+def capture_region(box, scale=1.0):
+    """
+    Captures only a region given in screenshot pixels, i.e. in the same
+    space as a crop of capture_screen(). On macOS ImageGrab's bbox is in
+    points, so the box is divided by the backing scale (2.0 on Retina);
+    screencapture still returns the region at full pixel resolution.
+    box: (x1, y1, x2, y2)
+    """
+    if sys.platform == "darwin" and scale != 1.0:
+        box = tuple(round(v / scale) for v in box)
+    return ImageGrab.grab(bbox=box)
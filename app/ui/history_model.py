@@ -0,0 +1,61 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Sidebar model over HistoryManager. Rows are fetched a page at a time as
+    the view scrolls (canFetchMore/fetchMore), newest first, and filtered by
+    the search box through HistoryManager.search().
+    """
+
+    PAGE_SIZE = 50
+    RowRole = Qt.UserRole + 1
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self._rows = []
+        self._filter = ""
+        self._has_more = True
+
+    # --- Qt model API ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return row["question"]
+        if role == self.RowRole:
+            return row
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        page = self.history.search(self._filter, offset=len(self._rows), limit=self.PAGE_SIZE)
+        self._has_more = len(page) == self.PAGE_SIZE
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    # --- ScreenTutor API ---
+    def set_filter(self, text):
+        self.beginResetModel()
+        self._filter = text.strip()
+        self._rows = []
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def refresh(self):
+        """Reload from the first page, e.g. after a new question was saved."""
+        self.set_filter(self._filter)
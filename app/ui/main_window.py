@@ -1,7 +1,8 @@
+import logging
 import sys
-import io
 import os
 import json
+import time
 from PyQt5.QtWidgets import (
     QApplication,
     QWidget,
@@ -12,20 +13,41 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QFrame,
     QComboBox,
-    QListWidget,
+    QLineEdit,
+    QListView,
     QStackedWidget,
     QSplitter,
     QGraphicsDropShadowEffect,
+    QShortcut,
     QSizeGrip
 )
-from PyQt5.QtCore import Qt, QRect, pyqtSignal, QPoint, QSize, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QPainter, QColor, QPen, QPixmap, QImage, QFont, QCursor
+from PyQt5.QtCore import Qt, QObject, QRect, pyqtSignal, QPoint, QSize, QTimer, QPropertyAnimation, QEasingCurve
+from PyQt5.QtGui import QPainter, QColor, QPen, QPixmap, QImage, QFont, QCursor, QTextCursor, QKeySequence
 
 from app.managers.screen_capture import capture_screen
-from app.backend.ocr.ocr_engine import extract_text
-from app.backend.ai.ai_client import ask_solution, ask_hint, generate_practice_questions
-from app.backend.memory.question_memory import QuestionMemory
+from app.managers.job_pipeline import JobPipeline
+from app.managers.prefetch import SpeculativePrefetcher
+from app.managers.hotkey import GlobalHotkey, to_qt_sequence
+from app.managers.region_watcher import RegionWatcher
+from app.backend.pipeline import read_image, answer_questions
+from app.backend.export import export_history
+from app.backend.tracing import tracer, configure_logging
+from app.ui.history_model import HistoryListModel
+from app.ui.qt_image import pil_to_qimage, qimage_to_qpixmap
+from app.backend.ai.ai_client import (
+    ask_solution, ask_hint, generate_practice_questions, generate_practice_questions_sharded,
+    answer_cache, collect_stream
+)
+from app.config import (
+    STREAM_RESPONSES, SPECULATIVE_PREFETCH, PRACTICE_CONTEXT_CANDIDATES, PRACTICE_COUNT, PRACTICE_SHARD_SIZE,
+    CAPTURE_HIDE_GRACE_MS, CAPTURE_HIDE_TIMEOUT_MS, CAPTURE_HOTKEY, HOTKEY_MODE, GLOBAL_HOTKEY, WATCH_MODE, TRACE_OVERLAY, WARM_UP,
+    CAPTURE_STORE, EXPORT_FORMAT, EXPORT_DIR, EXPORT_INCREMENTAL
+)
 from app.backend.memory.history_manager import HistoryManager
+from app.backend.memory.capture_store import CaptureStore
+from app.backend.memory.question_memory import normalize_question
+
+log = logging.getLogger(__name__)
 
 # --- ULTRA-PREMIUM THEMES (CUSTOM PALETTE) ---
 # Dark Mode: 08090A (BG), F4F7F5 (Text), A7A2A9 (Accent)
@@ -50,15 +72,18 @@ QTextEdit {
     line-height: 1.6;
 }
 
-QListWidget { background-color: transparent; border: none; color: #F4F7F5; }
-QListWidget::item { padding: 12px; border-radius: 14px; margin-bottom: 6px; background-color: #08090A; border: 1px solid #A7A2A9; }
-QListWidget::item:selected { background-color: #A7A2A9; color: #08090A; font-weight: 800; }
+QListView { background-color: transparent; border: none; color: #F4F7F5; }
+QListView::item { padding: 12px; border-radius: 14px; margin-bottom: 6px; background-color: #08090A; border: 1px solid #A7A2A9; }
+QListView::item:selected { background-color: #A7A2A9; color: #08090A; font-weight: 800; }
+QLineEdit#searchBox { background-color: #08090A; border: 1px solid #A7A2A9; border-radius: 12px; color: #F4F7F5; padding: 8px 12px; font-family: 'Bungee'; font-size: 12px; }
 
 QPushButton { font-family: 'Bungee'; height: 48px; border-radius: 14px; font-weight: 800; font-size: 13px; border: none; color: #F4F7F5; background-color: #A7A2A9; }
 QPushButton#ctrlBtn { background: transparent; color: #A7A2A9; font-size: 22px; }
 QPushButton#solveBtn { background-color: #A7A2A9; color: #08090A; }
 QPushButton#hintBtn { background-color: transparent; border: 1px solid #A7A2A9; color: #F4F7F5; }
 QPushButton#practiceBtn { background-color: transparent; border: 1px solid #A7A2A9; color: #F4F7F5; }
+QComboBox#questionPicker { background-color: transparent; border: 1px solid #A7A2A9; border-radius: 10px; padding: 6px; color: #F4F7F5; }
+QPushButton#watchBtn { background-color: transparent; border: 1px dashed #A7A2A9; color: #F4F7F5; }
 QPushButton#exportBtn { background-color: #A7A2A9; color: #08090A; }
 
 QPushButton#themeBtn, QPushButton#toggleBtn { background: transparent; color: #F4F7F5; border-radius: 12px; border: 1px solid #A7A2A9; }
@@ -86,30 +111,54 @@ QTextEdit {
     font-size: 14px;
 }
 
-QListWidget { background-color: transparent; border: none; color: #333333; }
-QListWidget::item { padding: 12px; border-radius: 14px; margin-bottom: 6px; background-color: #D0DCD4; }
-QListWidget::item:selected { background-color: #D7D5D8; color: #333333; font-weight: 800; }
+QListView { background-color: transparent; border: none; color: #333333; }
+QListView::item { padding: 12px; border-radius: 14px; margin-bottom: 6px; background-color: #D0DCD4; }
+QListView::item:selected { background-color: #D7D5D8; color: #333333; font-weight: 800; }
+QLineEdit#searchBox { background-color: #FFFFFF; border: 2px solid #D7D5D8; border-radius: 12px; color: #333333; padding: 8px 12px; font-family: 'Bungee'; font-size: 12px; }
 
 QPushButton { font-family: 'Bungee'; height: 48px; border-radius: 14px; font-weight: 800; font-size: 13px; color: #333333; border: none; background-color: #D7D5D8; }
 QPushButton#solveBtn { background-color: #D7D5D8; }
 QPushButton#hintBtn { background-color: #D0DCD4; }
+QPushButton#watchBtn { background-color: transparent; border: 2px dashed #D7D5D8; }
+QComboBox#questionPicker { background: white; border: 2px solid #D7D5D8; border-radius: 10px; padding: 6px; color: #333333; }
 QPushButton#themeBtn, QPushButton#toggleBtn { background: white; color: #333333; border: 2px solid #D7D5D8; border-radius: 12px; }
 QPushButton#switchBtn { background: transparent; color: #888888; text-decoration: underline; font-weight: bold; }
 """
 
 class SnippingWidget(QWidget):
     snippet_captured = pyqtSignal(tuple)
+    cancelled = pyqtSignal()
+    shown = pyqtSignal()
 
-    def __init__(self, background_pixmap):
+    def __init__(self, background_pixmap=None):
         super().__init__()
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
         self.setCursor(Qt.CrossCursor)
-        self.background_pixmap = background_pixmap
+        self.background_pixmap = background_pixmap or QPixmap()
         screen_geo = QApplication.primaryScreen().geometry()
         self.setGeometry(screen_geo)
         self.start_pos = None
         self.end_pos = None
 
+    def set_background(self, pixmap):
+        """Reuse the overlay for a new capture: swap the screenshot, reset the selection."""
+        self.background_pixmap = pixmap
+        self.start_pos = None
+        self.end_pos = None
+        self.setGeometry(QApplication.primaryScreen().geometry())
+        self.update()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.activateWindow()
+        self.raise_()
+        self.shown.emit()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.hide()
+            self.cancelled.emit()
+
     def mousePressEvent(self, event):
         self.start_pos = event.pos()
         self.update()
@@ -124,13 +173,13 @@ class SnippingWidget(QWidget):
             y1 = min(self.start_pos.y(), self.end_pos.y())
             x2 = max(self.start_pos.x(), self.end_pos.x())
             y2 = max(self.start_pos.y(), self.end_pos.y())
-            print(f"DEBUG: Snipping finished. Region: ({x1},{y1}) to ({x2},{y2})")
+            # Hide rather than close: the overlay is reused for the next capture
+            self.hide()
             if x2 - x1 > 5 and y2 - y1 > 5:
-                print("DEBUG: Emitting snippet_captured signal")
                 self.snippet_captured.emit((x1, y1, x2, y2))
-            else:
-                print("DEBUG: Selection too small, ignoring.")
-        self.close()
+                return
+        self.hide()
+        self.cancelled.emit()
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -156,7 +205,61 @@ class SnippingWidget(QWidget):
             painter.drawRect(selection_rect)
 
 
+class StreamBuffer(QObject):
+    """
+    Coalesces streamed chunks into one QTextEdit update per frame instead
+    of re-laying-out the document on every token.
+    """
+
+    FLUSH_MS = 40
+
+    def __init__(self, text_edit, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self._pending = []
+        self._header = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def begin(self, header=""):
+        """Start a new stream; the header replaces the box content on the first chunk."""
+        self._timer.stop()
+        self._pending = []
+        self._header = header
+
+    def push(self, chunk):
+        self._pending.append(chunk)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        if self._header is not None:
+            self.text_edit.setPlainText(self._header + text)
+            self._header = None
+        else:
+            # Append at the end of the document without moving the user's cursor
+            cursor = QTextCursor(self.text_edit.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+
+    def finish(self):
+        self._timer.stop()
+        self.flush()
+        if self._header is not None:
+            # Stream ended without any text
+            self.text_edit.setPlainText(self._header)
+            self._header = None
+
+
 class MainWindow(QWidget):
+    first_painted = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setObjectName("MainWindow")
@@ -171,12 +274,56 @@ class MainWindow(QWidget):
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setMouseTracking(True)
 
-        self.memory = QuestionMemory()
+        self.memory = answer_cache
         self.history = HistoryManager()
+        # Crops by content hash, written off the capture path; history rows link to them
+        self.captures = CaptureStore() if CAPTURE_STORE else None
+        self.pipeline = JobPipeline(parent=self)
+        self.prefetcher = SpeculativePrefetcher(enabled=SPECULATIVE_PREFETCH, parent=self)
         self.last_question = None
         self.current_mode = None
+        # Multi-question captures: segmented questions and their answers so far
+        self.questions = []
+        self.question_answers = {}
+        # Exports get their own pipeline (like the prefetcher), so the
+        # new_job() of a capture or mode switch never cancels them
+        self.export_pipeline = JobPipeline(parent=self)
+        self._export_token = None
         
         self.setup_ui()
+        self.stream = StreamBuffer(self.output_box, parent=self)
+
+        # Low-latency capture: one overlay built up front and reused
+        self.snipper = SnippingWidget()
+        self.snipper.snippet_captured.connect(self._on_snippet)
+        self.snipper.shown.connect(self._on_snipper_shown)
+        self.snipper.cancelled.connect(self._on_snip_cancelled)
+        self.pil_img = None
+        self._capture_mode = "solve"
+        self._pending_capture = None
+        # Bumped by every start_capture(); timers from an older capture check it and bail
+        self._capture_id = 0
+        self._visibility_hooked = False
+        self._painted = False
+        self.last_capture_latency_ms = None
+
+        # Tracing: the run in progress and its open spans (see app/backend/tracing.py)
+        self.trace = None
+        self._spans = {}
+
+        # Capture entry points besides the buttons: in-app shortcut + optional system-wide hotkey.
+        # Both listen for the same keys, so the shortcut is switched off once the hotkey is up
+        self.capture_shortcut = QShortcut(QKeySequence(to_qt_sequence(CAPTURE_HOTKEY)), self)
+        self.capture_shortcut.activated.connect(lambda: self.start_capture(HOTKEY_MODE))
+        self.global_hotkey = GlobalHotkey(CAPTURE_HOTKEY, parent=self)
+        self.global_hotkey.triggered.connect(lambda: self.start_capture(HOTKEY_MODE))
+        # (started after the first paint, see _after_first_paint)
+
+        # Watch mode: re-run OCR + AI whenever the pinned region changes
+        self.watcher = RegionWatcher(parent=self)
+        self.watcher.changed.connect(self._on_watch_change)
+        self.watcher.error.connect(lambda e: log.warning(f"Watch capture failed: {e}"))
+        self._watch_last_text = None
 
     def setup_ui(self):
         # Master layout for the top-level window
@@ -202,15 +349,25 @@ class MainWindow(QWidget):
         side_title.setObjectName("statusLabel")
         sidebar_layout.addWidget(side_title)
         
-        self.history_list = QListWidget()
+        self.search_box = QLineEdit()
+        self.search_box.setObjectName("searchBox")
+        self.search_box.setPlaceholderText("Search history...")
+        self.search_box.setClearButtonEnabled(True)
+        sidebar_layout.addWidget(self.search_box)
+
+        # Paged model: rows are pulled from SQLite as the list scrolls
+        self.history_model = HistoryListModel(self.history, parent=self)
+        self.search_box.textChanged.connect(self.history_model.set_filter)
+
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
         self.history_list.setWordWrap(True) # Enable multi-line text
         self.history_list.setTextElideMode(Qt.ElideNone) # Don't cut off with ...
-        self.history_list.itemClicked.connect(self.load_from_history)
+        self.history_list.setLayoutMode(QListView.Batched)
+        self.history_list.clicked.connect(self.load_from_history)
         self.history_list.setCursor(Qt.PointingHandCursor)
         sidebar_layout.addWidget(self.history_list)
-        
-        for q in self.history.get_all_questions()[-15:]:
-            self.history_list.addItem(q) # Show full question
+        self.history_model.fetchMore()
             
         main_layout.addWidget(self.sidebar)
 
@@ -265,6 +422,13 @@ class MainWindow(QWidget):
         header.addLayout(controls)
         layout.addLayout(header)
 
+        # Shown when a capture holds several questions
+        self.question_picker = QComboBox()
+        self.question_picker.setObjectName("questionPicker")
+        self.question_picker.setVisible(False)
+        self.question_picker.activated.connect(self._on_question_picked)
+        layout.addWidget(self.question_picker)
+
         # Output Area
         self.output_box = QTextEdit()
         self.output_box.setPlaceholderText("Capture a question to begin...")
@@ -293,14 +457,18 @@ class MainWindow(QWidget):
         self.practice_btn.setObjectName("practiceBtn")
         self.practice_btn.clicked.connect(self.handle_generate_practice)
         
-        self.export_btn = QPushButton("EXPORT PDF/TXT")
+        self.export_btn = QPushButton(f"EXPORT {EXPORT_FORMAT.upper()}")
         self.export_btn.setObjectName("exportBtn")
         self.export_btn.clicked.connect(self.handle_export)
-        self.export_btn.setEnabled(False)
         
         row2.addWidget(self.practice_btn)
         row2.addWidget(self.export_btn)
         btn_grid.addLayout(row2)
+
+        self.watch_btn = QPushButton("WATCH REGION")
+        self.watch_btn.setObjectName("watchBtn")
+        self.watch_btn.clicked.connect(self.toggle_watch)
+        btn_grid.addWidget(self.watch_btn)
         
         layout.addLayout(btn_grid)
 
@@ -334,12 +502,13 @@ class MainWindow(QWidget):
         self.setStyleSheet(DARK_THEME if self.is_dark else LIGHT_THEME)
         self.theme_btn.setText("🌞" if self.is_dark else "🌙")
 
-    def load_from_history(self, item):
-        q = item.text()
+    def load_from_history(self, index):
+        q = index.data()
         if q:
             self.output_box.setText(q)
             self.output_box.setReadOnly(False)
             self.last_question = q
+            self.question_picker.setVisible(False)
             self.status_label.setText("DATA RETRIEVED")
 
     def mousePressEvent(self, event):
@@ -394,142 +563,559 @@ class MainWindow(QWidget):
         return edge if edge else None
 
     def handle_generate_practice(self):
-        history_list = self.history.get_all_questions()
+        # select_context() only looks at the newest candidates anyway
+        history_list = self.history.get_recent_questions(PRACTICE_CONTEXT_CANDIDATES)
         if not history_list:
             self.output_box.setText("Please capture questions first to build your profile.")
             return
         self.status_label.setText("GENERATING INTELLIGENT SET...")
         self.output_box.setText("Syncing with AI...")
-        
-        QTimer.singleShot(100, self._async_gen_practice)
 
-    def _async_gen_practice(self):
-        try:
-            questions = generate_practice_questions(self.history.get_all_questions())
-            self.output_box.setReadOnly(False)
+        self.pipeline.new_job()
+        if PRACTICE_COUNT > PRACTICE_SHARD_SIZE:
+            # Large sets: concurrent shards, each merged batch appended as it lands
+            self.stream.begin()
+            self.pipeline.submit(
+                _sharded_practice_stage, history_list, PRACTICE_COUNT,
+                stage="practice",
+                pass_token=True,
+                on_progress=self.stream.push,
+                on_result=lambda q: self._on_practice_ready(q, streamed=True),
+                on_error=lambda e: self.output_box.setText(f"Process Error: {e}"),
+            )
+        elif STREAM_RESPONSES:
+            self.stream.begin()
+            self.pipeline.submit(
+                _stream_stage, generate_practice_questions, history_list, PRACTICE_COUNT,
+                stage="practice",
+                pass_token=True,
+                on_progress=self.stream.push,
+                on_result=self._on_practice_ready,
+                on_error=lambda e: self.output_box.setText(f"Process Error: {e}"),
+            )
+        else:
+            self.pipeline.submit(
+                generate_practice_questions, history_list, PRACTICE_COUNT,
+                stage="practice",
+                on_result=self._on_practice_ready,
+                on_error=lambda e: self.output_box.setText(f"Process Error: {e}"),
+            )
+
+    def _on_practice_ready(self, questions, streamed=STREAM_RESPONSES):
+        self.output_box.setReadOnly(False)
+        if streamed:
+            self.stream.finish()
+        else:
             self.output_box.setText(questions)
-            self.last_practice_set = questions
-            self.export_btn.setEnabled(True)
-            self.status_label.setText("GEN COMPLETE")
-        except Exception as e:
-            self.output_box.setText(f"Process Error: {e}")
+        if questions:
+            self.history.save_practice_set(questions)
+        self.status_label.setText("GEN COMPLETE")
 
     def handle_export(self):
-        if hasattr(self, "last_practice_set"):
-            path = os.path.join(os.path.expanduser("~/Desktop"), "ScreenTutor_Material.txt")
-            with open(path, "w") as f: f.write(self.last_practice_set)
-            self.status_label.setText(f"EXPORTED TO DESKTOP")
+        """Streams history (questions, answers, practice sets) to a file on a worker thread."""
+        if self._export_token:
+            return
+        since = self.history.last_export() if EXPORT_INCREMENTAL else 0.0
+        path = os.path.join(
+            os.path.expanduser(EXPORT_DIR), f"ScreenTutor_{time.strftime('%Y%m%d-%H%M%S')}.{EXPORT_FORMAT}"
+        )
+        self.export_btn.setEnabled(False)
+        self.status_label.setText("EXPORTING...")
+        self._export_token = self.export_pipeline.new_job()
+        self.export_pipeline.submit(
+            _export_stage, self.history, path, since,
+            stage="export",
+            token=self._export_token,
+            pass_token=True,
+            on_progress=lambda p: self.status_label.setText(f"EXPORTING {p[0]}/{p[1]}..."),
+            on_result=self._on_export_done,
+            on_error=self._on_export_error,
+        )
+
+    def _on_export_done(self, result):
+        self._export_token = None
+        self.export_btn.setEnabled(True)
+        if not result["entries"]:
+            self.status_label.setText("NOTHING NEW TO EXPORT")
+            return
+        log.info(f"Exported {result['entries']} entries to {result['path']} "
+                 f"({result['bytes'] / 1024:.0f} KB, {result['elapsed_s']}s)")
+        self.status_label.setText(f"EXPORTED {result['entries']} ENTRIES TO {os.path.basename(result['path'])}")
+
+    def _on_export_error(self, e):
+        self._export_token = None
+        self.export_btn.setEnabled(True)
+        self.status_label.setText(f"EXPORT FAILED: {e}")
 
     def start_capture(self, mode):
-        self.setWindowOpacity(0.0)
-        QApplication.processEvents()
-        QTimer.singleShot(250, lambda: self._do_capture(mode))
-
-    def _do_capture(self, mode):
-        print(f"DEBUG: Starting capture for mode: {mode}")
-        # Capture the screen as a PIL image
-        self.pil_img = capture_screen()
-        print(f"DEBUG: PIL Image captured: {self.pil_img.size}")
-        self.setWindowOpacity(1.0)
-        
-        # Convert PIL image to QPixmap for the snipper
-        buffer = io.BytesIO()
-        self.pil_img.save(buffer, format="PNG")
-        q_img = QImage.fromData(buffer.getvalue())
-        pixmap = QPixmap.fromImage(q_img)
-        
-        self.snipper = SnippingWidget(pixmap)
-        # Connect the signal correctly with debug prints
-        print(f"DEBUG: Showing snipper for mode: {mode}")
-        self.snipper.snippet_captured.connect(lambda bbox: self.process_capture(bbox, mode, self.pil_img))
+        # A new capture supersedes whatever OCR/AI work is still running
+        self.pipeline.new_job()
+        self.prefetcher.discard()
+        self._capture_mode = mode
+        self._capture_id += 1
+        capture_id = self._capture_id
+        self.trace = tracer.trace("capture", mode=mode)
+        self._spans = {}
+
+        if not self.isVisible() or self.isMinimized():
+            # Already out of the way (e.g. global hotkey while minimized)
+            self._do_capture(mode)
+            return
+        # Grab as soon as the window system confirms the window is gone,
+        # see _on_visibility_changed, instead of sleeping a fixed delay
+        self._pending_capture = mode
+        self._spans["hide"] = self.trace.start("hide")
+        self.hide()
+        # Safety net for platforms that never report the visibility change
+        QTimer.singleShot(CAPTURE_HIDE_TIMEOUT_MS, lambda: self._on_hide_timeout(capture_id))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._visibility_hooked and self.windowHandle():
+            self.windowHandle().visibleChanged.connect(self._on_visibility_changed)
+            self._visibility_hooked = True
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
+            # Deferred until the window is on screen, so nothing heavy delays it
+            QTimer.singleShot(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        if GLOBAL_HOTKEY and self.global_hotkey.start():
+            self.capture_shortcut.setEnabled(False)
+        if WARM_UP:
+            self.pipeline.submit(
+                _warm_up_stage,
+                stage="warm_up",
+                on_error=lambda e: log.warning(f"Warm-up failed: {e}"),
+            )
+
+    def _on_visibility_changed(self, visible):
+        if visible or not self._pending_capture:
+            return
+        mode, self._pending_capture = self._pending_capture, None
+        capture_id = self._capture_id
+        # One compositor frame so the hidden window is really off the screen
+        QTimer.singleShot(CAPTURE_HIDE_GRACE_MS, lambda: self._do_capture(mode, capture_id))
+
+    def _on_hide_timeout(self, capture_id):
+        if capture_id == self._capture_id:
+            self._on_visibility_changed(False)
+
+    def _do_capture(self, mode, capture_id=None):
+        if capture_id is not None and capture_id != self._capture_id:
+            return  # superseded by a newer capture during the grace period
+        self._end_span("hide")
+        self.status_label.setText("CAPTURING SCREEN...")
+        # Grab and wrap the pixels off the GUI thread (QImage is thread-safe,
+        # QPixmap is not); the overlay is shown once they arrive
+        self.pipeline.submit(
+            _capture_stage, self.trace,
+            stage="capture",
+            on_result=lambda r: self._show_snipper(*r, mode),
+            on_error=self._on_capture_error,
+        )
+
+    def _show_snipper(self, pil_img, q_img, mode):
+        self.pil_img = pil_img
+        self.show()
+
+        with self.trace.span("pixmap", size=pil_img.size):
+            self.snipper.set_background(qimage_to_qpixmap(q_img))
+        self._spans["show"] = self.trace.start("show")
         self.snipper.show()
 
+    def _on_snipper_shown(self):
+        show = self._end_span("show")
+        if not show:
+            return
+        total_ms = (time.perf_counter() - self.trace.started) * 1000
+        self.last_capture_latency_ms = total_ms
+        self.status_label.setText(f"SELECT REGION ({total_ms:.0f} MS)")
+        # Time the user spends selecting, kept apart from the app's own latency
+        self._spans["snip"] = self.trace.start("snip_wait")
+
+    def _on_snip_cancelled(self):
+        self._end_span("snip", cancelled=True)
+        self._finish_trace("CAPTURE CANCELLED")
+
+    def _on_snippet(self, bbox):
+        self._end_span("snip", region=bbox)
+        if self._capture_mode == "watch":
+            self.start_watch(bbox, self.pil_img)
+        else:
+            self.process_capture(bbox, self._capture_mode, self.pil_img)
+
+    def _to_image_box(self, bbox, full_img):
+        """Snipper (logical) coordinates -> screenshot pixel coordinates."""
+        # Determine effective DPR
+        screen_geo = QApplication.primaryScreen().geometry()
+        img_w, img_h = full_img.size
+        dpr_x = img_w / screen_geo.width()
+        dpr_y = img_h / screen_geo.height()
+
+        x1, y1, x2, y2 = bbox
+        return (
+            int(x1 * dpr_x),
+            int(y1 * dpr_y),
+            int(x2 * dpr_x),
+            int(y2 * dpr_y)
+        )
+
     def process_capture(self, bbox, mode, full_img):
+        self.trace = self.trace or tracer.trace("capture", mode=mode)
         try:
-            print(f"DEBUG: Processing capture. BBox: {bbox}")
             self.status_label.setText("EXTRACTING TEXT...")
             self.output_box.setText("Reading selection...")
-            QApplication.processEvents() # Force UI update
-            
-            # Determine effective DPR
-            screen_geo = QApplication.primaryScreen().geometry()
-            img_w, img_h = full_img.size
-            dpr_x = img_w / screen_geo.width()
-            dpr_y = img_h / screen_geo.height()
-            print(f"DEBUG: Screen geo: {screen_geo.width()}x{screen_geo.height()}, PIL size: {img_w}x{img_h}, DPR: {dpr_x},{dpr_y}")
-            
-            x1, y1, x2, y2 = bbox
-            crop = full_img.crop((
-                int(x1 * dpr_x), 
-                int(y1 * dpr_y), 
-                int(x2 * dpr_x), 
-                int(y2 * dpr_y)
-            ))
-            
-            # Save for debugging to a reliable location
-            if getattr(sys, 'frozen', False):
-                base_dir = os.path.expanduser("~/Library/Application Support/ScreenTutor")
-            else:
-                # Use project root during development
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            
-            data_dir = os.path.join(base_dir, "Data")
-            os.makedirs(data_dir, exist_ok=True)
-            debug_path = os.path.join(data_dir, "last_crop.png")
-            
-            crop.save(debug_path)
-            print(f"DEBUG: Saved crop to {debug_path}")
-            
-            text = extract_text(crop).strip()
-            print(f"DEBUG: OCR result: '{text[:50]}...'")
-            
-            if text:
-                self.output_box.setReadOnly(False)
-                self.output_box.setText(text)
-                self.status_label.setText("TEXT VALIDATED")
-                self.last_question = text
-                self.history.save_question(text, mode)
-                self.history_list.addItem(text)
-                self.get_ai_response(text, mode)
-            else:
-                self.output_box.setText("Scanner failed to detect characters. Try selecting a larger/clearer area.")
-                self.status_label.setText("SCAN FAILED")
-                print("DEBUG: No text detected by OCR.")
+
+            crop_box = self._to_image_box(bbox, full_img)
+
+            self.pipeline.submit(
+                _ocr_stage, full_img, crop_box, self.captures, self.trace,
+                stage="ocr",
+                on_result=lambda r: self._on_ocr_done(*r, mode),
+                on_error=self._on_capture_error,
+            )
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            self.output_box.setText(f"Capture Error: {e}")
-            self.status_label.setText("ERROR")
+            self._on_capture_error(e)
+
+    # --- Watch mode ---
+    def toggle_watch(self):
+        if self.watcher.active:
+            self.watcher.stop()
+            self.watch_btn.setText("WATCH REGION")
+            self.status_label.setText("WATCH STOPPED")
+        else:
+            # Reuse the snipper to pin the region; see _on_snippet
+            self.start_capture("watch")
 
-    def get_ai_response(self, question, mode):
+    def start_watch(self, bbox, full_img):
+        self._watch_last_text = None
+        scale = full_img.size[0] / QApplication.primaryScreen().geometry().width()
+        self.watcher.start(self._to_image_box(bbox, full_img), scale)
+        self.watch_btn.setText("STOP WATCHING")
+        self.status_label.setText("WATCHING REGION")
+
+    def _on_watch_change(self, image):
+        self.pipeline.new_job()
+        self.prefetcher.discard()
+        self.status_label.setText("REGION CHANGED, READING...")
+        self.trace = tracer.trace("watch", mode=WATCH_MODE)
+        self._spans = {}
+        self.pipeline.submit(
+            _ocr_stage, image, None, self.captures, self.trace,
+            stage="ocr",
+            on_result=self._on_watch_text,
+            on_error=self._on_capture_error,
+        )
+
+    def _on_watch_text(self, result):
+        text, questions, image_hash = result
+        # Pixels can change (scrolling, highlight) while the question stays the same
+        key = normalize_question(text)
+        if not key or key == self._watch_last_text:
+            # Recorded on the trace; the AI call is skipped
+            if self.trace:
+                self.trace.event("watch_unchanged", chars=len(text))
+            self._finish_trace("WATCHING REGION")
+            return
+        self._watch_last_text = key
+        self._on_ocr_done(text, questions, image_hash, WATCH_MODE)
+
+    def closeEvent(self, event):
+        if self.prefetcher.enabled:
+            log.info(f"Prefetch stats: {self.prefetcher.stats.as_dict()}")
+        self.watcher.stop()
+        self.global_hotkey.stop()
+        if self._export_token:
+            self._export_token.cancel()  # the stage removes its partial file
+        if self.captures:
+            self.captures.stop()  # finish writing queued crops
+        super().closeEvent(event)
+
+    def _on_ocr_done(self, text, questions, image_hash, mode):
+        self.question_picker.setVisible(False)
+        if len(questions) > 1:
+            self._on_questions_found(text, questions, mode, image_hash)
+            return
+        self.questions = []
+        if text:
+            self.output_box.setReadOnly(False)
+            self.output_box.setText(text)
+            self.status_label.setText("TEXT VALIDATED")
+            self.last_question = text
+            with self.trace.span("history"):
+                saved = self.history.save_question(text, mode, image_hash)
+            if saved:
+                self.history_model.refresh()
+            self.get_ai_response(text, mode, speculate=True, trace=self.trace)
+        else:
+            self.output_box.setText("Scanner failed to detect characters. Try selecting a larger/clearer area.")
+            self._finish_trace("SCAN FAILED")
+
+    # --- Multi-question captures ---
+    def _on_questions_found(self, text, questions, mode, image_hash=None):
+        self.questions = questions
+        self.last_question = text
+        with self.trace.span("history", questions=len(questions)):
+            saved = [self.history.save_question(q.text, mode, image_hash) for q in questions]
+        if any(saved):
+            self.history_model.refresh()
+
+        self.question_picker.clear()
+        self.question_picker.addItem(f"ALL {len(questions)} QUESTIONS")
+        for q in questions:
+            first_line = q.text.splitlines()[0]
+            self.question_picker.addItem(first_line if len(first_line) <= 70 else first_line[:67] + "...")
+        self.question_picker.setVisible(True)
+        self.solve_all(mode)
+
+    def _on_question_picked(self, index):
+        if not self.questions:
+            return
+        self.pipeline.new_job()
+        self.prefetcher.discard()
+        mode = self.current_mode or "solve"
+        if index == 0:
+            self.solve_all(mode)
+        else:
+            # Single question: the normal flow, including the switch button
+            self.last_question = self.questions[index - 1].text
+            self.get_ai_response(self.last_question, mode, speculate=True)
+
+    def solve_all(self, mode):
+        """
+        Short questions (e.g. MCQs) go out as batched requests, longer ones
+        as one small request each, all in parallel; each answer is shown as
+        it lands.
+        """
+        self.current_mode = mode
+        self.switch_btn.setVisible(False)
+        self.question_answers = {}
+        if not self.trace or self.trace.name != "capture":
+            self.trace = tracer.trace("answer_all", mode=mode)
+        self._spans["ai"] = self.trace.start("ai", mode=mode, questions=len(self.questions))
+        self.pipeline.submit(
+            _answer_all_stage, [q.text for q in self.questions], mode,
+            stage="ai",
+            on_progress=lambda r: self._on_question_answer(*r, mode),
+            on_error=lambda e: self._on_question_answer(None, e, mode),
+        )
+        self._render_answers(mode)
+
+    def _on_question_answer(self, index, answer, mode):
+        if isinstance(answer, Exception):
+            # index None: the whole stage failed, every open slot shows it
+            for i in ([index] if index is not None else range(len(self.questions))):
+                self.question_answers.setdefault(i, f"AI Failure: {answer}")
+        else:
+            self.question_answers[index] = answer
+            if answer:
+                self.history.save_answer(self.questions[index].text, mode, answer)
+        self._render_answers(mode)
+
+    def _render_answers(self, mode):
+        sections = []
+        for i, q in enumerate(self.questions):
+            answer = self.question_answers.get(i, "AI IS THINKING...")
+            sections.append(f"QUESTION {q.number}:\n{q.text}\n\n{mode.upper()}:\n{answer}")
+        scroll = self.output_box.verticalScrollBar().value()
+        self.output_box.setText("\n\n===\n\n".join(sections))
+        self.output_box.verticalScrollBar().setValue(scroll)
+
+        done = len(self.question_answers)
+        if done == len(self.questions):
+            self._end_span("ai")
+            self._finish_trace("PROCESS COMPLETE")
+        else:
+            self.status_label.setText(f"SOLVED {done}/{len(self.questions)}...")
+
+    def _on_capture_error(self, e):
+        import traceback
+        traceback.print_exception(type(e), e, e.__traceback__)
+        self.show()
+        self.output_box.setText(f"Capture Error: {e}")
+        self.status_label.setText("ERROR")
+
+    def _show_thinking(self, question, mode):
         self.current_mode = mode
-        context_q = question
-        
         self.status_label.setText(f"PROCESSING {mode.upper()}...")
         self.switch_btn.setText("TRY HINT" if mode == "solve" else "TRY FULL SOLUTION")
         self.switch_btn.setVisible(True)
         
         # Show "Thinking" state in the output box
         self.output_box.setText(f"QUESTION:\n{question}\n\n---\n\nAI IS THINKING...")
-        
-        # Small delay for UI feel
-        QTimer.singleShot(100, lambda: self._async_ai_call(context_q, mode))
 
-    def _async_ai_call(self, context_q, mode):
-        try:
-            ans = ask_solution(context_q) if mode == "solve" else ask_hint(context_q)
+    def get_ai_response(self, question, mode, speculate=False, trace=None):
+        context_q = question
+        self._show_thinking(question, mode)
+        self.trace = trace or tracer.trace("answer", mode=mode)
+        self._spans["ai"] = self.trace.start("ai", mode=mode, streamed=STREAM_RESPONSES)
+
+        ask = ask_solution if mode == "solve" else ask_hint
+        if STREAM_RESPONSES:
+            self._spans["ttft"] = self.trace.start("ttft")
+
+            def on_chunk(chunk):
+                self._end_span("ttft")
+                self.stream.push(chunk)
+
+            # Tokens are appended under the header as they arrive
+            self.stream.begin(f"QUESTION:\n{context_q}\n\n---\n\n{mode.upper()}:\n")
+            self.pipeline.submit(
+                _stream_stage, ask, context_q,
+                stage="ai",
+                pass_token=True,
+                on_progress=on_chunk,
+                on_result=lambda ans: self._on_ai_answer(context_q, mode, ans),
+                on_error=self._on_ai_error,
+            )
+        else:
+            self.pipeline.submit(
+                ask, context_q,
+                stage="ai",
+                on_result=lambda ans: self._on_ai_answer(context_q, mode, ans),
+                on_error=self._on_ai_error,
+            )
+
+        if speculate:
+            # Fetch the other mode now so the switch button answers instantly
+            self.prefetcher.prefetch(context_q, "hint" if mode == "solve" else "solve")
+
+    def _on_ai_answer(self, context_q, mode, ans, streamed=STREAM_RESPONSES):
+        if streamed:
+            self.stream.finish()
+        else:
             formatted_text = f"QUESTION:\n{context_q}\n\n---\n\n{mode.upper()}:\n{ans}"
             self.output_box.setText(formatted_text)
-            self.status_label.setText("PROCESS COMPLETE")
-        except Exception as e:
-            self.output_box.setText(f"AI Failure: {e}")
+        if ans:
+            self.history.save_answer(context_q, mode, ans)
+        self._end_span("ttft")
+        self._end_span("ai", chars=len(ans or ""))
+        self._finish_trace("PROCESS COMPLETE")
+
+    def _on_ai_error(self, e):
+        self.output_box.setText(f"AI Failure: {e}")
+        self._end_span("ttft")
+        self._end_span("ai", error=str(e))
+        self._finish_trace("AI FAILURE")
+
+    # --- Tracing ---
+    def _end_span(self, key, **attrs):
+        span = self._spans.pop(key, None)
+        return span.end(**attrs) if span else None
+
+    def _finish_trace(self, status):
+        """Closes the current run: logs its breakdown, shows it in the status label."""
+        trace = self.trace
+        if not trace:
+            self.status_label.setText(status)
+            return
+        for key in list(self._spans):
+            self._end_span(key, abandoned=True)
+        self.trace = None
+        summary = trace.summary()
+        log.debug(f"[{trace.name}] {summary}")
+        self.status_label.setToolTip(summary)
+        if TRACE_OVERLAY:
+            # snip_wait is the user's own time, not something to blame on the app
+            status = f"{status} · {trace.summary(skip=('snip_wait',))}"
+        self.status_label.setText(status)
 
     def handle_switch(self):
         if self.last_question:
+            # Drop the answer still in flight for the previous mode
+            token = self.pipeline.new_job()
             new_mode = "solve" if self.current_mode == "hint" else "hint"
-            self.get_ai_response(self.last_question, new_mode)
+            question = self.last_question
+            self._show_thinking(question, new_mode)
+            self.trace = tracer.trace("switch", mode=new_mode)
+            self._spans = {"ai": self.trace.start("ai", mode=new_mode, prefetched=True)}
+            served = self.prefetcher.take(
+                question, new_mode,
+                on_result=lambda ans: self._on_ai_answer(question, new_mode, ans, streamed=False),
+                on_error=self._on_ai_error,  # ends the "ai" span and the trace too
+                token=token,
+            )
+            if not served:
+                self._spans = {}
+                self.get_ai_response(question, new_mode, trace=self.trace)
+
+
+def _stream_stage(fn, *args, token=None, progress=None):
+    """Consumes fn(..., stream=True) on a pool thread, forwarding chunks as progress."""
+    return collect_stream(
+        fn(*args, stream=True),
+        on_chunk=progress,
+        should_stop=lambda: token is not None and token.cancelled,
+    )
+
+
+def _sharded_practice_stage(history_list, count, token=None, progress=None):
+    return generate_practice_questions_sharded(
+        history_list, count,
+        on_questions=lambda text: progress(text + "\n"),
+        should_stop=lambda: token is not None and token.cancelled,
+    )
+
+
+def _export_stage(history, path, since, token=None, progress=None):
+    result = export_history(
+        history, path, EXPORT_FORMAT, since,
+        progress=lambda done, total: progress((done, total)),
+        should_stop=lambda: token.cancelled,
+    )
+    if result["entries"]:
+        history.record_export(result["path"], result["format"], result["entries"], result["until"])
+    return result
+
+
+def _warm_up_stage():
+    from app.backend.ocr import ocr_engine
+    from app.backend.ai import ai_client
+    with tracer.span("warm_up"):
+        with tracer.span("warm_up_ocr"):
+            ocr_engine.warm_up()
+        with tracer.span("warm_up_ai"):
+            ai_client.warm_up()
+
+
+def _capture_stage(trace):
+    with trace.span("grab") as span:
+        pil_img = capture_screen()
+        span.attrs["size"] = pil_img.size
+    with trace.span("convert"):
+        q_img = pil_to_qimage(pil_img)
+    return pil_img, q_img
+
+
+def _answer_all_stage(questions, mode, progress=None):
+    answer_questions(questions, mode, on_answer=lambda i, ans, err: progress((i, err or ans)))
+
+
+def _ocr_stage(full_img, crop_box, store, trace):
+    """
+    Crop + OCR. Runs on a pool thread. crop_box=None keeps the whole image.
+    Returns (text, questions, image_hash); the hash is None without a store.
+    """
+    with trace.span("crop", box=crop_box):
+        crop = full_img.crop(crop_box) if crop_box else full_img
+
+    image_hash = None
+    if store:
+        # Only hashes here; the PNG is written by the store's writer thread
+        with trace.span("store") as span:
+            image_hash = store.put(crop)
+            span.attrs["image"] = image_hash
+
+    return read_image(crop, trace=trace) + (image_hash,)
+
 
 def main():
+    configure_logging()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
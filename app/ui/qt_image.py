@@ -0,0 +1,43 @@
+from PyQt5.QtGui import QImage, QPixmap
+
+# PIL mode -> (mode to convert to first, raw mode to export, QImage format, bytes per pixel).
+# RGB is wrapped as-is in Format_RGB888, so no extra RGB -> RGBA copy of
+# the screenshot is made; RGBA is exported as BGRA for Qt's native ARGB32.
+_FORMATS = {
+    "RGB": (None, "RGB", QImage.Format_RGB888, 3),
+    "RGBX": ("RGB", "RGB", QImage.Format_RGB888, 3),
+    "RGBA": (None, "BGRA", QImage.Format_ARGB32, 4),
+    "L": (None, "L", QImage.Format_Grayscale8, 1),
+}
+
+
+def pil_to_qimage(pil_img) -> QImage:
+    """
+    Wraps a PIL image's raw pixel bytes in a QImage (no PNG encode/decode).
+    The QImage does not own the buffer, so the bytes are pinned on it.
+    """
+    if pil_img.mode not in _FORMATS:
+        pil_img = pil_img.convert("RGBA")
+    convert_to, raw_mode, fmt, bpp = _FORMATS[pil_img.mode]
+    if convert_to:
+        pil_img = pil_img.convert(convert_to)
+
+    width, height = pil_img.size
+    data = pil_img.tobytes("raw", raw_mode)
+    q_img = QImage(data, width, height, width * bpp, fmt)
+    q_img._buffer = data  # keep the bytes alive as long as the QImage
+    return q_img
+
+
+def qimage_to_qpixmap(q_img) -> QPixmap:
+    """
+    GUI thread only. On raster backends the pixmap can share the QImage's
+    pixels instead of copying them, so the source image is pinned too.
+    """
+    pixmap = QPixmap.fromImage(q_img)
+    pixmap._image = q_img
+    return pixmap
+
+
+def pil_to_qpixmap(pil_img) -> QPixmap:
+    return qimage_to_qpixmap(pil_to_qimage(pil_img))
@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import sys
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+# Load .env relative to the root location
+from dotenv import load_dotenv
+load_dotenv(os.path.join(root_dir, ".env"))
+
+from app.backend.batch import run_batch
+from app.backend.tracing import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="OCR + answer every question in a folder of screenshots / scanned pages (TIFF frames included)."
+    )
+    parser.add_argument("source", help="image file or directory (searched recursively)")
+    parser.add_argument("-o", "--output", default="screentutor_batch.jsonl",
+                        help="JSONL output; re-running with the same file resumes where it stopped")
+    parser.add_argument("--mode", choices=["solve", "hint"], default="solve")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    parser.add_argument("--ai-workers", type=int, default=4, help="AI requests in flight")
+    parser.add_argument("--no-ai", action="store_true", help="OCR + segmentation only")
+    parser.add_argument("--report", default=None, help="also write the throughput report as JSON here")
+    args = parser.parse_args()
+    configure_logging()
+
+    if not args.no_ai and not os.environ.get("OPENROUTER_API_KEY"):
+        print("⚠️ Warning: OPENROUTER_API_KEY is not set.")
+
+    def progress(stats):
+        if stats.pages % 10 == 0:
+            r = stats.report()
+            print(f"{r['pages']} pages | {r['pages_per_s']} pages/s | {r['tokens_per_s']} tokens/s | {r['failed']} failed")
+
+    report = run_batch(
+        args.source, args.output,
+        mode=args.mode,
+        ocr_workers=args.ocr_workers,
+        ai_workers=args.ai_workers,
+        use_ai=not args.no_ai,
+        on_progress=progress,
+    )
+
+    print("-" * 35)
+    for key, value in report.items():
+        print(f"{key:>16}: {value}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+End-to-end benchmark: synthetic question images -> OCR -> segmentation ->
+history -> AI calls, fully offline (the AI stages talk to dev/mock_llm.py).
+Reports p50/p95/p99 latency and peak Python memory per stage and compares
+against a saved baseline. The ai_spiky* stages inject random latency spikes
+into the mock to show what hedging across models does to the tail.
+
+    python dev/bench.py                       # run and print
+    python dev/bench.py --save-baseline       # store dev/benchmarks/baseline.json
+    python dev/bench.py --compare             # exit 1 if a stage regressed
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from PIL import Image, ImageDraw, ImageFont
+
+from mock_llm import start_mock_server
+
+BASELINE_PATH = os.path.join(root_dir, "dev", "benchmarks", "baseline.json")
+
+MCQ = [
+    "Q3. A car accelerates uniformly from rest to 20 m/s in 5 s.",
+    "What is the distance covered in this time?",
+    "(a) 25 m   (b) 50 m   (c) 75 m   (d) 100 m",
+]
+NUMERICAL = [
+    "A block of mass 4 kg is pulled with a force of 30 N",
+    "on a surface with friction coefficient 0.25.",
+    "Find the acceleration of the block. (g = 10 m/s^2)",
+]
+WORKSHEET = [
+    "Answer all questions.",
+    "1. What is the value of 12 x 15?",
+    "2. Simplify: (3x + 2) - (x - 5)",
+    "3. Name the process by which plants make food.",
+    "4. Convert 2.5 km into metres.",
+    "5. Which gas is released during photosynthesis?",
+]
+SAMPLES = {"mcq": MCQ, "numerical": NUMERICAL, "worksheet": WORKSHEET}
+# What tesseract reads around a question when the snip catches the browser too
+SCREEN_CHROME = [
+    "File Edit View History Bookmarks Tools Help",
+    "Kinematics Quiz – Google Chrome",
+    "https://school.example.com/quiz/kinematics?id=3",
+    "10:42 AM",
+]
+SCREEN_FOOTER = ["© ® • ~", "Previous", "Next", "Page 3 of 12"]
+# (width at 1x, scale): a laptop snip, a large snip, and the same on a 2x display
+SIZES = [(700, 1), (1400, 1), (700, 2)]
+
+
+def _font(size):
+    for name in ("Arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def render(lines, width, scale):
+    font_size = int(22 * scale * width / 700)
+    line_height = int(font_size * 1.6)
+    img = Image.new("RGB", (width * scale, line_height * (len(lines) + 1)), "white")
+    draw = ImageDraw.Draw(img)
+    font = _font(font_size)
+    for i, line in enumerate(lines):
+        draw.text((int(20 * scale), int(line_height * (i + 0.5))), line, fill="black", font=font)
+    return img
+
+
+def synthetic_images():
+    return {
+        f"{kind}_{width}px@{scale}x": render(lines, width, scale)
+        for kind, lines in SAMPLES.items() for width, scale in SIZES
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    k = (len(values) - 1) * q
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+class Bench:
+    def __init__(self, iterations):
+        self.iterations = iterations
+        self.results = {}
+
+    def stage(self, name, fn, iterations=None, setup=None):
+        """Times fn() `iterations` times, then once more under tracemalloc for peak memory."""
+        n = iterations or self.iterations
+        timings = []
+        for _ in range(n):
+            if setup:
+                setup()
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        if setup:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.results[name] = {
+            "n": n,
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "peak_kb": round(peak / 1024, 1),
+        }
+        r = self.results[name]
+        print(f"{name:<28} p50 {r['p50_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   peak {r['peak_kb']:>9.1f} KB")
+
+    def skip(self, name, reason):
+        print(f"{name:<28} skipped ({reason})")
+
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def ocr_available():
+    from app.backend.ocr.ocr_engine import BACKENDS
+    return any(cls().is_available() for cls in BACKENDS.values())
+
+
+def run(args):
+    server = start_mock_server(ttft_ms=args.ttft_ms, token_ms=args.token_ms, answer_words=args.answer_words, seed=args.seed)
+    workdir = tempfile.mkdtemp(prefix="screentutor_bench_")
+    # Must be set before app modules read the config / build the client
+    os.environ["SCREENTUTOR_AI_BASE_URL"] = server.base_url
+    os.environ["OPENROUTER_API_KEY"] = "mock"
+
+    from app.backend.ocr.ocr_engine import extract_text
+    from app.backend.ocr.ocr_cache import OCRCache
+    from app.backend.ocr import ocr_engine
+    from app.backend.ocr.segmenter import segment_image
+    from app.backend.memory.history_manager import HistoryManager
+    from app.backend.memory.question_memory import QuestionMemory
+    from app.backend.ai import ai_client
+    from app.backend.ai.context_selector import select_context
+
+    # Keep the user's real caches out of it
+    ocr_engine._cache = OCRCache(directory=os.path.join(workdir, "ocr_cache"))
+    ai_client.answer_cache = QuestionMemory(filepath=os.path.join(workdir, "answer_cache.json"))
+
+    bench = Bench(args.iterations)
+    images = synthetic_images()
+    texts = {}
+
+    print(f"Mock LLM at {server.base_url} (ttft {args.ttft_ms} ms, {args.token_ms} ms/token)")
+    print("-" * 80)
+
+    # --- OCR ---
+    if ocr_available():
+        for name, img in images.items():
+            bench.stage(f"ocr_cold[{name}]", lambda img=img: extract_text(img, use_cache=False),
+                        iterations=max(3, args.iterations // 4))
+            texts[name] = extract_text(img)
+            bench.stage(f"ocr_cached[{name}]", lambda img=img: extract_text(img))
+        for name in (n for n in images if n.startswith("worksheet")):
+            bench.stage(f"segment[{name}]", lambda name=name: segment_image(images[name], texts[name]),
+                        iterations=max(3, args.iterations // 4))
+    else:
+        bench.skip("ocr_*", "no tesseract found")
+        texts = {name: "\n".join(SAMPLES[name.split("_")[0]]) for name in images}
+
+    # --- OCR cleanup (no tesseract needed: runs on text as OCR returns it) ---
+    from app.backend.ocr import cleanup
+    noisy = "\n".join(SCREEN_CHROME + [line.replace("-", "−") for line in MCQ] + SCREEN_FOOTER)
+    bench.stage("ocr_cleanup", lambda: cleanup.clean_text(noisy), iterations=args.iterations * 10)
+    _, saved = cleanup.clean_text(noisy)
+    bench.results["ocr_cleanup"].update(saved.as_dict())
+    print(f"{'  tokens':<28} {saved}")
+
+    # --- History ---
+    history = HistoryManager(filepath=os.path.join(workdir, "history.db"))
+    counter = iter(range(10 ** 9))
+    bench.stage("history_save", lambda: history.save_question(f"Bench question {next(counter)} {MCQ[0]}", "solve"),
+                iterations=args.iterations * 10)
+    for i in range(args.history_rows):
+        history.save_question(f"{i}: {NUMERICAL[i % 3]} variant {i}", "solve")
+    bench.stage("history_search", lambda: history.search("acceleration", limit=50))
+    bench.stage("history_page", lambda: history.get_page(0, 50))
+    recent = history.get_recent_questions(400)
+    bench.stage("context_select", lambda: select_context(recent))
+
+    # --- AI (mock server) ---
+    question = "\n".join(MCQ)
+    bench.stage("ai_solve", lambda: ai_client.ask_solution(question, use_cache=False))
+    bench.stage("ai_hint", lambda: ai_client.ask_hint(question, use_cache=False))
+
+    ttft = []
+
+    def stream_once():
+        start = time.perf_counter()
+        first = True
+        for _ in ai_client.ask_solution(question, use_cache=False, stream=True):
+            if first:
+                ttft.append((time.perf_counter() - start) * 1000)
+                first = False
+
+    bench.stage("ai_stream_total", stream_once)
+    bench.results["ai_stream_ttft"] = {
+        "n": len(ttft),
+        "p50_ms": round(percentile(ttft, 0.5), 3),
+        "p95_ms": round(percentile(ttft, 0.95), 3),
+        "mean_ms": round(statistics.fmean(ttft), 3),
+        "peak_kb": 0.0,
+    }
+    print(f"{'ai_stream_ttft':<28} p50 {bench.results['ai_stream_ttft']['p50_ms']:>9.2f} ms   "
+          f"p95 {bench.results['ai_stream_ttft']['p95_ms']:>9.2f} ms")
+
+    worksheet = [line for line in WORKSHEET if line[0].isdigit()]
+    bench.stage("ai_batch_5q", lambda: ai_client.ask_solutions_batch(worksheet, "solve", use_cache=False),
+                iterations=max(3, args.iterations // 2))
+    ai_client.ask_solution(question)  # warm the answer cache
+    bench.stage("ai_cached", lambda: ai_client.ask_solution(question))
+    bench.stage("practice_10", lambda: ai_client.generate_practice_questions(recent, count=10),
+                iterations=max(3, args.iterations // 2))
+
+    # --- Tail latency: the same spiky server without and with hedging ---
+    server.spike_rate, server.spike_ms = args.spike_rate, args.spike_ms
+    bench.stage("ai_spiky", lambda: ai_client.ask_solution(question, use_cache=False),
+                iterations=args.iterations * 2)
+    ai_client.HEDGE, ai_client.HEDGE_DEADLINE_MS = True, args.hedge_deadline_ms
+    ai_client.FALLBACK_MODELS = ["mock/fallback"]
+    bench.stage("ai_spiky_hedged", lambda: ai_client.ask_solution(question, use_cache=False),
+                iterations=args.iterations * 2)
+    ai_client.HEDGE = False
+    server.spike_rate = 0.0
+    print("-" * 80)
+    for model, stats in ai_client.latency.report().items():
+        print(f"{model:<28} ttft p95 {stats['ttft_p95_ms'] or 0:>8.1f} ms   p99 {stats['ttft_p99_ms'] or 0:>8.1f} ms   "
+              f"wins {stats.get('wins', 0)}  cancelled {stats.get('cancelled', 0)}")
+
+    history.close()
+    server.shutdown()
+    ai_client.answer_cache.flush()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "ttft_ms": args.ttft_ms,
+            "token_ms": args.token_ms,
+            "mock_requests": server.requests,
+            "max_rss_mb": max_rss_mb(),
+            "models": ai_client.latency.report(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "stages": bench.results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Returns the stages whose p95 got slower than baseline * (1 + tolerance)."""
+    regressions = []
+    print("-" * 80)
+    print(f"{'stage':<28} {'baseline p95':>14} {'current p95':>14} {'change':>9}")
+    for name, base in sorted(baseline.get("stages", {}).items()):
+        cur = current["stages"].get(name)
+        if not cur:
+            continue
+        change = (cur["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = ""
+        # Sub-millisecond stages are all noise
+        if change > tolerance and cur["p95_ms"] - base["p95_ms"] > 1.0:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<28} {base['p95_ms']:>11.2f} ms {cur['p95_ms']:>11.2f} ms {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ScreenTutor benchmark")
+    parser.add_argument("--iterations", type=int, default=int(os.environ.get("BENCH_ITERATIONS", "20")))
+    parser.add_argument("--ttft-ms", type=float, default=150)
+    parser.add_argument("--token-ms", type=float, default=2)
+    parser.add_argument("--answer-words", type=int, default=60)
+    parser.add_argument("--history-rows", type=int, default=5000)
+    parser.add_argument("--spike-rate", type=float, default=0.15, help="ai_spiky*: fraction of slow requests")
+    parser.add_argument("--spike-ms", type=float, default=1500, help="ai_spiky*: extra delay of a slow request")
+    parser.add_argument("--hedge-deadline-ms", type=float, default=400)
+    parser.add_argument("--seed", type=int, default=1, help="mock spike randomness")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, default=None)
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = 25%%)")
+    parser.add_argument("--json", default=None, help="also write this run's results here")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'max RSS':<28} {results['meta']['max_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline), exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import statistics
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.backend.ocr.ocr_engine import BACKENDS
+
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "20"))
+
+SAMPLE_TEXT = [
+    "Q3. A car accelerates uniformly from rest to 20 m/s in 5 s.",
+    "What is the distance covered in this time?",
+    "(a) 25 m   (b) 50 m   (c) 75 m   (d) 100 m",
+]
+
+
+def render_sample(width=900, height=200):
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.truetype("Arial.ttf", 26)
+    except OSError:
+        font = ImageFont.load_default()
+    for i, line in enumerate(SAMPLE_TEXT):
+        draw.text((20, 20 + i * 55), line, fill="black", font=font)
+    return img
+
+
+def bench_backend(name, image):
+    backend = BACKENDS[name]()
+    if not backend.is_available():
+        print(f"- {name:<12} not available, skipped")
+        return
+
+    start = time.perf_counter()
+    backend.load()
+    backend.image_to_string(image)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        backend.image_to_string(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    backend.close()
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"- {name:<12} cold {cold_ms:8.1f} ms | warm mean {statistics.mean(timings):7.1f} ms "
+          f"p50 {statistics.median(timings):7.1f} ms p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    print("--- ScreenTutor OCR Backend Benchmark ---")
+    print(f"Iterations per backend: {ITERATIONS}")
+    image = render_sample()
+    for name in BACKENDS:
+        bench_backend(name, image)
@@ -0,0 +1,64 @@
+import io
+import os
+import sys
+import time
+import statistics
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+# QPixmap needs a GUI application; offscreen works on headless boxes too
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PIL import Image
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from app.ui.qt_image import pil_to_qpixmap
+
+ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "5"))
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "Retina 13in": (2880, 1800),
+    "4K": (3840, 2160),
+    "5K": (5120, 2880),
+}
+
+
+def png_round_trip(pil_img):
+    # The conversion MainWindow used before
+    buffer = io.BytesIO()
+    pil_img.save(buffer, format="PNG")
+    return QPixmap.fromImage(QImage.fromData(buffer.getvalue()))
+
+
+def make_screenshot(size, mode):
+    # Noise + flat areas, roughly like a real screen for the PNG encoder
+    img = Image.effect_noise(size, 40).convert(mode)
+    img.paste((240, 240, 240) if mode != "L" else 240, (0, 0, size[0], size[1] // 2))
+    return img
+
+
+def timed(fn, pil_img):
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        pixmap = fn(pil_img)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert not pixmap.isNull()
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    print("--- ScreenTutor PIL -> QPixmap Benchmark (median ms) ---")
+    print(f"{'resolution':<12} {'mode':<5} {'png':>9} {'raw':>9} {'speedup':>8}")
+    for name, size in RESOLUTIONS.items():
+        for mode in ("RGB", "RGBA"):
+            img = make_screenshot(size, mode)
+            png_ms = timed(png_round_trip, img)
+            raw_ms = timed(pil_to_qpixmap, img)
+            print(f"{name:<12} {mode:<5} {png_ms:9.1f} {raw_ms:9.1f} {png_ms / raw_ms:7.1f}x")
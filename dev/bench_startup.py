@@ -0,0 +1,159 @@
+"""
+Cold-start benchmark: time from interpreter launch to the main window's
+first paint, measured in fresh processes under `python -X importtime`.
+Fails when the median goes over the tracked budget
+(dev/benchmarks/startup_budget.json) or when a module that should load
+lazily (openai, pytesseract, ...) is imported before the window shows.
+
+    python dev/bench_startup.py                 # check against the budget
+    python dev/bench_startup.py --runs 10 --top 20
+    python dev/bench_startup.py --save-budget   # budget = this median + headroom
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+BUDGET_PATH = os.path.join(root_dir, "dev", "benchmarks", "startup_budget.json")
+MARK = "SCREENTUTOR_FIRST_PAINT"
+HEADROOM = 1.5
+
+
+def probe():
+    """Child process: build the real window and report once it has painted."""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+    from app.ui.main_window import MainWindow
+
+    imported = time.perf_counter()
+    app = QApplication(sys.argv)
+    window = MainWindow()
+
+    def painted():
+        # Written to stderr so it lands in order with the -X importtime lines,
+        # and before anything MainWindow defers until after the first paint
+        sys.stderr.write(f"{MARK} {(time.perf_counter() - imported) * 1000:.1f}\n")
+        sys.stderr.flush()
+        QTimer.singleShot(0, app.quit)
+
+    window.first_painted.connect(painted)
+    window.show()
+    app.exec_()
+    os._exit(0)  # don't wait for the warm-up thread
+
+
+def parse_importtime(lines):
+    """-X importtime lines -> [(module, cumulative µs, nesting depth)]."""
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # the header line
+        name = name.rstrip("\n")
+        modules.append((name.strip(), cumulative, (len(name) - len(name.lstrip())) // 2))
+    return modules
+
+
+def run_once(env):
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--probe"],
+        cwd=root_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    before, window_ms, first_window_ms = [], None, None
+    for line in proc.stderr:
+        if line.startswith(MARK):
+            first_window_ms = (time.perf_counter() - started) * 1000
+            window_ms = float(line.split()[1])
+            break
+        before.append(line)
+    proc.stderr.read()
+    proc.wait()
+    if first_window_ms is None:
+        raise Exception("Probe exited before the window painted:\n" + "".join(before[-20:]))
+    modules = parse_importtime(before)
+    # Top-level entries already include everything they imported
+    app_us = sum(us for _, us, depth in modules if depth == 0)
+    return {
+        "first_window_ms": first_window_ms,
+        "window_ms": window_ms,
+        "import_ms": app_us / 1000,
+        "modules": modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScreenTutor cold-start benchmark")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--budget", default=BUDGET_PATH)
+    parser.add_argument("--save-budget", action="store_true")
+    args = parser.parse_args()
+
+    if args.probe:
+        return probe()
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    run_once(env)  # populate the OS file cache / __pycache__
+    runs = [run_once(env) for _ in range(args.runs)]
+    first_window = statistics.median(r["first_window_ms"] for r in runs)
+    imports = statistics.median(r["import_ms"] for r in runs)
+    window = statistics.median(r["window_ms"] for r in runs)
+
+    print(f"{'time to first window':<28} {first_window:>9.1f} ms  (median of {args.runs})")
+    print(f"{'  imports (-X importtime)':<28} {imports:>9.1f} ms")
+    print(f"{'  window build + paint':<28} {window:>9.1f} ms")
+    print("-" * 60)
+    slowest = sorted(runs[-1]["modules"], key=lambda m: m[1], reverse=True)[:args.top]
+    for name, us, _ in slowest:
+        print(f"{name[:44]:<46} {us / 1000:>9.1f} ms")
+
+    if args.save_budget:
+        budget = {}
+        if os.path.exists(args.budget):
+            with open(args.budget) as f:
+                budget = json.load(f)
+        budget["first_window_ms"] = round(first_window * HEADROOM)
+        budget["measured_ms"] = round(first_window, 1)
+        budget.setdefault("lazy_modules", [])
+        budget["created"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        os.makedirs(os.path.dirname(args.budget), exist_ok=True)
+        with open(args.budget, "w") as f:
+            json.dump(budget, f, indent=2)
+        print(f"Budget saved to {args.budget}")
+        return
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+    failures = []
+    lazy = set(budget.get("lazy_modules", []))
+    eager = sorted({name.split(".")[0] for r in runs for name, _, _ in r["modules"]} & lazy)
+    if eager:
+        failures.append(f"imported before first paint: {', '.join(eager)}")
+    if first_window > budget["first_window_ms"]:
+        failures.append(f"{first_window:.0f} ms is over the {budget['first_window_ms']} ms budget")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✅ Within the {budget['first_window_ms']} ms startup budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Exports the study history (questions, answers, practice sets) without the
+GUI, same code path as the EXPORT button.
+
+    python dev/export.py -o notes.md               # only what's new since the last export
+    python dev/export.py -o semester.pdf --full    # everything
+"""
+import argparse
+import json
+import os
+import sys
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from app.backend.export import export_history, FORMATS
+from app.backend.memory.history_manager import HistoryManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ScreenTutor history to Markdown, text or PDF.")
+    parser.add_argument("-o", "--output", required=True, help="output file; the extension picks the format")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--full", action="store_true", help="export everything, not just what's new")
+    parser.add_argument("--history", default=None, help="history.db to read (default: Data/history.db)")
+    args = parser.parse_args()
+
+    history = HistoryManager(filepath=args.history)
+    since = 0.0 if args.full else history.last_export()
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    result = export_history(history, args.output, args.format, since, progress=progress)
+    print()
+    if result["entries"]:
+        history.record_export(result["path"], result["format"], result["entries"], result["until"])
+    history.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
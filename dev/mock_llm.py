@@ -0,0 +1,252 @@
+"""
+Offline stand-in for the OpenRouter chat completions endpoint, for benchmarks
+and CI. Answers look like the real thing for each ScreenTutor prompt
+(solutions, hints, numbered practice lists, batched JSON answers) and both
+plain and streaming (SSE) responses are supported, with configurable
+time-to-first-token and per-token latency. Connections are kept alive (the
+server counts how many were opened), and the first N completions can be made
+to fail with a given status and Retry-After to exercise the retry policy.
+Per-model first-token delays and random latency spikes exercise hedging.
+
+    python dev/mock_llm.py --port 8765 --ttft-ms 300 --token-ms 15
+    python dev/mock_llm.py --fail-count 2 --fail-status 429 --retry-after 1
+    python dev/mock_llm.py --model-delay slow/model=3000 --spike-rate 0.1 --spike-ms 2000
+    SCREENTUTOR_AI_BASE_URL=http://127.0.0.1:8765/v1 OPENROUTER_API_KEY=mock python dev/run.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_BATCH_ID = re.compile(r"^\[(\w+)\]$", re.MULTILINE)
+_PRACTICE_COUNT = re.compile(r"Generate exactly (\d+) practice questions")
+
+
+def _words(n, start=0):
+    vocab = ["first", "identify", "the", "given", "values", "then", "apply", "formula",
+             "and", "simplify", "each", "step", "carefully", "to", "get", "result"]
+    return " ".join(vocab[(start + i) % len(vocab)] for i in range(n))
+
+
+def mock_answer(prompt: str, answer_words: int) -> str:
+    """Deterministic answer shaped like what the real model returns for this prompt."""
+    ids = _BATCH_ID.findall(prompt)
+    if ids and "JSON" in prompt:
+        answers = [{"id": qid, "answer": f"Step 1: {_words(answer_words // 2, i)}\nFINAL ANSWER: {i + 1}"}
+                   for i, qid in enumerate(ids)]
+        return json.dumps({"answers": answers})
+
+    match = _PRACTICE_COUNT.search(prompt)
+    if match:
+        count = int(match.group(1))
+        return "\n".join(f"{i}. Practice question {i}: {_words(12, i)}?" for i in range(1, count + 1))
+
+    if "Give ONLY a hint" in prompt:
+        return f"Hint: {_words(max(5, answer_words // 4))}."
+    steps = max(1, answer_words // 12)
+    lines = [f"Step {i}: {_words(12, i)}." for i in range(1, steps + 1)]
+    return "\n".join(lines + ["FINAL ANSWER: 42"])
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+
+    def do_HEAD(self):
+        # Connection warm-up probe
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json(200, {"data": [{"id": "mock/model"}]})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json(400, {"error": {"message": "invalid JSON"}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+
+        server = self.server
+        server.count_request()
+        failure = server.take_failure()
+        if failure:
+            status, retry_after = failure
+            headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else {}
+            return self._json(status, {"error": {"message": f"injected {status}"}}, headers)
+
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        answer = mock_answer(prompt, server.answer_words)
+        model = body.get("model", "mock/model")
+        # Whitespace-preserving pieces: one "token" per word
+        tokens = re.findall(r"\S+\s*", answer) or [""]
+
+        time.sleep(server.first_token_delay(model) / 1000)
+        if body.get("stream"):
+            return self._stream(model, tokens)
+
+        time.sleep(server.token_ms * len(tokens) / 1000)
+        try:
+            self._completion(model, prompt, answer, tokens)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client gave up (timeout / lost hedge)
+
+    def _completion(self, model, prompt, answer, tokens):
+        self._json(200, {
+            "id": "mock-1",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                      "total_tokens": len(prompt.split()) + len(tokens)},
+        })
+
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, tokens):
+        def write(data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def event(delta, finish=None):
+            chunk = {"id": "mock-1", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        try:
+            # Chunked transfer encoding keeps the connection reusable after the stream
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            event({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.server.token_ms / 1000)
+                event({"content": token})
+            event({}, finish="stop")
+            write(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # client closed the stream early (cancelled answer)
+            self.close_connection = True
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ttft_ms=200, token_ms=10, answer_words=60,
+                 fail_count=0, fail_status=503, retry_after=None,
+                 model_delays=None, spike_rate=0.0, spike_ms=0, seed=None):
+        super().__init__(address, MockLLMHandler)
+        self.ttft_ms = ttft_ms
+        # model id -> first-token delay (ms) replacing ttft_ms for that model
+        self.model_delays = dict(model_delays or {})
+        # Fraction of requests that get spike_ms extra delay (tail latency)
+        self.spike_rate = spike_rate
+        self.spike_ms = spike_ms
+        self._random = random.Random(seed)
+        self.token_ms = token_ms
+        self.answer_words = answer_words
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.inject_failures(fail_count, fail_status, retry_after)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def inject_failures(self, count, status=503, retry_after=None):
+        """The next `count` completions fail with `status` (and a Retry-After header if given)."""
+        with self._lock:
+            self.failures_left = count
+            self.fail_status = status
+            self.retry_after = retry_after
+
+    def first_token_delay(self, model) -> float:
+        delay = self.model_delays.get(model, self.ttft_ms)
+        with self._lock:
+            if self.spike_rate and self._random.random() < self.spike_rate:
+                delay += self.spike_ms
+        return delay
+
+    def take_failure(self):
+        with self._lock:
+            if self.failures_left <= 0:
+                return None
+            self.failures_left -= 1
+            return self.fail_status, self.retry_after
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(port=0, **settings) -> MockLLMServer:
+    """Starts the mock on a background thread (port 0 = any free port)."""
+    server = MockLLMServer(("127.0.0.1", port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock for ScreenTutor")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=200, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=10, help="delay per generated token")
+    parser.add_argument("--answer-words", type=int, default=60, help="approximate answer length")
+    parser.add_argument("--fail-count", type=int, default=0, help="fail this many completions first")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on failures")
+    parser.add_argument("--model-delay", action="append", default=[], metavar="MODEL=MS",
+                        help="first-token delay for one model (repeatable)")
+    parser.add_argument("--spike-rate", type=float, default=0.0, help="fraction of requests to slow down")
+    parser.add_argument("--spike-ms", type=float, default=2000, help="extra delay for those requests")
+    args = parser.parse_args()
+    model_delays = {}
+    for item in args.model_delay:
+        model, _, ms = item.rpartition("=")
+        model_delays[model] = float(ms)
+
+    server = MockLLMServer(("127.0.0.1", args.port), ttft_ms=args.ttft_ms,
+                           token_ms=args.token_ms, answer_words=args.answer_words,
+                           fail_count=args.fail_count, fail_status=args.fail_status,
+                           retry_after=args.retry_after, model_delays=model_delays,
+                           spike_rate=args.spike_rate, spike_ms=args.spike_ms)
+    print(f"Mock LLM listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,48 @@
+"""
+Re-OCR the captures that history entries link to (Data/captures), e.g.
+after switching OCR backend or upgrading tesseract. Prints what would
+change; --apply rewrites the history rows.
+
+    python dev/reocr.py                  # dry run
+    python dev/reocr.py --apply --limit 500
+"""
+import argparse
+import json
+import os
+import sys
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from app.backend.batch import reocr_history
+from app.backend.memory.capture_store import CaptureStore
+from app.backend.memory.history_manager import HistoryManager
+from app.backend.tracing import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run OCR over stored captures linked from history.")
+    parser.add_argument("--apply", action="store_true", help="update history rows (default: dry run)")
+    parser.add_argument("--limit", type=int, default=None, help="oldest N linked rows only")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    parser.add_argument("--quiet", action="store_true", help="don't print each changed row")
+    args = parser.parse_args()
+    configure_logging()
+
+    history = HistoryManager()
+
+    def show(row, text):
+        if not args.quiet:
+            print(f"#{row['id']}\n  - {row['question'][:100]!r}\n  + {text[:100]!r}")
+
+    report = reocr_history(history, CaptureStore(), apply=args.apply, ocr_workers=args.ocr_workers,
+                           limit=args.limit, on_change=show)
+    history.close()
+    print(json.dumps(report, indent=2))
+    if report["changed"] and not args.apply:
+        print("Dry run; re-run with --apply to update history.")
+
+
+if __name__ == "__main__":
+    main()
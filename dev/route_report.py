@@ -0,0 +1,57 @@
+"""
+Model routing report from the trace log: how requests were split across
+tiers / rules and what latency each got. --explain shows how one piece of
+text would be routed (handy when tuning SCREENTUTOR_ROUTER_RULES).
+
+    python dev/route_report.py
+    python dev/route_report.py --explain "Find the acceleration of a 4 kg block pulled with 30 N" --mode solve
+"""
+import argparse
+import json
+import os
+import sys
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from app.backend.ai.hedging import percentile
+from app.backend.ai.router import Router
+from app.backend.tracing import read_log
+
+
+def report(spans):
+    groups = {}
+    for s in spans:
+        if s.get("span") != "ai_request":
+            continue
+        attrs = s.get("attrs", {})
+        key = (attrs.get("mode"), attrs.get("tier"), attrs.get("rule"), attrs.get("model"))
+        groups.setdefault(key, []).append(s)
+    if not groups:
+        print("No ai_request spans in the trace log.")
+        return
+    total = sum(len(v) for v in groups.values())
+    print(f"{'mode':<9} {'tier':<8} {'rule':<12} {'model':<32} {'n':>5} {'share':>6} {'p50':>8} {'p95':>8} {'ttft p50':>9}")
+    for (mode, tier, rule, model), items in sorted(groups.items(), key=lambda kv: -len(kv[1])):
+        durations = [s["dur_ms"] for s in items]
+        ttfts = [s["attrs"]["ttft_ms"] for s in items if s["attrs"].get("ttft_ms") is not None]
+        ttft = percentile(ttfts, 0.5)
+        print(f"{str(mode):<9} {str(tier):<8} {str(rule):<12} {str(model)[:32]:<32} {len(items):>5} "
+              f"{len(items) / total:>6.0%} {percentile(durations, 0.5):>6.0f}ms {percentile(durations, 0.95):>6.0f}ms "
+              f"{(f'{ttft:.0f}ms' if ttft is not None else '-'):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ScreenTutor model routing report")
+    parser.add_argument("log", nargs="?", default=None, help="trace log (default: Data/logs/trace.log)")
+    parser.add_argument("--explain", default=None, help="show the features and route for this text")
+    parser.add_argument("--mode", default="solve", choices=["solve", "hint", "practice"])
+    args = parser.parse_args()
+
+    if args.explain:
+        route = Router(enabled=True).route(args.explain, args.mode)
+        print(json.dumps({"tier": route.tier, "model": route.model, "rule": route.rule,
+                          "features": route.features}, indent=2))
+    else:
+        report(read_log(args.log))
@@ -0,0 +1,38 @@
+"""
+Converts the trace log (Data/logs/trace.log and its rotated backups) into
+Chrome trace-event JSON; open it in chrome://tracing or https://ui.perfetto.dev.
+
+    python dev/trace_to_chrome.py                  # -> trace.json
+    python dev/trace_to_chrome.py -o out.json --last 50
+"""
+import argparse
+import os
+import sys
+
+# Go up one level from 'dev/' to reach project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from app.backend.tracing import read_log, tracer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export ScreenTutor traces for chrome://tracing")
+    parser.add_argument("log", nargs="?", default=None, help="trace log (default: Data/logs/trace.log)")
+    parser.add_argument("-o", "--output", default="trace.json")
+    parser.add_argument("--last", type=int, default=0, help="only the last N traces")
+    args = parser.parse_args()
+
+    spans = read_log(args.log)
+    if args.last:
+        keep = []
+        for s in reversed(spans):
+            if s.get("trace_id") and s["trace_id"] not in keep:
+                keep.append(s["trace_id"])
+            if len(keep) >= args.last:
+                break
+        spans = [s for s in spans if s.get("trace_id") in keep]
+    if not spans:
+        print("No spans found.")
+        sys.exit(1)
+    tracer.export_chrome(args.output, spans)
+    print(f"Wrote {len(spans)} spans to {args.output}")
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Tests import the app the same way the dev/ scripts do: from the project root
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+import pytest
+
+
+@pytest.fixture
+def mock_llm():
+    """A fast dev/mock_llm.py server; tweak inject_failures()/model_delays per test."""
+    from dev.mock_llm import start_mock_server
+
+    server = start_mock_server(ttft_ms=0, token_ms=0, answer_words=12, seed=0)
+    yield server
+    server.shutdown()
+    server.server_close()
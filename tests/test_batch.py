@@ -0,0 +1,27 @@
+import json
+
+from app.backend.batch import load_checkpoint
+
+
+def write_records(path, *records):
+    with open(path, "w", encoding="utf-8") as f:
+        for page_id, status in records:
+            f.write(json.dumps({"id": page_id, "status": status}) + "\n")
+        f.write('{"id": "torn", "sta')
+
+
+def test_checkpoint_skips_finished_pages(tmp_path):
+    path = tmp_path / "out.jsonl"
+    write_records(path, ("a", "ok"), ("b", "empty"), ("c", "error"), ("d", "ok"), ("d", "error"))
+    assert load_checkpoint(str(path)) == {"a", "b"}
+
+
+def test_ocr_only_pages_are_redone_when_answers_are_wanted(tmp_path):
+    path = tmp_path / "out.jsonl"
+    write_records(path, ("a", "ocr_only"), ("b", "ok"))
+    assert load_checkpoint(str(path), use_ai=True) == {"b"}
+    assert load_checkpoint(str(path), use_ai=False) == {"a", "b"}
+
+
+def test_missing_output_file_means_nothing_done(tmp_path):
+    assert load_checkpoint(str(tmp_path / "none.jsonl")) == set()
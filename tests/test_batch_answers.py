@@ -0,0 +1,59 @@
+from app.backend.ai import ai_client
+from app.backend.ai.ai_client import parse_batch_answers
+
+
+def test_parses_fenced_json_with_prose():
+    text = 'Here you go:\n```json\n{"answers": [{"id": "1", "answer": " x = 2 "}, {"id": "[2]", "answer": "4"}]}\n```'
+    assert parse_batch_answers(text, ["1", "2"]) == {"1": "x = 2", "2": "4"}
+
+
+def test_accepts_answers_as_mapping():
+    assert parse_batch_answers('{"answers": {"1": "A", "2": "B"}}', ["1", "2"]) == {"1": "A", "2": "B"}
+
+
+def test_malformed_json_gives_nothing():
+    assert parse_batch_answers('{"answers": [{"id": "1", "answer": "A"}', ["1"]) == {}
+    assert parse_batch_answers("no json here", ["1"]) == {}
+    assert parse_batch_answers('{"answers": "A"}', ["1"]) == {}
+    assert parse_batch_answers("", ["1"]) == {}
+    assert parse_batch_answers(None, ["1"]) == {}
+
+
+def test_missing_empty_and_unknown_ids_are_left_out():
+    text = ('{"answers": [{"id": "1", "answer": "A"}, {"id": "2", "answer": "  "}, '
+            '{"id": "9", "answer": "C"}, {"answer": "D"}, "E", {"id": "3", "answer": 5}]}')
+    assert parse_batch_answers(text, ["1", "2", "3"]) == {"1": "A"}
+
+
+def test_duplicate_ids_keep_the_first_answer():
+    text = '{"answers": [{"id": "1", "answer": "first"}, {"id": "1", "answer": "second"}]}'
+    assert parse_batch_answers(text, ["1"]) == {"1": "first"}
+
+
+def test_batch_falls_back_to_single_calls_for_missing_answers(monkeypatch):
+    calls = []
+
+    def fake_request(prompt, route, **attrs):
+        calls.append(attrs.get("batch"))
+        if attrs.get("batch"):
+            return '{"answers": [{"id": "1", "answer": "noun"}, {"id": "2", "answer": ""}]}'
+        return "single answer"
+
+    monkeypatch.setattr(ai_client, "_request", fake_request)
+    answers = ai_client.ask_solutions_batch(
+        ["What is a noun?", "What is a verb?", "What is an adverb?"], mode="hint", use_cache=False,
+        batch_size=3, max_workers=1,
+    )
+    assert answers == ["noun", "single answer", "single answer"]
+    assert calls == [3, None, None]
+
+
+def test_failed_batch_retries_every_question(monkeypatch):
+    def fake_request(prompt, route, **attrs):
+        if attrs.get("batch"):
+            raise Exception("upstream 500")
+        return "single answer"
+
+    monkeypatch.setattr(ai_client, "_request", fake_request)
+    answers = ai_client.ask_solutions_batch(["Q one?", "Q two?"], mode="hint", use_cache=False, max_workers=1)
+    assert answers == ["single answer", "single answer"]
@@ -0,0 +1,75 @@
+from app.backend.ocr import cleanup
+from app.backend.ocr.ocr_engine import OCRWord
+
+
+def clean(*lines):
+    return cleanup.clean_text("\n".join(lines))[0].splitlines()
+
+
+def word(text, conf, line, block=1):
+    return OCRWord(text, conf, 0, 0, 10, 10, block, 1, line)
+
+
+def test_strips_browser_chrome_around_question():
+    lines = clean(
+        "File Edit View History Bookmarks Tools Help",
+        "Kinematics Quiz – Google Chrome",
+        "https://school.example.com/quiz/3",
+        "10:42 AM",
+        "Q3. A car accelerates from rest to 20 m/s in 5 s.",
+        "What is its acceleration?",
+        "Next",
+        "Page 3 of 12",
+    )
+    assert lines == ["Q3. A car accelerates from rest to 20 m/s in 5 s.", "What is its acceleration?"]
+
+
+def test_keeps_percent_and_time_options():
+    lines = clean(
+        "What fraction of the tank is full?",
+        "25%",
+        "20 %",
+        "3:45",
+        "Which one is correct?",
+    )
+    assert lines == ["What fraction of the tank is full?", "25%", "20 %", "3:45", "Which one is correct?"]
+
+
+def test_keeps_ui_words_used_as_options():
+    lines = clean(
+        "Which of these is a command that sends a document to a printer?",
+        "help",
+        "print",
+        "close",
+        "Choose one option.",
+    )
+    assert lines[1:4] == ["help", "print", "close"]
+
+
+def test_keeps_trailing_options():
+    lines = clean("At what time does the train leave?", "(a) 3:45", "(b) 25%", "42")
+    assert lines == ["At what time does the train leave?", "(a) 3:45", "(b) 25%", "42"]
+
+
+def test_leading_status_bar_dropped():
+    assert clean("9:41", "100%", "Solve 2x + 3 = 7") == ["Solve 2x + 3 = 7"]
+
+
+def test_normalizes_symbols_and_whitespace():
+    assert cleanup.normalize("x²  −  y³ = “ﬁve”…") == 'x^2 - y^3 = "five"...'
+
+
+def test_low_confidence_words_dropped_but_math_kept():
+    words = [word("Find", 95, 1), word("x", 10, 1), word("qwzk", 12, 1), word("=", 5, 1), word("4", 15, 1)]
+    text, stats = cleanup.clean_words(words, min_conf=40)
+    assert text == "Find x = 4"
+    assert stats.dropped_words == 1
+
+
+def test_very_low_confidence_line_dropped():
+    words = [word("What", 90, 1), word("is", 90, 1), word("2+2?", 90, 1),
+             word("@@", 5, 2), word("##", 8, 2)]
+    text, stats = cleanup.clean_words(words)
+    assert text == "What is 2+2?"
+    assert stats.saved > 0
+    assert stats.as_dict()["tokens_saved"] == stats.saved
@@ -0,0 +1,56 @@
+import pytest
+
+from app.backend.export import export_history
+from app.backend.memory.history_manager import HistoryManager
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = HistoryManager(filepath=str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+
+def test_exports_questions_answers_and_practice(history, tmp_path):
+    history.save_question("Solve 2x + 3 = 7\nShow your work", "solve")
+    history.save_answer("Solve 2x + 3 = 7\nShow your work", "solve", "x = 2")
+    history.save_practice_set("1. Solve 3x = 9")
+    path = str(tmp_path / "out.md")
+    result = export_history(history, path)
+    text = open(path, encoding="utf-8").read()
+    assert result["entries"] == 2
+    assert "## Solve 2x + 3 = 7 · " in text
+    assert "x = 2" in text and "1. Solve 3x = 9" in text
+
+
+@pytest.mark.parametrize("fmt", ["md", "txt", "pdf"])
+def test_empty_question_gets_a_placeholder_title(history, tmp_path, fmt):
+    history.save_question("   \n ", "solve")
+    history.save_question("", "hint")
+    result = export_history(history, str(tmp_path / f"out.{fmt}"))
+    assert result["entries"] == 2
+
+
+def test_rows_saved_during_export_wait_for_the_next_one(history, tmp_path):
+    for i in range(5):
+        history.save_question(f"Question {i}", "solve")
+    progress = []
+
+    def save_more(done, total):
+        progress.append((done, total))
+        history.save_question(f"Late question {done}", "solve")
+        history.save_practice_set(f"Late practice {done}")
+
+    result = export_history(history, str(tmp_path / "out.txt"), progress=save_more)
+    assert result["entries"] == 5
+    assert progress[-1] == (5, 5)
+    assert all(done <= total for done, total in progress)
+
+
+def test_next_export_picks_up_exactly_what_the_last_one_left(history, tmp_path):
+    history.save_question("First", "solve")
+    first = export_history(history, str(tmp_path / "1.txt"))
+    history.save_question("Second", "solve")
+    second = export_history(history, str(tmp_path / "2.txt"), since=first["until"])
+    assert (first["entries"], second["entries"]) == (1, 1)
+    assert export_history(history, str(tmp_path / "3.txt"), since=second["until"])["entries"] == 0
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+openai = pytest.importorskip("openai")
+
+from app.backend.ai import ai_client, transport
+from app.backend.ai.hedging import LatencyStats, hedged_stream
+
+PRIMARY, FALLBACK = "slow/primary", "fast/fallback"
+
+
+@pytest.fixture
+def race(mock_llm, monkeypatch):
+    """hedged_stream() over the mock, recording each model's opened HTTP stream."""
+    monkeypatch.setattr(ai_client, "client", openai.OpenAI(
+        base_url=mock_llm.base_url, api_key="mock", max_retries=0,
+        http_client=transport.build_http_client(http2=False),
+    ))
+    opened = {}
+    stats = LatencyStats()
+
+    def open_stream(model, on_open, on_retry):
+        def record(response):
+            opened[model] = response
+            on_open(response)
+        return ai_client._model_stream("Solve 2x + 3 = 7", model, record, on_retry)
+
+    def run(deadline_s):
+        answer = "".join(hedged_stream([PRIMARY, FALLBACK], open_stream, deadline_s, stats=stats))
+        return answer, stats.report()
+
+    run.opened = opened
+    return run
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_fallback_wins_when_primary_misses_deadline(mock_llm, race):
+    mock_llm.model_delays = {PRIMARY: 1500, FALLBACK: 0}
+    started = time.perf_counter()
+    answer, report = race(deadline_s=0.1)
+    assert "FINAL ANSWER" in answer
+    assert time.perf_counter() - started < 1.0
+    assert report[FALLBACK]["hedged"] == 1
+    assert report[FALLBACK]["wins"] == 1
+    assert report[PRIMARY]["cancelled"] == 1
+    assert mock_llm.requests == 2
+
+
+def test_losing_stream_is_closed(mock_llm, race):
+    mock_llm.model_delays = {PRIMARY: 500, FALLBACK: 0}
+    race(deadline_s=0.05)
+    # The primary's stream opens after the race is over and is closed straight away
+    assert wait_for(lambda: PRIMARY in race.opened)
+    assert wait_for(lambda: race.opened[PRIMARY].response.is_closed)
+    assert wait_for(lambda: not any(t.name == f"hedge-{PRIMARY}" and t.is_alive()
+                                    for t in threading.enumerate()))
+
+
+def test_no_hedge_when_primary_is_fast(mock_llm, race):
+    mock_llm.model_delays = {PRIMARY: 0, FALLBACK: 0}
+    answer, report = race(deadline_s=0.5)
+    assert "FINAL ANSWER" in answer
+    assert report[PRIMARY]["wins"] == 1
+    assert FALLBACK not in report
+    assert mock_llm.requests == 1
@@ -0,0 +1,40 @@
+from PIL import Image, ImageDraw
+
+from app.backend.ocr.ocr_cache import OCRCache, fingerprint
+
+
+def render(text, margin=20, size=(240, 60)):
+    image = Image.new("RGB", (size[0] + 2 * margin, size[1] + 2 * margin), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((margin + 10, margin + 20), text, fill="black")
+    return image
+
+
+def test_key_is_stable_and_ignores_margins():
+    assert fingerprint(render("2 + 2 = ?")).key == fingerprint(render("2 + 2 = ?")).key
+    assert fingerprint(render("2 + 2 = ?", margin=5)).key == fingerprint(render("2 + 2 = ?", margin=60)).key
+
+
+def test_different_content_does_not_match():
+    a, b = fingerprint(render("2 + 2 = ?")), fingerprint(render("2 + 3 = ?"))
+    assert a.key != b.key
+    assert not a.matches(b)
+
+
+def test_key_includes_size():
+    small = render("x").resize((100, 50))
+    assert fingerprint(small).key != fingerprint(small.resize((200, 100))).key
+
+
+def test_lookup_hits_memory_then_disk(tmp_path):
+    cache = OCRCache(max_entries=4, directory=str(tmp_path))
+    fp, text = cache.lookup(render("Solve 2x = 8"))
+    assert text is None
+    cache.store(fp, "Solve 2x = 8")
+
+    assert cache.lookup(render("Solve 2x = 8", margin=40))[1] == "Solve 2x = 8"
+    assert cache.lookup(render("Solve 2x = 9"))[1] is None
+
+    fresh = OCRCache(max_entries=4, directory=str(tmp_path))
+    assert fresh.lookup(render("Solve 2x = 8"))[1] == "Solve 2x = 8"
+    assert fresh.stats()["hits_disk"] == 1
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from app.backend.ai import ai_client
+
+
+def test_sharded_practice_stops_without_waiting_for_running_shards(monkeypatch):
+    started = threading.Event()
+
+    def slow_request(prompt, route, **attrs):
+        started.set()
+        time.sleep(1.5)
+        return "1. Too late?"
+
+    monkeypatch.setattr(ai_client, "_request", slow_request)
+    t0 = time.perf_counter()
+    ai_client.generate_practice_questions_sharded(
+        ["What is osmosis?", "Solve 2x = 4"], count=30, shard_size=5, max_workers=2,
+        should_stop=lambda: started.is_set() and time.perf_counter() - t0 > 0.2,
+    )
+    assert time.perf_counter() - t0 < 1.0
+
+
+
+def test_context_keeps_questions_without_topic_terms():
+    from app.backend.ai.context_selector import select_context
+
+    history = ["What is osmosis?", "12 x 7 = ?", "12 x 7 = ?", "3 + 4 * 2 = ?"]
+    assert select_context(history) == ["What is osmosis?", "12 x 7 = ?", "3 + 4 * 2 = ?"]
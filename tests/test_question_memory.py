@@ -0,0 +1,44 @@
+import time
+
+from app.backend.memory.question_memory import QuestionMemory, make_key
+
+
+def count_writes(memory, monkeypatch):
+    writes = []
+    persist = memory._persist
+    monkeypatch.setattr(memory, "_persist", lambda: (writes.append(len(memory)), persist()))
+    return writes
+
+
+def test_batch_of_stores_is_one_write(tmp_path, monkeypatch):
+    memory = QuestionMemory(filepath=str(tmp_path / "cache.json"), flush_delay_s=0.1)
+    writes = count_writes(memory, monkeypatch)
+    for i in range(20):
+        memory.store(f"k{i}", f"answer {i}")
+    assert writes == []
+    time.sleep(0.3)
+    assert writes == [20]
+    assert QuestionMemory(filepath=str(tmp_path / "cache.json")).get("k19") == "answer 19"
+
+
+def test_flush_writes_pending_changes_once(tmp_path, monkeypatch):
+    memory = QuestionMemory(filepath=str(tmp_path / "cache.json"), flush_delay_s=60)
+    writes = count_writes(memory, monkeypatch)
+    memory.store("k", "answer")
+    memory.flush()
+    memory.flush()
+    assert writes == [1]
+    assert QuestionMemory(filepath=str(tmp_path / "cache.json")).get("k") == "answer"
+
+
+def test_zero_delay_writes_every_store(tmp_path, monkeypatch):
+    memory = QuestionMemory(filepath=str(tmp_path / "cache.json"), flush_delay_s=0)
+    writes = count_writes(memory, monkeypatch)
+    memory.store("a", "1")
+    memory.store("b", "2")
+    assert writes == [1, 2]
+
+
+def test_key_ignores_whitespace_and_unicode_forms():
+    assert make_key("Solve  2x = 4\n", "solve", "m", "v1") == make_key("Solve 2x = 4", "solve", "m", "v1")
+    assert make_key("Solve 2x = 4", "solve", "m", "v1") != make_key("Solve 2x = 4", "hint", "m", "v1")
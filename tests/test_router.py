@@ -0,0 +1,61 @@
+from app.backend.ai import router
+from app.backend.ai.router import Router
+
+TIERS = {"fast": "fast/model", "strong": "strong/model"}
+
+
+def route(text, mode="solve", **kwargs):
+    return Router(tiers=TIERS, rules=router.DEFAULT_RULES, enabled=True, **kwargs).route(text, mode)
+
+
+def test_short_questions_go_to_the_fast_model():
+    r = route("What is the capital of France?")
+    assert (r.tier, r.model, r.rule) == ("fast", "fast/model", "default")
+
+
+def test_hints_stay_fast_even_for_numericals():
+    assert route("A car travels 100 km in 2 h. Find its speed.", mode="hint").tier == "fast"
+
+
+def test_numerical_with_units_goes_strong():
+    r = route("A car travels 100 km in 2 h. Find its speed.")
+    assert (r.tier, r.rule) == ("strong", "numerical")
+    assert r.features["units"] == 2
+
+
+def test_equation_goes_strong():
+    assert route("Solve 2x + 3 = 7").rule == "equation"
+
+
+def test_practice_and_long_questions_go_strong():
+    assert route("Make me some questions", mode="practice").rule == "practice"
+    assert route(" ".join(["word"] * 400)).rule == "long"
+
+
+def test_same_text_always_routes_the_same_way():
+    text = "Calculate 3 * 4 + 5 / 2 - 1"
+    assert route(text).attrs() == route(text).attrs()
+
+
+def test_disabled_router_uses_default_model():
+    r = Router(tiers=TIERS, rules=router.DEFAULT_RULES, enabled=False, default_model="default/model").route(
+        "Solve 2x + 3 = 7", "solve")
+    assert (r.tier, r.model) == ("default", "default/model")
+
+
+def test_custom_rules_and_unknown_tiers():
+    rules = [
+        {"name": "typo", "when": {}, "tier": "huge"},
+        {"name": "mcq", "when": {"mcq": True, "chars_lt": 200}, "tier": "strong"},
+    ]
+    r = Router(tiers=TIERS, rules=rules, enabled=True).route("Pick one:\n(a) cat\n(b) dog", "solve")
+    assert r.rule == "mcq"
+    r = Router(tiers=TIERS, rules=rules, enabled=True).route("Plain question", "solve")
+    assert (r.tier, r.rule) == ("fast", None)
+
+
+def test_unreadable_rules_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text("[not json")
+    assert router.load_rules(str(path)) is router.DEFAULT_RULES
+    assert router.load_rules(str(tmp_path / "missing.json")) is router.DEFAULT_RULES
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+openai = pytest.importorskip("openai")
+
+from app.backend.ai import transport
+
+
+def make_client(server):
+    return openai.OpenAI(
+        base_url=server.base_url,
+        api_key="mock",
+        http_client=transport.build_http_client(http2=False),
+        timeout=transport.timeouts(total=5, connect=2),
+        max_retries=0,
+    )
+
+
+def complete(client):
+    return lambda: client.chat.completions.create(
+        model="mock/model", messages=[{"role": "user", "content": "Solve 2x + 3 = 7"}],
+    )
+
+
+def fast_policy(retries=3):
+    return transport.RetryPolicy(retries=retries, base_s=0.01, max_s=2)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_until_success(mock_llm, status):
+    mock_llm.inject_failures(2, status)
+    retries = []
+    response = transport.with_retries(complete(make_client(mock_llm)), fast_policy(),
+                                      on_retry=lambda attempt, e, delay: retries.append(transport.status_of(e)))
+    assert "FINAL ANSWER" in response.choices[0].message.content
+    assert retries == [status, status]
+    assert mock_llm.requests == 3
+
+
+def test_honours_retry_after(mock_llm):
+    mock_llm.inject_failures(1, 503, retry_after=0.3)
+    delays = []
+    started = time.perf_counter()
+    transport.with_retries(complete(make_client(mock_llm)), fast_policy(),
+                           on_retry=lambda attempt, e, delay: delays.append(delay))
+    assert len(delays) == 1
+    assert 0.3 <= delays[0] <= 0.3 + 0.01 / 2
+    assert time.perf_counter() - started >= 0.3
+
+
+def test_retry_after_longer_than_max_gives_up(mock_llm):
+    mock_llm.inject_failures(1, 429, retry_after=10)
+    with pytest.raises(openai.APIStatusError) as error:
+        transport.with_retries(complete(make_client(mock_llm)), fast_policy())
+    assert error.value.status_code == 429
+    assert mock_llm.requests == 1
+
+
+def test_gives_up_after_max_attempts(mock_llm):
+    mock_llm.inject_failures(10, 503)
+    with pytest.raises(openai.APIStatusError) as error:
+        transport.with_retries(complete(make_client(mock_llm)), fast_policy(retries=2))
+    assert error.value.status_code == 503
+    assert mock_llm.requests == 3
+
+
+def test_client_errors_are_not_retried(mock_llm):
+    mock_llm.inject_failures(1, 400)
+    with pytest.raises(openai.APIStatusError):
+        transport.with_retries(complete(make_client(mock_llm)), fast_policy())
+    assert mock_llm.requests == 1
+
+
+def test_connection_reused_across_requests_and_retries(mock_llm):
+    client = make_client(mock_llm)
+    mock_llm.inject_failures(2, 503)
+    for _ in range(4):
+        transport.with_retries(complete(client), fast_policy())
+    assert mock_llm.requests == 6
+    assert mock_llm.connections == 1